@@ -1,11 +1,17 @@
 import streamlit as st
 
+from catalog import power_table_registry
+
 st.set_page_config(
     page_title="Добро пожаловать в Калькулятор",
     page_icon="🌟",
     layout="centered"
 )
 
+# Таблицы мощностей всех профилей загружаются один раз на процесс и
+# дальше общие для всех сессий (см. catalog.PowerTableRegistry)
+power_table_registry().preload()
+
 st.title("🌟 Добро пожаловать в Калькулятор Клиноременных Передач!")
 st.write("---")
 
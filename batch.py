@@ -0,0 +1,413 @@
+# batch.py
+#
+# Пакетный (векторный) расчет клиноременных передач.
+# Повторяет ту же цепочку, что и main.py / pages/1_Calculator.py:
+# i -> P_расч -> сечение -> d1, d2 -> L -> Lp -> a_ут -> V -> P0 -> CL -> α1 -> Cα -> z (с уточнением по Cz),
+# но каждый шаг выполняется сразу над массивами NumPy для всех передач.
+#
+# Сечение ремня выбирается либо по порогам расчетной мощности, как в
+# determine_belt_section (section_mode='threshold'), либо перебором: полная цепочка
+# считается для каждого сечения, допустимого для режима (section_mode='all',
+# design_drives_all_sections), и варианты ранжируются по количеству ремней,
+# габариту шкивов и запасу по скорости ремня.
+
+import numpy as np
+import pandas as pd
+
+from data import (
+    LOAD_COEFFICIENTS, MIN_PULLEY_DIAMETERS, STANDARD_PULLEY_DIAMETERS, STANDARD_BELT_LENGTHS,
+    MATERIAL_P0_CORRECTION_FACTORS, P0_VALUES, CL_DATA, CALPHA_DATA, CZ_DATA, index_for, p0_index, cl_index,
+    calpha_index, cz_index
+)
+from profiling import lap_timer
+
+# Сечения в порядке determine_belt_section и верхние границы P_расч для каждого из них
+SECTIONS = ['A', 'B', 'C', 'D', 'E']
+SECTION_POWER_LIMITS = [0.75, 7.5, 30, 75]
+# Все сечения со справочными данными (при переборе рассматривается и Z(0))
+ALL_SECTIONS = list(MIN_PULLEY_DIAMETERS)
+
+# Ограничения допустимости варианта при переборе сечений (как у optimizer.optimize_drive)
+MAX_BELT_SPEED = 30.0  # м/с
+MIN_WRAP_ANGLE = 120.0  # град
+MAX_BELTS = 10
+
+LOAD_TYPE_CODES = {'1': "спокойная", '2': "средняя", '3': "тяжелая", '4': "ударная"}
+
+RESULT_COLUMNS = [
+    'P', 'n1', 'n2', 'a_approx', 'load_type', 'material',
+    'i', 'Kp', 'P_design', 'section', 'd1_min', 'd1', 'd2_calc', 'd2', 'i_actual',
+    'L_calc', 'Lp', 'a_actual', 'V', 'Pd', 'P0', 'CL', 'alpha1', 'C_alpha',
+    'z_initial', 'Cz', 'z_calc', 'z', 'error'
+]
+# Дополнительные столбцы результата при section_mode='all'
+SECTION_CHOICE_COLUMNS = ['speed_margin', 'sections_feasible']
+
+# Столбцы расчета одного сечения (_section_pipeline)
+SECTION_COLUMNS = ['d1_min', 'd1', 'd2_calc', 'd2', 'i_actual', 'L_calc', 'Lp', 'a_actual', 'V', 'Pd', 'P0', 'CL',
+                   'alpha1', 'C_alpha', 'z_initial', 'Cz', 'z_calc', 'z']
+CANDIDATE_COLUMNS = ['drive', 'rank', 'section', *SECTION_COLUMNS, 'd_max', 'speed_margin']
+
+
+# --- Векторные аналоги функций поиска из calculations.py (на индексах из data.py) ---
+
+def snap_ge(values, standard):
+    """find_nearest_standard_value(..., greater_or_equal=True) для массива."""
+    return index_for(standard).nearest_ge_many(values)
+
+
+def snap_nearest(values, standard):
+    """find_nearest_standard_value(..., greater_or_equal=False) для массива (при равенстве - меньшее)."""
+    return index_for(standard).nearest_many(values)
+
+
+def p0_many(section, V):
+    """get_p0_value для массива скоростей одного сечения (без поправки на материал)."""
+    index = p0_index(section)
+    return index.lookup_many(V) if index is not None else np.zeros_like(V)
+
+
+def cl_many(section, lp):
+    """get_cl_value для массива длин одного сечения."""
+    index = cl_index(section)
+    return index.payload_nearest_many(lp) if index is not None else np.ones_like(lp)
+
+
+def calpha_many(alpha):
+    """get_calpha_value для массива углов обхвата."""
+    return calpha_index().lookup_many(alpha)
+
+
+def cz_many(z):
+    """get_cz_value для массива целых количеств ремней."""
+    return cz_index().lookup_many(z)
+
+
+def ceil_belts(z):
+    """Округление количества ремней вверх, минимум 1 ремень."""
+    z_int = np.ceil(z)
+    return np.where(z_int > 0, z_int, 1.0)
+
+
+def _column(frame, name, default=None):
+    """Столбец frame; пропуски (и весь отсутствующий столбец) заменяются на default, если он задан."""
+    if name in frame:
+        return frame[name] if default is None else frame[name].fillna(default)
+    if default is None:
+        raise ValueError(f"Во входных данных нет столбца '{name}'.")
+    return pd.Series(default, index=frame.index)
+
+
+def _fail(error, rows, message):
+    """Записывает ошибку строкам rows (булева маска или номера), у которых ошибки еще нет."""
+    rows = np.flatnonzero(rows) if rows.dtype == bool else rows
+    rows = rows[error[rows] == None]  # noqa: E711 - поэлементное сравнение NumPy
+    error[rows] = message
+
+
+def _drive_inputs(frame):
+    """Входные столбцы, i, Kp, P_расч и поправка на материал (шаги 1-3); ошибки входных данных - в 'error'."""
+    count = len(frame)
+    P = _column(frame, 'P').to_numpy(dtype=float)
+    n1 = _column(frame, 'n1').to_numpy(dtype=float)
+    n2 = _column(frame, 'n2').to_numpy(dtype=float)
+    a_approx = _column(frame, 'a_approx').to_numpy(dtype=float)
+    load_type = _column(frame, 'load_type', '1').astype(str).str.strip()
+    material = _column(frame, 'material', next(iter(MATERIAL_P0_CORRECTION_FACTORS)))
+
+    error = np.full(count, None, dtype=object)
+
+    # --- 1. Передаточное число ---
+    _fail(error, n2 == 0, "Частота вращения ведомого вала (n2) не может быть равна нулю.")
+    with np.errstate(divide='ignore', invalid='ignore'):
+        i = n1 / n2
+
+    # --- 2. Расчетная мощность ---
+    load_name = load_type.map(lambda v: LOAD_TYPE_CODES.get(v, v))
+    kp = load_name.map(LOAD_COEFFICIENTS).to_numpy(dtype=float)
+    _fail(error, np.isnan(kp), "Неизвестный тип нагрузки.")
+    P_design = P * kp
+
+    # --- 3. Поправка на материал ---
+    material_factor = material.map(MATERIAL_P0_CORRECTION_FACTORS).to_numpy(dtype=float)
+    _fail(error, np.isnan(material_factor), "Неизвестный материал ремня.")
+
+    _fail(error, np.isnan(P_design), "Сечение ремня не определено.")
+    _fail(error, a_approx <= 0, "Межосевое расстояние не может быть равно нулю или быть отрицательным.")
+    return {'P': P, 'n1': n1, 'n2': n2, 'a_approx': a_approx, 'load_type': load_type, 'material': material,
+            'i': i, 'Kp': kp, 'P_design': P_design, 'material_factor': material_factor, 'error': error}
+
+
+def _section_pipeline(name, i, n1, a_approx, P_design, material_factor, table, lp_greater_or_equal, timer,
+                      d1=None):
+    """
+    Шаги 5-9 цепочки для передач одного сечения name (все аргументы - массивы по этим передачам).
+    d1 - заданные диаметры ведущего шкива (по умолчанию, как в design_drive, наименьший
+    стандартный не меньше d1_min).
+    Возвращает (столбцы SECTION_COLUMNS, маска "ремень слишком короткий", маска "нет P0").
+    """
+    diameters = STANDARD_PULLEY_DIAMETERS[name]
+    count = len(i)
+
+    # --- 5. Диаметры шкивов ---
+    d1_min = np.full(count, float(MIN_PULLEY_DIAMETERS[name]))
+    if d1 is None:
+        # d1 у всех передач сечения один и тот же: наименьший стандартный диаметр не меньше d1_min
+        d1 = np.full(count, float(index_for(diameters).nearest_ge(MIN_PULLEY_DIAMETERS[name])))
+    d2_calc = d1 * i
+    d2 = snap_nearest(d2_calc, diameters)
+    i_actual = d2 / (d1 * (1 - 0.01))
+    timer.lap('pulleys')
+
+    # --- 6. Длина ремня и межосевое расстояние ---
+    a = a_approx
+    L_calc = 2 * a + 0.5 * np.pi * (d1 + d2) + (d2 - d1) ** 2 / (4 * a)
+    lengths = STANDARD_BELT_LENGTHS[name]
+    Lp = snap_ge(L_calc, lengths) if lp_greater_or_equal else snap_nearest(L_calc, lengths)
+
+    w = 0.5 * np.pi * (d1 + d2)
+    discriminant = (Lp - w) ** 2 - 2 * (d2 - d1) ** 2
+    too_short = discriminant < 0
+    a_actual = 0.25 * ((Lp - w) + np.sqrt(np.where(too_short, 0.0, discriminant)))
+    timer.lap('belt_length')
+
+    # --- 7. Скорость ремня и P0 ---
+    V = (np.pi * d1 * n1) / 60000
+    p0_base = np.full(count, np.nan)
+    Pd = np.zeros(count)
+    if table is not None:
+        p0_base = table.power_many(d1, n1)
+        if table.additional is not None:
+            # Надбавка Pd только там, где P0 взята из каталога (как в design_drive)
+            Pd = np.where(p0_base > 0, table.additional.power_many(i_actual, n1), 0.0)
+    p0_base = np.where(p0_base > 0, p0_base + Pd, p0_many(name, V))
+    P0 = p0_base * material_factor
+    timer.lap('p0')
+
+    # --- 8. Коэффициенты CL и Cα ---
+    CL = cl_many(name, Lp)
+    argument = np.clip((d2 - d1) / (2 * a_actual), -1, 1)
+    alpha1 = np.degrees(np.pi - 2 * np.arcsin(argument))
+    C_alpha = calpha_many(alpha1)
+    timer.lap('coefficients')
+
+    # --- 9. Количество ремней с уточнением по Cz ---
+    denominator = P0 * CL * C_alpha
+    no_power = ~(denominator > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_initial = P_design / denominator
+        z_rounded = ceil_belts(np.where(no_power, 1.0, z_initial))
+        Cz = cz_many(z_rounded)
+        z_calc = P_design / (denominator * Cz)
+    z = ceil_belts(np.where(no_power, 1.0, z_calc))
+    timer.lap('belts')
+
+    values = {'d1_min': d1_min, 'd1': d1, 'd2_calc': d2_calc, 'd2': d2, 'i_actual': i_actual, 'L_calc': L_calc,
+              'Lp': Lp, 'a_actual': a_actual, 'V': V, 'Pd': Pd, 'P0': P0, 'CL': CL, 'alpha1': alpha1,
+              'C_alpha': C_alpha, 'z_initial': z_initial, 'Cz': Cz, 'z_calc': z_calc, 'z': z}
+    return values, too_short, no_power
+
+
+def _p0_upper_bound(name, table):
+    """Оценка сверху для P0 сечения (без поправки на материал) или inf, если оценить нельзя."""
+    bound = max(P0_VALUES.get(name, [0.0]))
+    if table is not None:
+        if not hasattr(table, 'upper_bound'):
+            return np.inf
+        catalog = table.upper_bound()
+        if table.additional is not None:
+            catalog += table.additional.upper_bound()
+        bound = max(bound, catalog)
+    return bound
+
+
+def _section_candidates(drives, power_tables, lp_greater_or_equal, sections, max_belt_speed, min_wrap_angle,
+                        max_belts, timer):
+    """
+    Варианты всех передач без ошибок входных данных: список (сечение, номера передач,
+    столбцы SECTION_COLUMNS, маска допустимых) - по одному векторному проходу на сечение.
+    До прохода отсекаются передачи, для которых сечение заведомо недопустимо: скорость
+    ремня уже на наименьшем шкиве больше max_belt_speed или даже при наибольших P0, CL,
+    Cα и Cz ремней получается больше max_belts.
+    """
+    valid = np.flatnonzero(drives['error'] == None)  # noqa: E711
+    n1, P_design, material_factor = drives['n1'], drives['P_design'], drives['material_factor']
+    factors_best = max(CALPHA_DATA.values()) * max(CZ_DATA.values())
+    parts = []
+    for name in sections:
+        table = power_tables.get(name)
+        # d1 сечения одинаков для всех передач: наименьший стандартный шкив не меньше d1_min
+        d1 = index_for(STANDARD_PULLEY_DIAMETERS[name]).nearest_ge(MIN_PULLEY_DIAMETERS[name])
+        best = _p0_upper_bound(name, table) * max(CL_DATA.get(name, {}).values(), default=1.0) * factors_best
+        keep = np.pi * d1 * n1[valid] / 60000 <= max_belt_speed
+        keep &= P_design[valid] <= max_belts * best * material_factor[valid]
+        rows = valid[keep]
+        timer.lap('section')
+        if len(rows) == 0:
+            continue
+        values, too_short, no_power = _section_pipeline(
+            name, drives['i'][rows], n1[rows], drives['a_approx'][rows], P_design[rows], material_factor[rows],
+            table, lp_greater_or_equal, timer)
+        ok = ~too_short & ~no_power & (values['alpha1'] >= min_wrap_angle) & (values['z'] <= max_belts)
+        parts.append((name, rows, values, ok))
+    return parts
+
+
+def _better(z, d_max, V, best_z, best_d_max, best_V):
+    """Вариант лучше: меньше ремней, затем меньший наибольший шкив, затем меньшая скорость (больше запас)."""
+    return (z < best_z) | ((z == best_z) & ((d_max < best_d_max) | ((d_max == best_d_max) & (V < best_V))))
+
+
+def _best_candidates(parts, count):
+    """Для каждой передачи - номер лучшей части parts (-1, если допустимых нет) и число допустимых сечений."""
+    best = np.full(count, -1)
+    best_z, best_d_max, best_V = np.full(count, np.inf), np.full(count, np.inf), np.full(count, np.inf)
+    feasible = np.zeros(count, dtype=int)
+    for k, (_, rows, values, ok) in enumerate(parts):
+        z, d_max, V = np.where(ok, values['z'], np.inf), np.maximum(values['d1'], values['d2']), values['V']
+        better = ok & _better(z, d_max, V, best_z[rows], best_d_max[rows], best_V[rows])
+        won = rows[better]
+        best[won], best_z[won], best_d_max[won], best_V[won] = k, z[better], d_max[better], V[better]
+        feasible[rows] += ok
+    return best, feasible
+
+
+def design_drives_all_sections(inputs, power_tables=None, lp_greater_or_equal=False, sections=None,
+                               max_belt_speed=MAX_BELT_SPEED, min_wrap_angle=MIN_WRAP_ANGLE, max_belts=MAX_BELTS):
+    """
+    Полная цепочка расчета для КАЖДОГО сечения (по умолчанию ALL_SECTIONS), допустимого
+    для режима передачи: скорость ремня не больше max_belt_speed, угол обхвата не меньше
+    min_wrap_angle, ремней не больше max_belts, длина ремня и P0 определены.
+
+    inputs, power_tables, lp_greater_or_equal - как у design_drives_batch.
+    Возвращает DataFrame вариантов (столбцы CANDIDATE_COLUMNS): 'drive' - индекс
+    передачи во входных данных, 'rank' - место варианта среди сечений этой передачи
+    (1 - лучший: меньше ремней, затем меньший наибольший шкив d_max, затем больший
+    запас по скорости speed_margin = max_belt_speed - V). Передачи с ошибками входных
+    данных и без допустимых сечений в результат не попадают.
+    """
+    frame = inputs if isinstance(inputs, pd.DataFrame) else pd.DataFrame(inputs)
+    drives = _drive_inputs(frame)
+    parts = _section_candidates(drives, power_tables or {}, lp_greater_or_equal, sections or ALL_SECTIONS,
+                                max_belt_speed, min_wrap_angle, max_belts, lap_timer())
+    parts = [(name, rows[ok], {column: values[column][ok] for column in SECTION_COLUMNS})
+             for name, rows, values, ok in parts if ok.any()]
+    if not parts:
+        return pd.DataFrame(columns=CANDIDATE_COLUMNS)
+
+    drive = np.concatenate([rows for _, rows, _ in parts])
+    columns = {column: np.concatenate([values[column] for *_, values in parts]) for column in SECTION_COLUMNS}
+    section = np.repeat(np.arange(len(parts)), [len(rows) for _, rows, _ in parts])
+    d_max = np.maximum(columns['d1'], columns['d2'])
+    order = np.lexsort((columns['V'], d_max, columns['z'], drive))
+    drive = drive[order]
+    first = np.flatnonzero(np.r_[True, drive[1:] != drive[:-1]])
+    rank = np.arange(len(drive)) - np.repeat(first, np.diff(np.r_[first, len(drive)])) + 1
+
+    out = pd.DataFrame({
+        'drive': frame.index[drive], 'rank': rank,
+        'section': np.array([name for name, *_ in parts], dtype=object)[section[order]],
+        **{column: values[order] for column, values in columns.items()},
+        'd_max': d_max[order], 'speed_margin': max_belt_speed - columns['V'][order],
+    })
+    out['z'] = out['z'].astype(int)
+    return out[CANDIDATE_COLUMNS]
+
+
+def design_drives_batch(inputs, power_tables=None, lp_greater_or_equal=False, section_mode='threshold'):
+    """
+    Рассчитывает сразу много клиноременных передач.
+
+    inputs - DataFrame (или словарь столбцов) со столбцами:
+        P         - номинальная мощность, кВт;
+        n1, n2    - частоты вращения ведущего и ведомого валов, об/мин;
+        a_approx  - примерное межосевое расстояние, мм;
+        load_type - тип нагрузки: '1'..'4' или название ("средняя" и т.п.), по умолчанию '1';
+        material  - название материала из MATERIAL_P0_CORRECTION_FACTORS (необязательно).
+    power_tables - словарь {сечение: PowerTable} с точными каталожными данными P0.
+        Для сечений без таблицы (и вне покрытия каталога) используется get_p0_value.
+    lp_greater_or_equal - как подбирать стандартную длину: ближайшая (как в main.py)
+        или ближайшая не меньше расчетной (как на странице калькулятора).
+    section_mode - 'threshold': сечение по порогам P_расч (как determine_belt_section);
+        'all': лучший вариант из перебора всех допустимых сечений (design_drives_all_sections
+        с ограничениями по умолчанию), в результате добавляются столбцы SECTION_CHOICE_COLUMNS.
+        Пакетные проверки (main.py --batch, service.py) по умолчанию идут в режиме 'all':
+        он дороже порогового примерно в 1.7 раза по чистому расчету, а на чтении и записи
+        файла разница теряется. Здесь по умолчанию 'threshold', чтобы функция оставалась
+        векторной заменой скалярной цепочки.
+
+    Возвращает DataFrame с одной строкой на передачу (столбцы RESULT_COLUMNS).
+    Строки с ошибкой не прерывают расчет: текст ошибки пишется в столбец 'error',
+    а расчетные значения для них остаются NaN.
+
+    В режиме 'threshold' результаты совпадают со скалярной цепочкой из calculations.py; α1 может
+    отличаться в последнем знаке (np.arcsin против math.asin).
+    Время этапов записывается, если включен замер (см. profiling.recording).
+    """
+    if section_mode not in ('threshold', 'all'):
+        raise ValueError(f"Неизвестный режим выбора сечения: {section_mode}.")
+    timer = lap_timer()
+    frame = inputs if isinstance(inputs, pd.DataFrame) else pd.DataFrame(inputs)
+    power_tables = power_tables or {}
+    count = len(frame)
+
+    drives = _drive_inputs(frame)
+    error, P_design = drives['error'], drives['P_design']
+    timer.lap('design_power')
+
+    results = {name: np.full(count, np.nan) for name in SECTION_COLUMNS}
+    section = np.full(count, None, dtype=object)
+    extra = {}
+
+    if section_mode == 'all':
+        # --- 4-9. Все допустимые сечения, в результат - лучший вариант каждой передачи ---
+        parts = _section_candidates(drives, power_tables, lp_greater_or_equal, ALL_SECTIONS,
+                                    MAX_BELT_SPEED, MIN_WRAP_ANGLE, MAX_BELTS, timer)
+        best, feasible = _best_candidates(parts, count)
+        for k, (name, rows, values, _) in enumerate(parts):
+            won = np.flatnonzero(best[rows] == k)
+            target = rows[won]
+            section[target] = name
+            for column in SECTION_COLUMNS:
+                results[column][target] = values[column][won]
+        timer.lap('rank')
+        extra['speed_margin'] = MAX_BELT_SPEED - results['V']
+        extra['sections_feasible'] = feasible
+        _fail(error, feasible == 0,
+              "Нет допустимого сечения ремня: для всех сечений нарушены ограничения по скорости ремня, "
+              "углу обхвата или количеству ремней.")
+    else:
+        # --- 4. Сечение ремня ---
+        section_idx = np.searchsorted(SECTION_POWER_LIMITS, P_design, side='left')
+        for k, name in enumerate(SECTIONS):
+            rows = np.flatnonzero((section_idx == k) & (error == None))  # noqa: E711
+            if len(rows) == 0:
+                continue
+            section[rows] = name
+            timer.lap('section')
+            values, too_short, no_power = _section_pipeline(
+                name, drives['i'][rows], drives['n1'][rows], drives['a_approx'][rows], P_design[rows],
+                drives['material_factor'][rows], power_tables.get(name), lp_greater_or_equal, timer)
+            _fail(error, rows[too_short], "Невозможно рассчитать: длина ремня слишком мала для выбранных шкивов.")
+            _fail(error, rows[no_power], "Не удалось определить P0 для данного сечения и скорости.")
+            for column in SECTION_COLUMNS:
+                results[column][rows] = values[column]
+
+    # Для строк с ошибкой расчетные значения не показываем
+    failed = error != None  # noqa: E711
+    for values in results.values():
+        values[failed] = np.nan
+    section[failed] = None
+
+    out = pd.DataFrame({
+        'P': drives['P'], 'n1': drives['n1'], 'n2': drives['n2'], 'a_approx': drives['a_approx'],
+        'load_type': drives['load_type'].to_numpy(), 'material': drives['material'].to_numpy(),
+        'i': drives['i'], 'Kp': drives['Kp'], 'P_design': P_design, 'section': section,
+        **results,
+        'error': error,
+        **extra,
+    }, index=frame.index)
+    out['z'] = out['z'].astype('Int64')
+    out = out[RESULT_COLUMNS + list(extra)]
+    timer.lap('assemble')
+    return out
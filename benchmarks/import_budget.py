@@ -0,0 +1,78 @@
+# benchmarks/import_budget.py
+#
+# Проверка времени холодного старта CLI: `python main.py --help` запускается
+# несколько раз отдельным процессом, берется лучшее время. Дополнительно
+# проверяется, что при импорте main не загружаются тяжелые модули
+# (NumPy, pandas, Streamlit, PyMuPDF) - они нужны только пакетному режиму,
+# каталогу и веб-странице.
+#
+#   python benchmarks/import_budget.py --budget-ms 150
+#
+# Завершается с кодом 1, если бюджет превышен или тяжелый модуль импортирован.
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('numpy', 'pandas', 'streamlit', 'fitz', 'pymupdf', 'scipy')
+DEFAULT_BUDGET_MS = 150.0
+
+
+def cold_start_seconds(repeat=7):
+    """Лучшее из repeat время запуска `python main.py --help`, секунды."""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "main.py", "--help"], cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        runs.append(time.perf_counter() - started)
+    return min(runs)
+
+
+def interpreter_start_seconds(repeat=7):
+    """Время запуска пустого интерпретатора - нижняя граница, на которую CLI не влияет."""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        runs.append(time.perf_counter() - started)
+    return min(runs)
+
+
+def heavy_imports():
+    """Тяжелые модули, загруженные при `import main`."""
+    code = ("import sys, main; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True, text=True)
+    return [name for name in result.stdout.strip().split(',') if name]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бюджет времени холодного старта CLI.")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"допустимое время `python main.py --help`, мс (по умолчанию {DEFAULT_BUDGET_MS:.0f})")
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    failed = False
+    heavy = heavy_imports()
+    if heavy:
+        print(f"ОШИБКА: при импорте main загружаются тяжелые модули: {', '.join(heavy)}")
+        failed = True
+
+    baseline = interpreter_start_seconds(args.repeat)
+    startup = cold_start_seconds(args.repeat)
+    print(f"Пустой интерпретатор: {baseline * 1000:.1f} мс")
+    print(f"python main.py --help: {startup * 1000:.1f} мс (бюджет {args.budget_ms:.0f} мс, "
+          f"собственные импорты CLI ~{(startup - baseline) * 1000:.1f} мс)")
+    if startup * 1000 > args.budget_ms:
+        print("ОШИБКА: бюджет времени старта превышен.")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
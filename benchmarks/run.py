@@ -0,0 +1,431 @@
+# benchmarks/run.py
+#
+# Набор бенчмарков (запускается без сети, все входные данные синтетические):
+#   calc    - микробенчмарки всех функций calculations.py;
+#   design  - полный расчет одной передачи (design_drive), в т.ч. с каталогом и из кэша,
+#             и анализ допусков Монте-Карло на 100k выборок;
+#   batch   - пакетный расчет design_drives_batch на 10k / 100k / 1M передач
+#             (сечение по порогам мощности и перебором всех сечений);
+#   catalog - сборка и загрузка бинарного каталога, чтение CSV;
+#   parser  - разбор текста таблиц, индекс страниц и полный разбор синтетического PDF (PyMuPDF);
+#             перед замерами проверяется, что геометрический и текстовый разбор дают одни и те же ячейки;
+#   startup - холодный старт CLI (`python main.py --help`, см. import_budget.py).
+#
+# Результаты пишутся в JSON. Для каждой метрики хранится время одной операции
+# (лучшее из нескольких повторов) - чем меньше, тем лучше.
+#
+#   python benchmarks/run.py run --out benchmarks/results/latest.json
+#   python benchmarks/run.py run --quick --baseline benchmarks/baseline.json --threshold 0.25
+#   python benchmarks/run.py compare benchmarks/baseline.json benchmarks/results/latest.json
+#
+# compare (и run с --baseline) завершается с кодом 1, если хотя бы одна метрика
+# стала медленнее базовой больше чем на threshold (0.25 = на 25%).
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+GROUPS = ['calc', 'design', 'batch', 'catalog', 'parser', 'startup']
+DEFAULT_THRESHOLD = 0.25
+
+
+def measure(func, repeat=5, min_time=0.2, items=1):
+    """
+    Время одного вызова func: число вызовов подбирается так, чтобы замер длился
+    не меньше min_time, затем замер повторяется repeat раз.
+    items - сколько объектов обрабатывает один вызов (для расчета пропускной способности).
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+    runs = [elapsed / number] + [timer.timeit(number) / number for _ in range(repeat - 1)]
+    return {'seconds': min(runs), 'median_seconds': statistics.median(runs), 'calls': number,
+            'repeat': repeat, 'items': items}
+
+
+def measure_once(func, repeat=3, items=1):
+    """Для долгих операций: каждый повтор - один вызов."""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - started)
+    return {'seconds': min(runs), 'median_seconds': statistics.median(runs), 'calls': 1,
+            'repeat': repeat, 'items': items}
+
+
+# --- Синтетические данные ---
+
+def synthetic_inventory(count, seed=1):
+    """DataFrame входных данных для design_drives_batch."""
+    import numpy as np
+    import pandas as pd
+    from data import MATERIAL_P0_CORRECTION_FACTORS
+
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'P': rng.uniform(0.2, 120, count).round(2),
+        'n1': rng.choice([720.0, 960.0, 1450.0, 2900.0], count),
+        'n2': rng.uniform(200, 1500, count).round(0),
+        'a_approx': rng.uniform(150, 3000, count).round(0),
+        'load_type': rng.choice(list('1234'), count),
+        'material': rng.choice(list(MATERIAL_P0_CORRECTION_FACTORS), count),
+    })
+
+
+def synthetic_catalog_pdf(path, pages=200, table_every=10):
+    """
+    PDF-каталог: на каждой table_every-й странице - таблица Pb с подписью профиля
+    и таблица Pd, на остальных - текст-заполнитель. Возвращает число страниц с таблицами.
+    """
+    import fitz
+
+    profiles = ['A', 'B', 'C', 'D', 'E']
+    diameters = [56, 60, 63, 67, 71, 75, 80, 90]
+    ratios = ["1,00-1,01", "1,02-1,05", "1,06-1,11", "1,12-1,18", "1,19-1,26", "1,27-1,38", "1,39-1,57", "1,58-1,94"]
+    doc = fitz.open()
+    tables = 0
+    for page_num in range(pages):
+        page = doc.new_page()
+        if page_num % table_every:
+            lines = [f"Catalog text, page {page_num + 1}. Belt construction and installation notes."] * 40
+        else:
+            tables += 1
+            profile = profiles[(page_num // table_every) % len(profiles)]
+            lines = [f"Profile {profile}", "TABLE 4 - P (kW) referred to Ø (mm)", "RPM / Ø",
+                     " ".join(str(d) for d in diameters)]
+            for rpm in range(100, 3600, 100):
+                rpm_text = f"{rpm // 1000}.{rpm % 1000:03d}" if rpm >= 1000 else str(rpm)
+                lines.append(rpm_text + " " + " ".join(f"{d * rpm / 40000:.2f}".replace('.', ',') for d in diameters))
+            lines += ["Pd (kW)", " ".join(ratios)]
+            for rpm in range(100, 3600, 100):
+                rpm_text = f"{rpm // 1000}.{rpm % 1000:03d}" if rpm >= 1000 else str(rpm)
+                lines.append(rpm_text + " " + " ".join(f"{k * rpm / 200000:.2f}".replace('.', ',')
+                                                        for k in range(len(ratios))))
+        y = 40
+        for line in lines:
+            page.insert_text((40, y), line, fontname="helv", fontsize=8)
+            y += 10
+    doc.save(path)
+    return tables
+
+
+# --- Группы бенчмарков ---
+
+def bench_calc(quick):
+    import calculations as c
+    from data import STANDARD_PULLEY_DIAMETERS, load_power_data
+
+    df = load_power_data('C')
+    diameters = STANDARD_PULLEY_DIAMETERS['C']
+    cases = {
+        'get_power_from_dataframe': lambda: c.get_power_from_dataframe(df, 203.0, 1234.0),
+        'calculate_transmission_ratio': lambda: c.calculate_transmission_ratio(1450, 500),
+        'calculate_design_power': lambda: c.calculate_design_power(11, '2'),
+        'determine_belt_section': lambda: c.determine_belt_section(13.2, 1450),
+        'get_min_pulley_diameter': lambda: c.get_min_pulley_diameter('C'),
+        'find_nearest_standard_value': lambda: c.find_nearest_standard_value(522.0, diameters, False),
+        'calculate_belt_length': lambda: c.calculate_belt_length(180, 530, 800),
+        'calculate_actual_center_distance': lambda: c.calculate_actual_center_distance(2800, 180, 530),
+        'get_actual_transmission_ratio': lambda: c.get_actual_transmission_ratio(180, 530),
+        'calculate_belt_speed': lambda: c.calculate_belt_speed(180, 1450),
+        'get_p0_value': lambda: c.get_p0_value('C', 13.7),
+        'get_cl_value': lambda: c.get_cl_value('C', 2800),
+        'calculate_angle_of_wrap': lambda: c.calculate_angle_of_wrap(180, 530, 823.8),
+        'get_calpha_value': lambda: c.get_calpha_value(155.6),
+        'get_cz_value': lambda: c.get_cz_value(4),
+        'calculate_number_of_belts': lambda: c.calculate_number_of_belts(13.2, 3.0, 1.0, 0.93, 0.95),
+    }
+    repeat = 3 if quick else 5
+    return {f"calc.{name}": measure(func, repeat=repeat, min_time=0.05 if quick else 0.2)
+            for name, func in cases.items()}
+
+
+def bench_design(quick):
+    from calculations import design_drive
+    from catalog import power_table_registry
+    from design_cache import DesignCache, cached_design_drive
+    from design_space import LEVELS, sweep_design_space
+    from sensitivity import sensitivity_analysis
+    from tolerance import tolerance_analysis
+
+    tables = power_table_registry().tables()
+    cache = DesignCache(disk_path=None)
+    args = (11, 1450, 500, 800, '2')
+    cached_design_drive(*args, power_tables=tables, cache=cache)
+    repeat, min_time = (3, 0.05) if quick else (5, 0.2)
+    return {
+        'design.single': measure(lambda: design_drive(*args), repeat, min_time),
+        'design.single_catalog': measure(lambda: design_drive(*args, power_tables=tables), repeat, min_time),
+        'design.cached_hit': measure(lambda: cached_design_drive(*args, power_tables=tables, cache=cache),
+                                     repeat, min_time),
+        'design.sensitivity': measure(lambda: sensitivity_analysis(*args, power_tables=tables), repeat, min_time),
+        'design.space_map': measure(lambda: sweep_design_space(*args, power_tables=tables, points=LEVELS[-1]),
+                                    repeat, min_time),
+        'design.tolerance_100k': measure_once(
+            lambda: tolerance_analysis(*args, power_tables=tables, samples=100_000, seed=1), repeat, 100_000),
+    }
+
+
+def bench_batch(quick):
+    from batch import design_drives_batch
+    from catalog import power_table_registry
+
+    tables = power_table_registry().tables()
+    results = {}
+    sizes = [10_000, 100_000] if quick else [10_000, 100_000, 1_000_000]
+    for size in sizes:
+        inventory = synthetic_inventory(size)
+        label = f"{size // 1000}k" if size < 1_000_000 else f"{size // 1_000_000}M"
+        results[f"batch.{label}"] = measure_once(lambda: design_drives_batch(inventory, tables),
+                                                 repeat=1 if size >= 1_000_000 else 3, items=size)
+        results[f"batch.{label}_all_sections"] = measure_once(
+            lambda: design_drives_batch(inventory, tables, section_mode='all'),
+            repeat=1 if size >= 1_000_000 else 3, items=size)
+    return results
+
+
+def bench_catalog(quick):
+    import numpy as np
+
+    import catalog
+    import data
+
+    workdir = tempfile.mkdtemp(prefix="bench_catalog_")
+    try:
+        for name in os.listdir(os.path.join(ROOT, "parsed_data")):
+            if name.endswith((".csv", ".npz")):
+                shutil.copy(os.path.join(ROOT, "parsed_data", name), workdir)
+        source = os.path.join(workdir, "power_data_C_Pb_findtables.csv")
+
+        def load_cold():
+            catalog._loaded.clear()
+            return catalog.load_catalog(workdir)
+
+        linear = catalog.load_catalog(workdir).power_table('C')
+        cubic = catalog.load_catalog(workdir).power_table('C', interpolation='cubic')
+        d_many = np.linspace(linear.d_axis[0], linear.d_axis[-1], 10_000)
+        n_many = np.linspace(linear.n_axis[0], linear.n_axis[-1], 10_000)[::-1]
+
+        repeat, min_time = (3, 0.05) if quick else (5, 0.2)
+        return {
+            'catalog.compile': measure(lambda: catalog.compile_catalog(workdir), repeat, min_time),
+            'catalog.load_cold': measure(load_cold, repeat, min_time),
+            'catalog.load_warm': measure(lambda: catalog.load_catalog(workdir), repeat, min_time),
+            'catalog.read_power_csv': measure(lambda: data.read_power_csv(source), repeat, min_time),
+            'catalog.power_table': measure(lambda: catalog.load_catalog(workdir).power_table('C'),
+                                           repeat, min_time),
+            'catalog.power_linear': measure(lambda: linear.power(203.0, 1234.0), repeat, min_time),
+            'catalog.power_cubic': measure(lambda: cubic.power(203.0, 1234.0), repeat, min_time),
+            'catalog.power_many_linear': measure_once(lambda: linear.power_many(d_many, n_many),
+                                                      repeat=repeat, items=d_many.size),
+            'catalog.power_many_cubic': measure_once(lambda: cubic.power_many(d_many, n_many),
+                                                     repeat=repeat, items=d_many.size),
+        }
+    finally:
+        catalog._loaded.clear()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def check_geometry_engine(page):
+    """
+    Ячейки Pb страницы по координатам (pdf_geometry.py) должны совпасть с текстовым разбором.
+    Иначе RuntimeError: замерять скорость разбора, который теряет ячейки, бессмысленно.
+    """
+    import pdf_parser
+    from pdf_geometry import extract_page_cells
+
+    geometry = extract_page_cells(page)
+    text = {(row['d'], row['n1']): row['Pb']
+            for row in pdf_parser.parse_power_tables_from_text(page.get_text("text")) or []}
+    if geometry != text:
+        missing, extra = len(text.keys() - geometry.keys()), len(geometry.keys() - text.keys())
+        changed = sum(geometry[key] != value for key, value in text.items() if key in geometry)
+        raise RuntimeError(f"Геометрический разбор не совпал с текстовым: ячеек {len(geometry)} из {len(text)}, "
+                           f"пропущено {missing}, лишних {extra}, с другим значением {changed}.")
+
+
+def bench_parser(quick):
+    import fitz
+    import pdf_parser
+    from pdf_geometry import extract_page_cells
+
+    workdir = tempfile.mkdtemp(prefix="bench_parser_")
+    try:
+        pages = 100 if quick else 400
+        pdf_path = os.path.join(workdir, "catalog.pdf")
+        tables = synthetic_catalog_pdf(pdf_path, pages=pages)
+        with fitz.open(pdf_path) as doc:
+            check_geometry_engine(doc[0])
+            table_text = doc[0].get_text("text")
+            geometry = lambda: extract_page_cells(doc[0])  # noqa: E731
+            results = {'parser.geometry_page': measure(geometry, 3, 0.05 if quick else 0.2)}
+        profile_map = pdf_parser.discover_profile_map(pdf_path)
+
+        repeat, min_time = (3, 0.05) if quick else (5, 0.2)
+        results.update({
+            'parser.parse_power_tables_from_text': measure(
+                lambda: pdf_parser.parse_power_tables_from_text(table_text), repeat, min_time),
+            'parser.parse_catalog_tables_from_text': measure(
+                lambda: pdf_parser.parse_catalog_tables_from_text(table_text), repeat, min_time),
+            'parser.index_pages': measure_once(lambda: pdf_parser.discover_profile_map(pdf_path),
+                                               repeat=3, items=pages),
+            'parser.parse_catalog': measure_once(
+                lambda: pdf_parser.parse_catalog(pdf_path, profile_map, workers=1), repeat=3, items=tables),
+        })
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def bench_startup(quick):
+    from import_budget import cold_start_seconds
+
+    repeat = 3 if quick else 7
+    return {'startup.cli': {'seconds': cold_start_seconds(repeat), 'median_seconds': None, 'calls': 1,
+                            'repeat': repeat, 'items': 1}}
+
+
+BENCHMARKS = {'calc': bench_calc, 'design': bench_design, 'batch': bench_batch,
+              'catalog': bench_catalog, 'parser': bench_parser, 'startup': bench_startup}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(groups, quick=False):
+    import contextlib
+    import io
+
+    import numpy
+
+    metrics = {}
+    for group in groups:
+        started = time.perf_counter()
+        # load_power_data и парсер печатают сообщения - в отчете они не нужны
+        with contextlib.redirect_stdout(io.StringIO()):
+            metrics.update(BENCHMARKS[group](quick))
+        print(f"{group}: {time.perf_counter() - started:.1f} с")
+    return {
+        'meta': {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(), 'python': platform.python_version(), 'numpy': numpy.__version__,
+            'platform': platform.platform(), 'cpus': os.cpu_count(), 'quick': quick,
+        },
+        'metrics': metrics,
+    }
+
+
+def _format_time(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.2f} мкс"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} мс"
+    return f"{seconds:.2f} с"
+
+
+def print_results(results):
+    for name, metric in results['metrics'].items():
+        line = f"  {name:<42} {_format_time(metric['seconds']):>12}"
+        if metric['items'] > 1:
+            line += f"  ({metric['items'] / metric['seconds']:,.0f} шт./с)"
+        print(line)
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Сравнивает метрики current с baseline. Возвращает список регрессий
+    (метрики, время которых выросло больше чем в 1 + threshold раз).
+    """
+    regressions = []
+    print(f"{'метрика':<44} {'база':>12} {'сейчас':>12} {'изменение':>10}")
+    for name, metric in current['metrics'].items():
+        base = baseline['metrics'].get(name)
+        if base is None:
+            print(f"{name:<44} {'-':>12} {_format_time(metric['seconds']):>12}   (нет в базе)")
+            continue
+        ratio = metric['seconds'] / base['seconds'] if base['seconds'] > 0 else 1.0
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append((name, ratio))
+            flag = "  РЕГРЕССИЯ"
+        print(f"{name:<44} {_format_time(base['seconds']):>12} {_format_time(metric['seconds']):>12} "
+              f"{(ratio - 1) * 100:>+9.1f}%{flag}")
+    missing = sorted(set(baseline['metrics']) - set(current['metrics']))
+    if missing:
+        print(f"Не измерены в текущем запуске: {', '.join(missing)}")
+    return regressions
+
+
+def _load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки калькулятора клиноременных передач.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="выполнить бенчмарки и сохранить результаты в JSON")
+    run_parser.add_argument('--groups', default=','.join(GROUPS), help=f"группы через запятую: {', '.join(GROUPS)}")
+    run_parser.add_argument('--quick', action='store_true', help="меньше повторов и без пакета 1M")
+    run_parser.add_argument('--out', default=os.path.join(ROOT, "benchmarks", "results", "latest.json"))
+    run_parser.add_argument('--baseline', help="сразу сравнить с базовым JSON")
+    run_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    compare_parser = commands.add_parser('compare', help="сравнить результаты с базовыми")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help="допустимое замедление (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        groups = [g.strip() for g in args.groups.split(',') if g.strip()]
+        unknown = [g for g in groups if g not in BENCHMARKS]
+        if unknown:
+            print(f"Неизвестные группы: {', '.join(unknown)}")
+            return 2
+        current = run(groups, args.quick)
+        print_results(current)
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены: {args.out}")
+        if not args.baseline:
+            return 0
+        baseline = _load(args.baseline)
+    else:
+        baseline, current = _load(args.baseline), _load(args.current)
+
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"Регрессий: {len(regressions)} (порог {args.threshold:.0%})")
+        return 1
+    print(f"Регрессий нет (порог {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,125 @@
+# benchmarks/service_load.py
+#
+# Нагрузочный клиент для service.py: connections соединений keep-alive
+# параллельно отправляют POST /design, в конце выводятся пропускная способность
+# и перцентили задержки на стороне клиента, а также /stats сервиса.
+#
+#   python benchmarks/service_load.py --spawn --requests 20000 --connections 64
+#
+# --spawn запускает сервис отдельным процессом на свободном порту и останавливает его по окончании.
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _request(method, path, payload=None):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else b''
+    return (f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode('latin-1') + body
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def _worker(host, port, count, latencies, failures, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(count):
+            drive = {'P': round(rng.uniform(0.5, 90), 2), 'n1': rng.choice([960, 1450, 2900]),
+                     'n2': rng.randint(300, 1400), 'a_approx': rng.randint(300, 2500), 'load_type': rng.choice('1234')}
+            started = time.perf_counter()
+            writer.write(_request("POST", "/design", drive))
+            status, result = await _read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                failures.append(result)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, requests, connections):
+    latencies, failures = [], []
+    per_connection = [requests // connections + (k < requests % connections) for k in range(connections)]
+    started = time.perf_counter()
+    await asyncio.gather(*(_worker(host, port, count, latencies, failures, k)
+                           for k, count in enumerate(per_connection)))
+    elapsed = time.perf_counter() - started
+
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(_request("GET", "/stats"))
+    _, stats = await _read_response(reader)
+    writer.close()
+
+    latencies.sort()
+    percentile = lambda q: latencies[min(len(latencies) - 1, int(q / 100 * len(latencies)))] * 1000  # noqa: E731
+    print(f"Запросов: {requests}, соединений: {connections}, ошибок: {len(failures)}")
+    print(f"Время: {elapsed:.2f} с, {requests / elapsed:,.0f} запросов/с")
+    print(f"Задержка (клиент), мс: p50 {percentile(50):.2f}, p90 {percentile(90):.2f}, "
+          f"p99 {percentile(99):.2f}, max {latencies[-1] * 1000:.2f}")
+    print(f"Сервис: {json.dumps(stats, ensure_ascii=False)}")
+    return failures
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(host, port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочный тест сервиса расчета передач.")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--connections', type=int, default=64)
+    parser.add_argument('--spawn', action='store_true', help="запустить сервис на время теста")
+    args = parser.parse_args(argv)
+
+    process = None
+    if args.spawn:
+        args.port = _free_port()
+        process = subprocess.Popen([sys.executable, os.path.join(ROOT, "service.py"), "--port", str(args.port)],
+                                   cwd=ROOT)
+    try:
+        if not _wait_for(args.host, args.port):
+            print(f"Сервис на {args.host}:{args.port} не отвечает.")
+            return 1
+        failures = asyncio.run(run_load(args.host, args.port, args.requests, args.connections))
+        return 1 if failures else 0
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,15 +1,18 @@
 # calculations.py (Финальная версия без scipy)
 
 import math
-import pandas as pd
 from data import (
-    LOAD_COEFFICIENTS, P0_DATA_BY_V_RANGES, P0_VALUES, CL_DATA, CALPHA_DATA, CZ_DATA, MIN_PULLEY_DIAMETERS
+    LOAD_COEFFICIENTS, P0_DATA_BY_V_RANGES, P0_VALUES, CL_DATA, CALPHA_DATA, CZ_DATA, MIN_PULLEY_DIAMETERS,
+    STANDARD_PULLEY_DIAMETERS, STANDARD_BELT_LENGTHS, index_for, p0_index, cl_index, calpha_index, cz_index
 )
+from profiling import lap_timer
 
 
 def get_power_from_dataframe(df, d_query, n_query):
     """
     Извлекает мощность из DataFrame с помощью ручной билинейной интерполяции.
+    Для многократных запросов используйте power_table.PowerTable - она дает
+    те же значения без повторной фильтрации DataFrame.
     """
     if df is None or df.empty: return 0.0
     try:
@@ -74,12 +77,9 @@ def get_min_pulley_diameter(belt_section, min_pulley_diameters_data=MIN_PULLEY_D
 
 def find_nearest_standard_value(value, standard_list, greater_or_equal=True):
     if not standard_list: return None
-    if greater_or_equal:
-        filtered_list = [s_val for s_val in standard_list if s_val >= value]
-        if not filtered_list: return max(standard_list)
-        return min(filtered_list)
-    else:
-        return min(standard_list, key=lambda x: abs(x - value))
+    # Для стандартных рядов из data.py используется готовый отсортированный индекс (bisect)
+    index = index_for(standard_list)
+    return index.nearest_ge(value) if greater_or_equal else index.nearest(value)
 
 
 def calculate_belt_length(d1, d2, a):
@@ -106,6 +106,9 @@ def calculate_belt_speed(d1, n1):
 
 def get_p0_value(belt_section, V, material_correction_factor=1.0, p0_ranges_data=P0_DATA_BY_V_RANGES,
                  p0_values_data=P0_VALUES):
+    if p0_ranges_data is P0_DATA_BY_V_RANGES and p0_values_data is P0_VALUES:
+        index = p0_index(belt_section)
+        return index.lookup(V) * material_correction_factor if index is not None else 0.0
     if belt_section not in p0_ranges_data or belt_section not in p0_values_data: return 0.0
     speed_ranges = p0_ranges_data[belt_section]
     p0_values_for_section = p0_values_data[belt_section]
@@ -122,6 +125,9 @@ def get_p0_value(belt_section, V, material_correction_factor=1.0, p0_ranges_data
 
 
 def get_cl_value(belt_section, lp, cl_data=CL_DATA):
+    if cl_data is CL_DATA:
+        index = cl_index(belt_section)
+        return index.payload_nearest(lp) if index is not None else 1.0
     if belt_section not in cl_data or not cl_data[belt_section]: return 1.0
     available_lengths = sorted(cl_data[belt_section].keys())
     if not available_lengths: return 1.0
@@ -140,6 +146,8 @@ def calculate_angle_of_wrap(d1, d2, a):
 
 
 def get_calpha_value(alpha1_deg, calpha_data=CALPHA_DATA):
+    if calpha_data is CALPHA_DATA:
+        return calpha_index().lookup(alpha1_deg)
     sorted_ranges = sorted(calpha_data.keys())
     for min_alpha, max_alpha in sorted_ranges:
         if min_alpha < alpha1_deg <= max_alpha: return calpha_data[(min_alpha, max_alpha)]
@@ -152,6 +160,8 @@ def get_calpha_value(alpha1_deg, calpha_data=CALPHA_DATA):
 
 def get_cz_value(z, cz_data=CZ_DATA):
     if z <= 0: raise ValueError("Количество ремней должно быть положительным.")
+    if cz_data is CZ_DATA:
+        return cz_index().lookup(z)
     if z in cz_data:
         return cz_data[z]
     elif z >= 5:
@@ -162,4 +172,78 @@ def get_cz_value(z, cz_data=CZ_DATA):
 def calculate_number_of_belts(p_design, p0, cl, calpha, cz_trial=1.0):
     denominator = p0 * cl * calpha * cz_trial
     if denominator == 0: raise ValueError("Деление на ноль при расчете количества ремней.")
-    return p_design / denominator
\ No newline at end of file
+    return p_design / denominator
+
+
+def design_drive(power, n1, n2, approx_center_distance, load_type_choice, material_correction_factor=1.0,
+                 power_tables=None, lp_greater_or_equal=False):
+    """
+    Полный расчет одной клиноременной передачи - та же цепочка шагов, что в main.py
+    и на странице калькулятора. Возвращает словарь со всеми промежуточными значениями
+    (имена ключей совпадают со столбцами batch.design_drives_batch).
+
+    power_tables - словарь {сечение: PowerTable}: если для сечения есть каталожная таблица
+    и она покрывает (d1, n1), P0 берется из нее (вместе с надбавкой Pd за передаточное
+    число, если у таблицы есть AdditionalPowerTable), иначе - обобщенный get_p0_value.
+    lp_greater_or_equal - подбирать стандартную длину не меньше расчетной (как на странице
+    калькулятора) или ближайшую (как в main.py).
+    При невозможности расчета выбрасывает ValueError.
+    Время этапов записывается, если включен замер (см. profiling.recording).
+    """
+    timer = lap_timer()
+    i = calculate_transmission_ratio(n1, n2)
+    P_design, kp = calculate_design_power(power, load_type_choice)
+    timer.lap('design_power')
+    section = determine_belt_section(P_design, n1)
+
+    d1_min = get_min_pulley_diameter(section)
+    diameters = STANDARD_PULLEY_DIAMETERS.get(section)
+    lengths = STANDARD_BELT_LENGTHS.get(section)
+    if d1_min is None or not diameters or not lengths:
+        raise ValueError(f"Нет справочных данных для сечения {section}.")
+    timer.lap('section')
+    d1 = find_nearest_standard_value(d1_min, diameters, greater_or_equal=True)
+    d2_calc = d1 * i
+    d2 = find_nearest_standard_value(d2_calc, diameters, greater_or_equal=False)
+    i_actual = get_actual_transmission_ratio(d1, d2)
+    timer.lap('pulleys')
+
+    L_calc = calculate_belt_length(d1, d2, approx_center_distance)
+    Lp = find_nearest_standard_value(L_calc, lengths, greater_or_equal=lp_greater_or_equal)
+    a_actual = calculate_actual_center_distance(Lp, d1, d2)
+    timer.lap('belt_length')
+
+    V = calculate_belt_speed(d1, n1)
+    p0_source = 'catalog'
+    table = (power_tables or {}).get(section)
+    P0_base = table.power(float(d1), float(n1)) if table is not None else 0.0
+    Pd = 0.0
+    if not P0_base > 0.0:
+        p0_source = 'approx'
+        P0_base = get_p0_value(section, V, 1.0)
+    elif table.additional is not None:
+        # Каталожная надбавка за передаточное число: P0 = Pb(d1, n1) + Pd(i, n1)
+        Pd = table.additional.power(i_actual, float(n1))
+        P0_base += Pd
+    if P0_base <= 0.0:
+        raise ValueError("Не удалось определить базовую мощность P0.")
+    P0 = P0_base * material_correction_factor
+    timer.lap('p0')
+
+    CL = get_cl_value(section, Lp)
+    alpha1 = calculate_angle_of_wrap(d1, d2, a_actual)
+    C_alpha = get_calpha_value(alpha1)
+    timer.lap('coefficients')
+
+    z_initial = calculate_number_of_belts(P_design, P0, CL, C_alpha, cz_trial=1.0)
+    Cz = get_cz_value(math.ceil(z_initial) if z_initial > 0 else 1)
+    z_calc = calculate_number_of_belts(P_design, P0, CL, C_alpha, cz_trial=Cz)
+    z = math.ceil(z_calc) if z_calc > 0 else 1
+    timer.lap('belts')
+
+    return {
+        'i': i, 'Kp': kp, 'P_design': P_design, 'section': section, 'd1_min': d1_min, 'd1': d1,
+        'd2_calc': d2_calc, 'd2': d2, 'i_actual': i_actual, 'L_calc': L_calc, 'Lp': Lp, 'a_actual': a_actual,
+        'V': V, 'P0_base': P0_base, 'Pd': Pd, 'p0_source': p0_source, 'P0': P0, 'CL': CL, 'alpha1': alpha1,
+        'C_alpha': C_alpha, 'z_initial': z_initial, 'Cz': Cz, 'z_calc': z_calc, 'z': z,
+    }
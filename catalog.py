@@ -0,0 +1,460 @@
+# catalog.py
+#
+# Скомпилированный бинарный каталог таблиц мощностей.
+# Все parsed_data/power_data_*_Pb*.csv (и .npz, которые pdf_parser пишет при
+# извлечении по координатам, см. pdf_geometry.py), а также таблицы дополнительной
+# мощности power_data_*_Pd*.csv один раз переводятся в единый файл
+# parsed_data/catalog.bin:
+#
+#   [8 байт сигнатуры][4 байта длины манифеста][манифест JSON][выравнивание до 64][данные float64]
+#
+# Манифест хранит версию формата, список исходных файлов (размер, mtime, sha256),
+# смещения массивов, CRC32 блока данных и коэффициенты аналитической модели P0(d, n1)
+# каждой таблицы Pb (см. power_model.py). Для таблиц Pb в блок данных также пишутся
+# готовые коэффициенты бикубической интерполяции (power_table.spline_coefficients),
+# так что SplinePowerTable не считает их при загрузке. При загрузке блок данных отображается
+# в память (np.memmap) - таблицы не разбираются заново. Если исходный файл
+# изменился (или появился/пропал), каталог пересобирается автоматически.
+#
+# PowerTableRegistry - общий для процесса реестр PowerTable всех профилей каталога:
+# все сессии Streamlit используют одну копию таблиц вместо своей в session_state.
+
+import glob
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+import threading
+import zlib
+
+import numpy as np
+
+from data import read_additional_power_csv, read_power_csv
+from pdf_geometry import load_arrays
+from power_model import PowerModel, fit_power_model
+
+CATALOG_FILE = "catalog.bin"
+CATALOG_VERSION = 4
+MAGIC = b"VBCATLG\0"
+ALIGNMENT = 64
+
+SOURCE_PATTERNS = ("power_data_*_Pb*.csv", "power_data_*_Pb*.npz", "power_data_*_Pd*.csv")
+_SOURCE_NAME = re.compile(r"^power_data_(?P<profile>.+?)_(?P<kind>Pb|Pd)(?:_(?P<variant>.+))?\.(?:csv|npz)$")
+
+# Имена массивов таблицы: Pb[d, n1] - базовая мощность, Pd[i, n1] - надбавка за передаточное число
+ARRAY_NAMES = {'Pb': ('d', 'n1', 'Pb'), 'Pd': ('i', 'n1', 'Pd')}
+# Коэффициенты бикубической интерполяции таблицы Pb (см. power_table.spline_coefficients)
+SPLINE_ARRAYS = ('cells', 'd_lines', 'n_lines')
+# Способы интерполяции таблиц Pb: 'linear' - PowerTable, 'cubic' - SplinePowerTable
+INTERPOLATIONS = ('linear', 'cubic')
+
+# Какой вариант таблицы профиля брать по умолчанию (по убыванию надежности извлечения)
+VARIANT_PRIORITY = ('geometry', 'findtables', '')
+
+
+def discover_sources(data_dir="parsed_data"):
+    """
+    Список исходных файлов: [(профиль, вид, вариант, путь)], вид - 'Pb' или 'Pd',
+    вариант - суффикс после _Pb/_Pd ('' если нет).
+    """
+    sources = []
+    paths = [path for pattern in SOURCE_PATTERNS for path in glob.glob(os.path.join(data_dir, pattern))]
+    for path in sorted(paths):
+        match = _SOURCE_NAME.match(os.path.basename(path))
+        if match:
+            sources.append((match.group('profile'), match.group('kind'), match.group('variant') or '', path))
+    return sources
+
+
+def _file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _source_record(path):
+    stat = os.stat(path)
+    return {'file': os.path.basename(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'sha256': _file_sha256(path)}
+
+
+def _grid_from_rows(rows):
+    """Записи {'d', 'n1', 'Pb'} -> (оси d и n1 по возрастанию, сетка Pb[d, n1] с NaN в пустых ячейках)."""
+    d_axis = np.array(sorted({r['d'] for r in rows}), dtype=np.float64)
+    n_axis = np.array(sorted({r['n1'] for r in rows}), dtype=np.float64)
+    grid = np.full((len(d_axis), len(n_axis)), np.nan)
+    d_pos = {d: i for i, d in enumerate(d_axis.tolist())}
+    n_pos = {n: j for j, n in enumerate(n_axis.tolist())}
+    for r in rows:
+        i, j = d_pos[r['d']], n_pos[r['n1']]
+        if np.isnan(grid[i, j]):  # как и раньше, при повторе берется первое значение
+            grid[i, j] = r['Pb']
+    return d_axis, n_axis, grid
+
+
+def _additional_grid_from_rows(rows):
+    """Записи {'i_min', 'n1', 'Pd'} -> (нижние границы диапазонов i, оси n1, сетка Pd[i, n1])."""
+    i_axis = np.array(sorted({r['i_min'] for r in rows}), dtype=np.float64)
+    n_axis = np.array(sorted({r['n1'] for r in rows}), dtype=np.float64)
+    grid = np.full((len(i_axis), len(n_axis)), np.nan)
+    i_pos = {i: k for k, i in enumerate(i_axis.tolist())}
+    n_pos = {n: j for j, n in enumerate(n_axis.tolist())}
+    for r in rows:
+        k, j = i_pos[r['i_min']], n_pos[r['n1']]
+        if np.isnan(grid[k, j]):
+            grid[k, j] = r['Pd']
+    return i_axis, n_axis, grid
+
+
+def _read_source(kind, path):
+    """Массивы таблицы из исходного файла или None, если файл пуст."""
+    if path.endswith('.npz'):
+        return load_arrays(path)
+    if kind == 'Pd':
+        rows = read_additional_power_csv(path)
+        return _additional_grid_from_rows(rows) if rows else None
+    rows = read_power_csv(path)
+    return _grid_from_rows(rows) if rows else None
+
+
+def compile_catalog(data_dir="parsed_data", path=None):
+    """Собирает бинарный каталог из всех исходных файлов в data_dir. Возвращает путь к файлу."""
+    from power_table import spline_coefficients
+
+    path = path or os.path.join(data_dir, CATALOG_FILE)
+    blocks, tables, sources, offset = [], [], [], 0
+
+    for profile, kind, variant, source_path in discover_sources(data_dir):
+        sources.append(_source_record(source_path))
+        arrays = _read_source(kind, source_path)
+        if arrays is None or arrays[2].size == 0:
+            continue
+        entry = {'profile': profile, 'kind': kind, 'variant': variant, 'source': os.path.basename(source_path)}
+        for name, array in zip(ARRAY_NAMES[kind], arrays):
+            entry[name] = {'offset': offset, 'shape': list(array.shape)}
+            blocks.append(array.ravel())
+            offset += array.size
+        if kind == 'Pb':
+            model = fit_power_model(*arrays, profile=profile)
+            entry['model'] = model.to_dict() if model is not None else None
+            entry['spline'] = {}
+            for name, array in zip(SPLINE_ARRAYS, spline_coefficients(*arrays)):
+                entry['spline'][name] = {'offset': offset, 'shape': list(array.shape)}
+                blocks.append(array.ravel())
+                offset += array.size
+        tables.append(entry)
+
+    data = np.concatenate(blocks) if blocks else np.zeros(0)
+    manifest = {
+        'version': CATALOG_VERSION,
+        'sources': sources,
+        'tables': tables,
+        'values': int(data.size),
+        'crc32': zlib.crc32(data.tobytes()),
+    }
+    header = json.dumps(manifest).encode('utf-8')
+    prefix = len(MAGIC) + 4 + len(header)
+    padding = (-prefix) % ALIGNMENT
+
+    # Пишем во временный файл и атомарно подменяем, чтобы параллельные
+    # процессы никогда не увидели недописанный каталог
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        f.write(b'\0' * padding)
+        f.write(data.astype('<f8').tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+class Catalog:
+    """Загруженный (отображенный в память) каталог таблиц мощностей."""
+
+    def __init__(self, path, manifest, data):
+        self.path = path
+        self.manifest = manifest
+        self.data = data
+        self._index = {(t['profile'], t['kind'], t['variant']): t for t in manifest['tables']}
+
+    def profiles(self):
+        """Профили, для которых есть таблица Pb."""
+        return sorted({t['profile'] for t in self.manifest['tables'] if t['kind'] == 'Pb'})
+
+    def variants(self, profile, kind='Pb'):
+        return [t['variant'] for t in self.manifest['tables'] if t['profile'] == profile and t['kind'] == kind]
+
+    def has(self, profile, variant=None, kind='Pb'):
+        if variant is None:
+            return bool(self.variants(profile, kind))
+        return (profile, kind, variant) in self._index
+
+    def _array(self, spec):
+        size = int(np.prod(spec['shape']))
+        return self.data[spec['offset']:spec['offset'] + size].reshape(spec['shape'])
+
+    def _entry(self, profile, variant, kind):
+        if variant is None:
+            variants = self.variants(profile, kind)
+            if not variants:
+                raise KeyError(f"В каталоге нет таблиц {kind} для профиля {profile}.")
+            ranked = [v for v in VARIANT_PRIORITY if v in variants]
+            variant = ranked[0] if ranked else variants[0]
+        return self._index[(profile, kind, variant)]
+
+    def arrays(self, profile, variant=None, kind='Pb'):
+        """
+        Оси и сетка таблицы - представления отображенной памяти, без копирования:
+        (d, n1, Pb) для kind='Pb' и (i, n1, Pd) для kind='Pd'.
+        """
+        entry = self._entry(profile, variant, kind)
+        return tuple(self._array(entry[name]) for name in ARRAY_NAMES[kind])
+
+    def power_model(self, profile, variant=None):
+        """Аналитическая модель P0(d, n1) таблицы Pb профиля или None, если таблицы (или модели) нет."""
+        if not self.has(profile, variant):
+            return None
+        data = self._entry(profile, variant, 'Pb').get('model')
+        return PowerModel.from_dict(data, profile=profile) if data else None
+
+    def additional_table(self, profile):
+        """AdditionalPowerTable профиля или None, если таблицы Pd в каталоге нет."""
+        if not self.has(profile, kind='Pd'):
+            return None
+        from power_table import AdditionalPowerTable
+        return AdditionalPowerTable(*self.arrays(profile, kind='Pd'), profile=profile)
+
+    def spline_coefficients(self, profile, variant=None):
+        """Готовые коэффициенты бикубической интерполяции таблицы Pb: (cells, d_lines, n_lines)."""
+        spline = self._entry(profile, variant, 'Pb')['spline']
+        return tuple(self._array(spline[name]) for name in SPLINE_ARRAYS)
+
+    def power_table(self, profile, variant=None, interpolation='linear'):
+        """PowerTable профиля (interpolation='cubic' - SplinePowerTable с коэффициентами из каталога)."""
+        from power_table import PowerTable, SplinePowerTable
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"Неизвестный способ интерполяции: {interpolation}.")
+        arrays = self.arrays(profile, variant)
+        additional = self.additional_table(profile)
+        if interpolation == 'cubic':
+            return SplinePowerTable(*arrays, profile=profile, additional=additional,
+                                    coefficients=self.spline_coefficients(profile, variant))
+        return PowerTable(*arrays, profile=profile, additional=additional)
+
+
+def _read_catalog(path):
+    """Читает манифест и отображает данные в память. None, если файл поврежден или другой версии."""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None
+        (header_size,) = struct.unpack('<I', f.read(4))
+        manifest = json.loads(f.read(header_size).decode('utf-8'))
+    if manifest.get('version') != CATALOG_VERSION:
+        return None
+    prefix = len(MAGIC) + 4 + header_size
+    offset = prefix + (-prefix) % ALIGNMENT
+    if manifest['values'] == 0:
+        data = np.zeros(0)
+    else:
+        data = np.memmap(path, dtype='<f8', mode='r', offset=offset, shape=(manifest['values'],))
+        if zlib.crc32(data) != manifest['crc32']:
+            return None
+    return Catalog(path, manifest, data)
+
+
+def _sources_match(manifest, data_dir):
+    """
+    Совпадают ли исходные файлы с записанными в манифесте (сначала по размеру и mtime, затем по sha256).
+    Если изменилось только mtime, а содержимое то же, новое mtime запоминается в манифесте
+    (в памяти), чтобы следующие проверки не хешировали файл заново.
+    """
+    recorded = {s['file']: s for s in manifest['sources']}
+    current = [path for *_, path in discover_sources(data_dir)]
+    if sorted(recorded) != sorted(os.path.basename(p) for p in current):
+        return False
+    for path in current:
+        stat = os.stat(path)
+        record = recorded[os.path.basename(path)]
+        if stat.st_size != record['size']:
+            return False
+        if stat.st_mtime_ns != record['mtime_ns']:
+            if _file_sha256(path) != record['sha256']:
+                return False
+            record['mtime_ns'] = stat.st_mtime_ns
+    return True
+
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def load_catalog(data_dir="parsed_data", path=None, rebuild=True):
+    """
+    Возвращает актуальный каталог для data_dir. Уже загруженный каталог
+    переиспользуется, пока исходные файлы не изменились; если изменились
+    (или файла каталога нет, он поврежден, другой версии) - каталог пересобирается.
+    rebuild=False - не пересобирать, а вернуть None.
+    """
+    path = path or os.path.join(data_dir, CATALOG_FILE)
+    with _lock:
+        catalog = _loaded.get(path)
+        if catalog is not None and _sources_match(catalog.manifest, data_dir):
+            return catalog
+
+        catalog = None
+        if os.path.exists(path):
+            try:
+                catalog = _read_catalog(path)
+                if catalog is not None and not _sources_match(catalog.manifest, data_dir):
+                    catalog = None
+            except (OSError, ValueError, KeyError, TypeError, struct.error):
+                catalog = None  # поврежденный манифест - как устаревший каталог
+        if catalog is None:
+            if not rebuild:
+                return None
+            if not discover_sources(data_dir):
+                return None
+            compile_catalog(data_dir, path)
+            catalog = _read_catalog(path)
+        _loaded[path] = catalog
+        return catalog
+
+
+class PowerTableRegistry:
+    """
+    Общий для процесса реестр таблиц мощностей всех профилей из каталога.
+    Таблица профиля строится при первом обращении и дальше используется всеми
+    потоками/сессиями (только для чтения). Если каталог пересобран
+    (изменился исходный файл), построенные таблицы сбрасываются.
+    Если каталог недоступен (parsed_data только для чтения, диск заполнен,
+    поврежденный файл), таблицы строятся прямо из исходных файлов; собрать
+    каталог снова пробуем только после изменения исходных файлов.
+    """
+
+    def __init__(self, data_dir="parsed_data"):
+        self.data_dir = data_dir
+        self._catalog = None
+        self._tables = {}
+        self._lock = threading.Lock()
+        self._failed_sources = None  # состояние исходных файлов при последней неудачной сборке
+
+    def _sources_state(self):
+        return [(path, os.stat(path).st_mtime_ns, os.stat(path).st_size)
+                for *_, path in discover_sources(self.data_dir)]
+
+    def _current_catalog(self):
+        """Каталог, None - если таблиц нет, или 'sources' - если таблицы читаются из исходных файлов."""
+        if self._failed_sources is not None and self._failed_sources == self._sources_state():
+            catalog = 'sources'
+        else:
+            try:
+                catalog = load_catalog(self.data_dir)
+                self._failed_sources = None
+            except (OSError, ValueError) as e:
+                print(f"Каталог таблиц недоступен ({e}), таблицы читаются из исходных файлов.")
+                self._failed_sources = self._sources_state()
+                catalog = 'sources'
+        if catalog is not self._catalog:
+            self._catalog = catalog
+            self._tables = {}
+        return catalog
+
+    def profiles(self):
+        """Профили, для которых в каталоге есть таблица."""
+        with self._lock:
+            catalog = self._current_catalog()
+            if catalog == 'sources':
+                return sorted({profile for profile, kind, *_ in discover_sources(self.data_dir) if kind == 'Pb'})
+            return catalog.profiles() if catalog is not None else []
+
+    def get(self, profile, interpolation='linear'):
+        """PowerTable профиля (или SplinePowerTable при interpolation='cubic'); None, если таблицы нет."""
+        with self._lock:
+            catalog = self._current_catalog()
+            key = (profile, interpolation)
+            if key not in self._tables:
+                if catalog == 'sources':
+                    table = _source_power_table(self.data_dir, profile, interpolation)
+                    if table is None:
+                        return None
+                    self._tables[key] = table
+                    return table
+                if catalog is None or not catalog.has(profile):
+                    return None
+                self._tables[key] = catalog.power_table(profile, interpolation=interpolation)
+            return self._tables[key]
+
+    def tables(self, interpolation='linear'):
+        """Словарь {сечение: PowerTable} для всех доступных профилей (как ждут design_drive/batch)."""
+        return {profile: self.get(profile, interpolation) for profile in self.profiles()}
+
+    def preload(self):
+        """Строит таблицы всех профилей заранее (например, при старте сервера)."""
+        return self.tables()
+
+    def memory_report(self):
+        """{профиль: байт} для уже загруженных таблиц (бикубические - с пометкой "(cubic)")."""
+        with self._lock:
+            return {profile if interpolation == 'linear' else f"{profile} ({interpolation})": table.nbytes
+                    for (profile, interpolation), table in self._tables.items()}
+
+
+def _source_power_table(data_dir, profile, interpolation='linear'):
+    """
+    Таблица профиля прямо из исходных файлов, без каталога (вариант Pb - по VARIANT_PRIORITY,
+    как Catalog.power_table). None, если таблицы профиля нет.
+    """
+    from power_table import AdditionalPowerTable, PowerTable, SplinePowerTable
+    if interpolation not in INTERPOLATIONS:
+        raise ValueError(f"Неизвестный способ интерполяции: {interpolation}.")
+    sources = {(kind, variant): path for name, kind, variant, path in discover_sources(data_dir) if name == profile}
+    variants = [variant for kind, variant in sources if kind == 'Pb']
+    if not variants:
+        return None
+    ranked = [v for v in VARIANT_PRIORITY if v in variants]
+    arrays = _read_source('Pb', sources[('Pb', ranked[0] if ranked else variants[0])])
+    if arrays is None or arrays[2].size == 0:
+        return None
+    additional = None
+    pd_paths = [path for (kind, _), path in sorted(sources.items()) if kind == 'Pd']
+    pd_arrays = _read_source('Pd', pd_paths[0]) if pd_paths else None
+    if pd_arrays is not None and pd_arrays[2].size:
+        additional = AdditionalPowerTable(*pd_arrays, profile=profile)
+    cls = SplinePowerTable if interpolation == 'cubic' else PowerTable
+    return cls(*arrays, profile=profile, additional=additional)
+
+
+_registries = {}
+
+
+def power_table_registry(data_dir="parsed_data"):
+    """Реестр таблиц для data_dir, один на процесс."""
+    with _lock:
+        if data_dir not in _registries:
+            _registries[data_dir] = PowerTableRegistry(data_dir)
+        return _registries[data_dir]
+
+
+def main(argv=None):
+    data_dir = (argv if argv is not None else sys.argv[1:])[:1] or ["parsed_data"]
+    path = compile_catalog(data_dir[0])
+    catalog = _read_catalog(path)
+    print(f"Каталог сохранен: {path} (версия {CATALOG_VERSION}, {os.path.getsize(path)} байт)")
+    for table in catalog.manifest['tables']:
+        rows, n_axis, grid = catalog.arrays(table['profile'], table['variant'], table['kind'])
+        axis = 'd' if table['kind'] == 'Pb' else 'i'
+        print(f"  {table['source']}: профиль {table['profile']}, {table['kind']}, "
+              f"{axis} x n1 = {len(rows)} x {len(n_axis)}, "
+              f"заполнено ячеек: {int((~np.isnan(grid)).sum())}")
+
+    registry = power_table_registry(data_dir[0])
+    registry.preload()
+    for profile, size in registry.memory_report().items():
+        print(f"  таблица {profile} в памяти: {size / 1024:.1f} КБ")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,16 +1,85 @@
 # data.py (Финальная, рабочая версия)
 
-import pandas as pd
 import os
 import csv
+import bisect
+import math
+import functools
+
+# NumPy, pandas и power_table здесь не импортируются на уровне модуля: справочные
+# словари и скалярные индексы ниже нужны CLI без них. Тяжелые модули подключаются
+# внутри функций, которые работают с таблицами каталога и массивами.
+
+
+def read_power_csv(filepath):
+    """
+    Читает CSV-таблицу мощностей Pb и возвращает список записей {'d', 'n1', 'Pb'}
+    в порядке файла. Понимает оба формата из parsed_data:
+      - "широкий", извлеченный через find_tables(): строка заголовка таблицы,
+        строка с диаметрами, затем строки "RPM, Pb, Pb, ...";
+      - "длинный" из pdf_parser.py: столбцы d, n1, Pb.
+    """
+    processed_data = []
+    with open(filepath, mode='r', encoding='utf-8') as infile:
+        reader = csv.reader(infile)
+
+        first_row = next(reader, None)
+        if first_row is None:
+            return processed_data
+
+        if [cell.strip() for cell in first_row[:3]] == ['d', 'n1', 'Pb']:
+            for row in reader:
+                if len(row) >= 3 and row[2].strip():
+                    processed_data.append({'d': float(row[0]), 'n1': float(row[1]), 'Pb': float(row[2])})
+            return processed_data
+
+        # Первая строка ("TABLE 4...") пропущена, вторая - это заголовки с диаметрами
+        header_row = next(reader)
+        diameters = [float(str(d).replace(',', '.')) for d in header_row[1:] if str(d).strip()]
+
+        # Обрабатываем остальные строки с данными
+        for row in reader:
+            if not row or not row[0]: continue
+
+            rpm_str = str(row[0]).replace('.', '')  # '1.000' -> '1000'
+            if not rpm_str.isdigit(): continue
+            rpm = float(rpm_str)
+
+            power_values = row[1:]
+            for i, power_cell in enumerate(power_values):
+                if i < len(diameters) and power_cell:
+                    power_clean = power_cell.replace('*', '').replace(',', '.').strip()
+                    if power_clean:
+                        processed_data.append({
+                            'd': diameters[i],
+                            'n1': rpm,
+                            'Pb': float(power_clean)
+                        })
+    return processed_data
+
+
+def read_additional_power_csv(filepath):
+    """
+    Читает CSV-таблицу дополнительной мощности Pd (из pdf_parser.py): столбцы
+    i_min, i_max, n1, Pd. Возвращает список записей в порядке файла.
+    """
+    with open(filepath, mode='r', encoding='utf-8') as infile:
+        return [{'i_min': float(row['i_min']), 'i_max': float(row['i_max']) if row['i_max'] else math.inf,
+                 'n1': float(row['n1']), 'Pd': float(row['Pd'])}
+                for row in csv.DictReader(infile) if row.get('Pd', '').strip()]
 
 
 def load_power_data(profile, data_dir="parsed_data"):
     """
     Загружает "сырые" данные, извлеченные через find_tables(), и преобразует их
     в готовый для использования формат ("длинный" DataFrame).
-    Эта версия написана максимально просто и надежно.
+    Данные берутся из скомпилированного бинарного каталога (см. catalog.py),
+    который пересобирается сам, если CSV изменился; CSV читается напрямую,
+    только если каталог недоступен.
     """
+    import numpy as np
+    import pandas as pd
+
     filename = f"power_data_{profile}_Pb_findtables.csv"
     filepath = os.path.join(data_dir, filename)
 
@@ -18,38 +87,20 @@ def load_power_data(profile, data_dir="parsed_data"):
         print(f"Файл {filepath} не найден.")
         return None
 
-    processed_data = []
     try:
-        with open(filepath, mode='r', encoding='utf-8') as infile:
-            reader = csv.reader(infile)
-
-            # Пропускаем первую строку ("TABLE 4...")
-            next(reader)
-
-            # Вторая строка - это заголовки с диаметрами
-            header_row = next(reader)
-            diameters = [float(str(d).replace(',', '.')) for d in header_row[1:] if str(d).strip()]
+        arrays = _compiled_power_arrays(profile, data_dir)
+    except (OSError, ValueError) as e:
+        # Каталог не собрать или не прочитать (только чтение, нет места, поврежден) - читаем CSV
+        print(f"Бинарный каталог недоступен ({e}), читается {filepath}.")
+        arrays = None
 
-            # Обрабатываем остальные строки с данными
-            for row in reader:
-                if not row or not row[0]: continue
-
-                rpm_str = str(row[0]).replace('.', '')  # '1.000' -> '1000'
-                if not rpm_str.isdigit(): continue
-                rpm = float(rpm_str)
-
-                power_values = row[1:]
-                for i, power_cell in enumerate(power_values):
-                    if i < len(diameters) and power_cell:
-                        power_clean = power_cell.replace('*', '').replace(',', '.').strip()
-                        if power_clean:
-                            processed_data.append({
-                                'd': diameters[i],
-                                'n1': rpm,
-                                'Pb': float(power_clean)
-                            })
-
-        df_long = pd.DataFrame(processed_data)
+    try:
+        if arrays is not None:
+            d_axis, n_axis, grid = arrays
+            n_idx, d_idx = (~np.isnan(grid.T)).nonzero()  # порядок как в файле: по строкам RPM
+            df_long = pd.DataFrame({'d': d_axis[d_idx], 'n1': n_axis[n_idx], 'Pb': grid[d_idx, n_idx]})
+        else:
+            df_long = pd.DataFrame(read_power_csv(filepath))
         print(f"Успешно загружены и преобразованы данные для профиля {profile}. Извлечено {len(df_long)} строк.")
         return df_long
 
@@ -58,6 +109,15 @@ def load_power_data(profile, data_dir="parsed_data"):
         return None
 
 
+def _compiled_power_arrays(profile, data_dir):
+    """(d, n1, Pb-сетка) профиля из бинарного каталога или None, если каталог недоступен."""
+    from catalog import load_catalog  # catalog.py сам импортирует data.py
+    catalog = load_catalog(data_dir)
+    if catalog is None or not catalog.has(profile, 'findtables'):
+        return None
+    return catalog.arrays(profile, 'findtables')
+
+
 # --- ВОССТАНОВЛЕННЫЕ СЛОВАРИ ДАННЫХ ---
 MIN_PULLEY_DIAMETERS = {"Z(0)": 50, "A": 71, "B": 112, "C": 180, "D": 280, "E": 450}
 LOAD_COEFFICIENTS = {"спокойная": 1.0, "средняя": 1.1, "тяжелая": 1.2, "ударная": 1.3}
@@ -100,4 +160,209 @@ CL_DATA = {"Z(0)": {}, "A": {}, "B": {}, "C": {}, "D": {}, "E": {}}
 CALPHA_DATA = {(0, 120): 0.90, (120, 150): 0.95, (150, 170): 0.98, (170, 181): 1.00}
 CZ_DATA = {1: 1.00, 2: 1.15, 3: 1.25, 4: 1.30, 5: 1.35}
 MATERIAL_P0_CORRECTION_FACTORS = {"Стандартный (CR/Полиэстер)": 1.0, "Высокоэффективный (EPDM/Полиэстер)": 1.1,
-                                  "Высокопрочный (CR/Арамид)": 1.2, "Премиум (TPU/Арамид или Сталь)": 1.35}
\ No newline at end of file
+                                  "Высокопрочный (CR/Арамид)": 1.2, "Премиум (TPU/Арамид или Сталь)": 1.35}
+
+
+# --- СКОМПИЛИРОВАННЫЕ ИНДЕКСЫ ДЛЯ БЫСТРОГО ПОИСКА ---
+# Индексы строятся один раз при первом обращении и дальше не меняются.
+# Скалярный поиск - bisect по кортежам, векторный - np.searchsorted
+# (NumPy импортируется только при первом векторном запросе).
+# Словари и списки выше считаются неизменяемыми: если их поменять "на лету",
+# индексы об этом не узнают.
+
+class SortedIndex:
+    """
+    Отсортированный ряд значений (стандартные диаметры, длины и т.п.)
+    с необязательными привязанными к ним значениями payload (например, CL).
+    """
+
+    __slots__ = ('values', 'payload', '_arrays')
+
+    def __init__(self, values, payload=None):
+        pairs = sorted(zip(values, payload if payload is not None else values))
+        self.values = tuple(v for v, _ in pairs)
+        self.payload = tuple(p for _, p in pairs) if payload is not None else None
+        self._arrays = None
+
+    def __len__(self):
+        return len(self.values)
+
+    def _np(self):
+        if self._arrays is None:
+            import numpy as np
+            values = np.asarray(self.values, dtype=float)
+            payload = np.asarray(self.payload, dtype=float) if self.payload is not None else values
+            self._arrays = (np, values, payload)
+        return self._arrays
+
+    # --- Скалярный поиск ---
+
+    def position_ge(self, x):
+        """Номер ближайшего значения >= x (если такого нет - наибольшего)."""
+        i = bisect.bisect_left(self.values, x)
+        return i if i < len(self.values) else len(self.values) - 1
+
+    def position_nearest(self, x):
+        """Номер ближайшего к x значения (при равенстве расстояний - меньшего)."""
+        values = self.values
+        i = bisect.bisect_left(values, x)
+        if i == 0:
+            return 0
+        if i == len(values):
+            return i - 1
+        return i if abs(values[i] - x) < abs(values[i - 1] - x) else i - 1
+
+    def nearest_ge(self, x):
+        return self.values[self.position_ge(x)] if self.values else None
+
+    def nearest(self, x):
+        return self.values[self.position_nearest(x)] if self.values else None
+
+    def payload_nearest(self, x):
+        return self.payload[self.position_nearest(x)]
+
+    # --- Векторный поиск ---
+
+    def positions_ge_many(self, xs):
+        np, values, _ = self._np()
+        return np.minimum(np.searchsorted(values, xs, side='left'), len(values) - 1)
+
+    def positions_nearest_many(self, xs):
+        np, values, _ = self._np()
+        xs = np.asarray(xs, dtype=float)
+        i = np.searchsorted(values, xs, side='left')
+        low = np.clip(i - 1, 0, len(values) - 1)
+        high = np.clip(i, 0, len(values) - 1)
+        return np.where(np.abs(values[high] - xs) < np.abs(values[low] - xs), high, low)
+
+    def nearest_ge_many(self, xs):
+        return self._np()[1][self.positions_ge_many(xs)]
+
+    def nearest_many(self, xs):
+        return self._np()[1][self.positions_nearest_many(xs)]
+
+    def payload_nearest_many(self, xs):
+        return self._np()[2][self.positions_nearest_many(xs)]
+
+
+class RangeIndex:
+    """
+    Ступенчатая таблица по интервалам (min, max] - как P0_DATA_BY_V_RANGES и CALPHA_DATA.
+    Ниже первого интервала берется первое значение, выше последнего - последнее,
+    в "дырах" между интервалами - default.
+    """
+
+    __slots__ = ('lower', 'upper', 'values', 'default', '_arrays')
+
+    def __init__(self, ranges, values, default):
+        triples = sorted(zip((r[0] for r in ranges), (r[1] for r in ranges), values))
+        self.lower = tuple(t[0] for t in triples)
+        self.upper = tuple(t[1] for t in triples)
+        self.values = tuple(t[2] for t in triples)
+        self.default = default
+        self._arrays = None
+
+    def lookup(self, x):
+        if x <= self.lower[0]:
+            return self.values[0]
+        if x > self.upper[-1]:
+            return self.values[-1]
+        i = bisect.bisect_left(self.upper, x)
+        return self.values[i] if x > self.lower[i] else self.default
+
+    def lookup_many(self, xs):
+        if self._arrays is None:
+            import numpy as np
+            self._arrays = (np, np.asarray(self.lower, dtype=float), np.asarray(self.upper, dtype=float),
+                            np.asarray(self.values, dtype=float))
+        np, lower, upper, values = self._arrays
+        xs = np.asarray(xs, dtype=float)
+        i = np.minimum(np.searchsorted(upper, xs, side='left'), len(upper) - 1)
+        result = np.where(xs > lower[i], values[i], self.default)
+        result = np.where(xs <= lower[0], values[0], result)
+        return np.where(xs > upper[-1], values[-1], result)
+
+
+class CountIndex:
+    """Коэффициент по целому количеству (CZ_DATA): от saturate_from и выше - одно значение."""
+
+    __slots__ = ('table', 'saturate_from', 'default', '_array')
+
+    def __init__(self, data, saturate_from, default=1.0):
+        self.table = tuple(data.get(k, default) for k in range(max(data) + 1))
+        self.saturate_from = saturate_from
+        self.default = default
+        self._array = None
+
+    def lookup(self, z):
+        if z >= self.saturate_from:
+            return self.table[self.saturate_from]
+        if z == int(z) and 0 <= z < len(self.table):
+            return self.table[int(z)]
+        return self.default
+
+    def lookup_many(self, zs):
+        import numpy as np
+        if self._array is None:
+            self._array = np.asarray(self.table, dtype=float)
+        zs = np.asarray(zs, dtype=float)
+        whole = (zs == np.floor(zs)) & (zs >= 0)
+        idx = np.clip(np.minimum(zs, self.saturate_from), 0, len(self.table) - 1).astype(int)
+        result = np.where(whole, self._array[idx], self.default)
+        return np.where(zs >= self.saturate_from, self._array[self.saturate_from], result)
+
+
+@functools.lru_cache(maxsize=None)
+def diameters_index(belt_section):
+    return SortedIndex(STANDARD_PULLEY_DIAMETERS.get(belt_section, []))
+
+
+@functools.lru_cache(maxsize=None)
+def lengths_index(belt_section):
+    return SortedIndex(STANDARD_BELT_LENGTHS.get(belt_section, []))
+
+
+@functools.lru_cache(maxsize=None)
+def p0_index(belt_section):
+    """Индекс P0 по скорости ремня; None, если для сечения нет данных."""
+    ranges, values = P0_DATA_BY_V_RANGES.get(belt_section), P0_VALUES.get(belt_section)
+    if not ranges or not values:
+        return None
+    return RangeIndex(ranges, values, default=0.0)
+
+
+@functools.lru_cache(maxsize=None)
+def cl_index(belt_section):
+    """Индекс CL по длине ремня; None, если для сечения нет данных."""
+    table = CL_DATA.get(belt_section)
+    if not table:
+        return None
+    return SortedIndex(list(table.keys()), list(table.values()))
+
+
+@functools.lru_cache(maxsize=None)
+def calpha_index():
+    return RangeIndex(list(CALPHA_DATA.keys()), list(CALPHA_DATA.values()), default=0.90)
+
+
+@functools.lru_cache(maxsize=None)
+def cz_index():
+    return CountIndex(CZ_DATA, saturate_from=5)
+
+
+@functools.lru_cache(maxsize=None)
+def _standard_lists_by_id():
+    lists = {id(v): diameters_index(k) for k, v in STANDARD_PULLEY_DIAMETERS.items()}
+    lists.update({id(v): lengths_index(k) for k, v in STANDARD_BELT_LENGTHS.items()})
+    return lists
+
+
+def index_for(standard_list):
+    """
+    Индекс для произвольного ряда значений. Для рядов из этого модуля
+    возвращается заранее скомпилированный индекс, для остальных - новый.
+    """
+    if isinstance(standard_list, SortedIndex):
+        return standard_list
+    index = _standard_lists_by_id().get(id(standard_list))
+    return index if index is not None else SortedIndex(standard_list)
@@ -0,0 +1,291 @@
+# design_cache.py
+#
+# Двухуровневый кэш готовых расчетов передач:
+#   1) LRU в памяти процесса (общий для всех сессий Streamlit в этом процессе);
+#   2) SQLite-файл на диске (общий для CLI и Streamlit, переживает перезапуск).
+# Ключ - нормализованные (округленные) входные данные + отпечаток справочных
+# данных: содержимое parsed_data/*.csv, *.npz и словарей из data.py. Если каталог
+# поменялся, отпечаток меняется и старые записи больше не находятся
+# (и удаляются из файла при первом обращении).
+
+import collections
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import data
+from calculations import design_drive
+from profiling import lap_timer
+
+CACHE_DIR = ".cache"
+CACHE_FILE = "designs.sqlite"
+
+# Точность, до которой округляются входные данные в ключе
+INPUT_PRECISION = {'power': 3, 'n1': 2, 'n2': 2, 'approx_center_distance': 2, 'material_correction_factor': 4}
+
+_DATA_TABLES = (
+    'MIN_PULLEY_DIAMETERS', 'LOAD_COEFFICIENTS', 'STANDARD_BELT_LENGTHS', 'STANDARD_PULLEY_DIAMETERS',
+    'P0_DATA_BY_V_RANGES', 'P0_VALUES', 'CL_DATA', 'CALPHA_DATA', 'CZ_DATA', 'MATERIAL_P0_CORRECTION_FACTORS',
+)
+
+
+class CatalogFingerprint:
+    """
+    Отпечаток справочных данных. Словари data.py хешируются один раз,
+    CSV-файлы - заново только при изменении их размера или времени модификации.
+    Сами файлы проверяются не чаще раза в recheck_interval секунд (проверка дороже
+    попадания в память); invalidate() заставляет проверить их при следующем обращении.
+    """
+
+    def __init__(self, data_dir="parsed_data", recheck_interval=2.0):
+        self.data_dir = data_dir
+        self.recheck_interval = recheck_interval
+        self._checked = None
+        self._tables_hash = hashlib.sha256(
+            repr([(name, getattr(data, name)) for name in _DATA_TABLES]).encode('utf-8')).hexdigest()
+        self._stat_signature = None
+        self._value = None
+        self._lock = threading.Lock()
+
+    def _files(self):
+        return sorted(path for pattern in ("*.csv", "*.npz") for path in glob.glob(os.path.join(self.data_dir, pattern)))
+
+    def invalidate(self):
+        """Следующий value() заново проверит файлы каталога (например, после перезагрузки каталога)."""
+        self._checked = None
+
+    def value(self):
+        checked = self._checked
+        if checked is not None and time.monotonic() - checked < self.recheck_interval:
+            return self._value
+        files = self._files()
+        signature = tuple((path, os.stat(path).st_mtime_ns, os.stat(path).st_size) for path in files)
+        with self._lock:
+            if signature != self._stat_signature:
+                digest = hashlib.sha256(self._tables_hash.encode('ascii'))
+                for path in files:
+                    digest.update(os.path.basename(path).encode('utf-8'))
+                    with open(path, 'rb') as f:
+                        digest.update(hashlib.sha256(f.read()).digest())
+                self._value = digest.hexdigest()[:16]
+                self._stat_signature = signature
+            self._checked = time.monotonic()
+            return self._value
+
+
+def normalize_inputs(power, n1, n2, approx_center_distance, load_type_choice, material_correction_factor=1.0,
+                     lp_greater_or_equal=False, power_tables=None):
+    """
+    Приводит входные данные к каноническому виду (округление, строковые коды).
+    Из power_tables в ключ попадают профили и тип таблицы каждого (PowerTable,
+    SplinePowerTable, PowerModel дают разные P0 для одной и той же передачи).
+    """
+    precision = INPUT_PRECISION
+    # Все значения хешируемые (catalog_tables - кортеж пар): по ним строится ключ кэша в памяти
+    return {
+        'power': round(float(power), precision['power']),
+        'n1': round(float(n1), precision['n1']),
+        'n2': round(float(n2), precision['n2']),
+        'approx_center_distance': round(float(approx_center_distance), precision['approx_center_distance']),
+        'material_correction_factor': round(float(material_correction_factor),
+                                            precision['material_correction_factor']),
+        'load_type_choice': str(load_type_choice).strip(),
+        'lp_greater_or_equal': bool(lp_greater_or_equal),
+        'catalog_tables': tuple(sorted((name, type(table).__name__) for name, table in (power_tables or {}).items())),
+    }
+
+
+class DesignCache:
+    """
+    LRU в памяти (max_entries записей) + SQLite на диске (не больше max_disk_bytes).
+    Потокобезопасен; файл на диске можно одновременно использовать из нескольких процессов.
+    disk_path=None отключает дисковый уровень.
+    """
+
+    def __init__(self, disk_path=os.path.join(CACHE_DIR, CACHE_FILE), max_entries=4096,
+                 max_disk_bytes=64 * 1024 * 1024, fingerprint=None):
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.fingerprint = fingerprint or CatalogFingerprint()
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._purged_fingerprint = None
+        self.disk_path = disk_path
+        self.counters = collections.Counter()
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path) or '.', exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS designs (key TEXT PRIMARY KEY, fingerprint TEXT, "
+                             "value TEXT, size INTEGER, accessed REAL)")
+                conn.execute("CREATE INDEX IF NOT EXISTS designs_accessed ON designs (accessed)")
+
+    def _connect(self):
+        # У каждого потока свое соединение (sqlite3 не разрешает делить его между потоками)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.disk_path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def make_key(self, normalized, fingerprint=None):
+        """Ключ записи на диске: отпечаток каталога + хеш нормализованных данных."""
+        payload = json.dumps(normalized, sort_keys=True, separators=(',', ':'))
+        return (fingerprint or self.fingerprint.value()) + ':' + hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+    @staticmethod
+    def _memory_key(normalized, fingerprint):
+        # В памяти хватает кортежа: он строится в разы быстрее JSON + sha256 дискового ключа
+        return fingerprint, tuple(sorted(normalized.items()))
+
+    # --- Уровень 1: память ---
+
+    def _memory_get(self, key):
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+            return value
+
+    def _memory_put(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.counters['memory_evictions'] += 1
+
+    # --- Уровень 2: диск ---
+
+    def _disk_get(self, key):
+        if not self.disk_path:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT value FROM designs WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE designs SET accessed = ? WHERE key = ?", (time.time(), key))
+            return json.loads(row[0])
+        except sqlite3.Error:
+            self.counters['disk_errors'] += 1
+            return None
+
+    def _disk_put(self, key, value):
+        if not self.disk_path:
+            return
+        fingerprint = key.split(':', 1)[0]
+        text = json.dumps(value, ensure_ascii=False)
+        try:
+            with self._connect() as conn:
+                if self._purged_fingerprint != fingerprint:
+                    # Каталог изменился: записи со старым отпечатком больше не нужны
+                    purged = conn.execute("DELETE FROM designs WHERE fingerprint != ?", (fingerprint,)).rowcount
+                    self.counters['disk_invalidated'] += max(purged, 0)
+                    self._purged_fingerprint = fingerprint
+                conn.execute("INSERT OR REPLACE INTO designs VALUES (?, ?, ?, ?, ?)",
+                             (key, fingerprint, text, len(text), time.time()))
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM designs").fetchone()[0]
+                if total > self.max_disk_bytes:
+                    self._disk_evict(conn, total)
+        except sqlite3.Error:
+            self.counters['disk_errors'] += 1
+
+    def _disk_evict(self, conn, total):
+        """Удаляет самые давно использованные записи, пока размер не станет <= 90% лимита."""
+        target = int(self.max_disk_bytes * 0.9)
+        for key, size in conn.execute("SELECT key, size FROM designs ORDER BY accessed").fetchall():
+            if total <= target:
+                break
+            conn.execute("DELETE FROM designs WHERE key = ?", (key,))
+            total -= size
+            self.counters['disk_evictions'] += 1
+
+    # --- Общий интерфейс ---
+
+    def get_or_compute(self, normalized, compute):
+        """Возвращает результат из кэша или вызывает compute() и запоминает результат."""
+        timer = lap_timer()
+        fingerprint = self.fingerprint.value()
+        memory_key = self._memory_key(normalized, fingerprint)
+        value = self._memory_get(memory_key)
+        if value is not None:
+            self.counters['memory_hits'] += 1
+            timer.lap('cache')
+            return dict(value)
+        key = self.make_key(normalized, fingerprint)
+        value = self._disk_get(key)
+        if value is not None:
+            self.counters['disk_hits'] += 1
+            self._memory_put(memory_key, value)
+            timer.lap('cache')
+            return dict(value)
+        self.counters['misses'] += 1
+        timer.lap('cache')
+        value = compute()
+        timer = lap_timer()
+        self._memory_put(memory_key, value)
+        self._disk_put(key, value)
+        timer.lap('cache')
+        return dict(value)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.disk_path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM designs")
+
+    def stats(self):
+        """Счетчики попаданий/промахов и текущие размеры обоих уровней."""
+        result = dict(self.counters)
+        lookups = self.counters['memory_hits'] + self.counters['disk_hits'] + self.counters['misses']
+        result['hit_rate'] = (lookups - self.counters['misses']) / lookups if lookups else 0.0
+        result['memory_entries'] = len(self._memory)
+        if self.disk_path:
+            try:
+                row = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM designs").fetchone()
+                result['disk_entries'], result['disk_bytes'] = row
+            except sqlite3.Error:
+                pass
+        return result
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_cache():
+    """Общий для процесса экземпляр кэша (создается при первом обращении)."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = DesignCache()
+        return _default_cache
+
+
+def cached_design_drive(power, n1, n2, approx_center_distance, load_type_choice, material_correction_factor=1.0,
+                        power_tables=None, lp_greater_or_equal=False, cache=None):
+    """
+    design_drive() с кэшированием. Расчет выполняется по нормализованным входным данным,
+    поэтому результат одинаков и при попадании, и при промахе.
+    Ошибки расчета (ValueError) не кэшируются.
+    """
+    cache = cache or default_cache()
+    power_tables = power_tables or {}
+    normalized = normalize_inputs(power, n1, n2, approx_center_distance, load_type_choice,
+                                  material_correction_factor, lp_greater_or_equal, power_tables)
+
+    def compute():
+        return design_drive(normalized['power'], normalized['n1'], normalized['n2'],
+                            normalized['approx_center_distance'], normalized['load_type_choice'],
+                            normalized['material_correction_factor'], power_tables,
+                            normalized['lp_greater_or_equal'])
+
+    return cache.get_or_compute(normalized, compute)
@@ -0,0 +1,157 @@
+# design_graph.py
+#
+# Инкрементальный расчет передачи для "живого" редактирования на странице калькулятора.
+# Цепочка design_drive разбита на этапы с явными входами (граф зависимостей).
+# Каждый этап запоминает свои входы и выходы; при следующем вызове evaluate() этап
+# пересчитывается, только если изменился хотя бы один его вход. Поэтому изменение,
+# например, межосевого расстояния пересчитывает длину ремня, Cα, CL и z, но не
+# трогает интерполяцию P0 и выбор сечения. Если пересчитанный этап дал прежний
+# результат (скажем, d2 привязался к тому же стандартному диаметру), следующие
+# за ним этапы тоже не пересчитываются.
+#
+# Результат совпадает с calculations.design_drive (те же функции, тот же порядок).
+
+import math
+from operator import itemgetter
+
+from calculations import (
+    calculate_transmission_ratio, calculate_design_power, determine_belt_section, get_min_pulley_diameter,
+    find_nearest_standard_value, calculate_belt_length, calculate_actual_center_distance,
+    get_actual_transmission_ratio, calculate_belt_speed, get_p0_value, get_cl_value, calculate_angle_of_wrap,
+    get_calpha_value, get_cz_value, calculate_number_of_belts
+)
+from data import STANDARD_PULLEY_DIAMETERS, STANDARD_BELT_LENGTHS
+from profiling import lap_timer
+
+# Входы графа (имена совпадают с аргументами design_drive)
+INPUTS = ('power', 'n1', 'n2', 'approx_center_distance', 'load_type_choice', 'material_correction_factor',
+          'power_tables', 'lp_greater_or_equal')
+
+
+def _ratio(n1, n2):
+    return {'i': calculate_transmission_ratio(n1, n2)}
+
+
+def _design_power(power, load_type_choice):
+    P_design, kp = calculate_design_power(power, load_type_choice)
+    return {'P_design': P_design, 'Kp': kp}
+
+
+def _section(P_design, n1):
+    section = determine_belt_section(P_design, n1)
+    d1_min = get_min_pulley_diameter(section)
+    if d1_min is None or not STANDARD_PULLEY_DIAMETERS.get(section) or not STANDARD_BELT_LENGTHS.get(section):
+        raise ValueError(f"Нет справочных данных для сечения {section}.")
+    return {'section': section, 'd1_min': d1_min}
+
+
+def _pulleys(section, d1_min, i):
+    diameters = STANDARD_PULLEY_DIAMETERS[section]
+    d1 = find_nearest_standard_value(d1_min, diameters, greater_or_equal=True)
+    d2_calc = d1 * i
+    d2 = find_nearest_standard_value(d2_calc, diameters, greater_or_equal=False)
+    return {'d1': d1, 'd2_calc': d2_calc, 'd2': d2, 'i_actual': get_actual_transmission_ratio(d1, d2)}
+
+
+def _belt_length(section, d1, d2, approx_center_distance, lp_greater_or_equal):
+    L_calc = calculate_belt_length(d1, d2, approx_center_distance)
+    Lp = find_nearest_standard_value(L_calc, STANDARD_BELT_LENGTHS[section], greater_or_equal=lp_greater_or_equal)
+    return {'L_calc': L_calc, 'Lp': Lp, 'a_actual': calculate_actual_center_distance(Lp, d1, d2)}
+
+
+def _speed(d1, n1):
+    return {'V': calculate_belt_speed(d1, n1)}
+
+
+def _p0_base(section, d1, n1, V, i_actual, power_tables):
+    p0_source = 'catalog'
+    table = (power_tables or {}).get(section)
+    P0_base = table.power(float(d1), float(n1)) if table is not None else 0.0
+    Pd = 0.0
+    if not P0_base > 0.0:
+        p0_source = 'approx'
+        P0_base = get_p0_value(section, V, 1.0)
+    elif table.additional is not None:
+        Pd = table.additional.power(i_actual, float(n1))
+        P0_base += Pd
+    if P0_base <= 0.0:
+        raise ValueError("Не удалось определить базовую мощность P0.")
+    return {'P0_base': P0_base, 'Pd': Pd, 'p0_source': p0_source}
+
+
+def _p0(P0_base, material_correction_factor):
+    return {'P0': P0_base * material_correction_factor}
+
+
+def _cl(section, Lp):
+    return {'CL': get_cl_value(section, Lp)}
+
+
+def _wrap(d1, d2, a_actual):
+    alpha1 = calculate_angle_of_wrap(d1, d2, a_actual)
+    return {'alpha1': alpha1, 'C_alpha': get_calpha_value(alpha1)}
+
+
+def _belts(P_design, P0, CL, C_alpha):
+    z_initial = calculate_number_of_belts(P_design, P0, CL, C_alpha, cz_trial=1.0)
+    Cz = get_cz_value(math.ceil(z_initial) if z_initial > 0 else 1)
+    z_calc = calculate_number_of_belts(P_design, P0, CL, C_alpha, cz_trial=Cz)
+    return {'z_initial': z_initial, 'Cz': Cz, 'z_calc': z_calc, 'z': math.ceil(z_calc) if z_calc > 0 else 1}
+
+
+# (этап, входы, функция) в порядке расчета: входы этапа - входы графа или выходы предыдущих этапов.
+# У каждого этапа не меньше двух входов (itemgetter возвращает кортеж).
+STAGES = (
+    ('ratio', ('n1', 'n2'), _ratio),
+    ('design_power', ('power', 'load_type_choice'), _design_power),
+    ('section', ('P_design', 'n1'), _section),
+    ('pulleys', ('section', 'd1_min', 'i'), _pulleys),
+    ('belt_length', ('section', 'd1', 'd2', 'approx_center_distance', 'lp_greater_or_equal'), _belt_length),
+    ('speed', ('d1', 'n1'), _speed),
+    ('p0_base', ('section', 'd1', 'n1', 'V', 'i_actual', 'power_tables'), _p0_base),
+    ('p0', ('P0_base', 'material_correction_factor'), _p0),
+    ('cl', ('section', 'Lp'), _cl),
+    ('wrap', ('d1', 'd2', 'a_actual'), _wrap),
+    ('belts', ('P_design', 'P0', 'CL', 'C_alpha'), _belts),
+)
+_GETTERS = tuple((name, itemgetter(*inputs), func) for name, inputs, func in STAGES)
+
+
+class DesignGraph:
+    """
+    Инкрементальный design_drive: хранит входы и выходы всех этапов последнего расчета.
+    Один экземпляр - на одну сессию (не разделяется между потоками).
+    """
+
+    def __init__(self):
+        self._cache = {}  # этап -> (значения входов, выходы)
+        self.recomputed = []  # этапы, пересчитанные при последнем evaluate()
+
+    def evaluate(self, power, n1, n2, approx_center_distance, load_type_choice, material_correction_factor=1.0,
+                 power_tables=None, lp_greater_or_equal=False):
+        """
+        То же, что design_drive(...): словарь со всеми промежуточными значениями.
+        При невозможности расчета выбрасывает ValueError; этапы до ошибки остаются в кэше.
+        """
+        values = {'power': power, 'n1': n1, 'n2': n2, 'approx_center_distance': approx_center_distance,
+                  'load_type_choice': load_type_choice, 'material_correction_factor': material_correction_factor,
+                  'power_tables': power_tables, 'lp_greater_or_equal': lp_greater_or_equal}
+        self.recomputed = []
+        timer = lap_timer()
+        for name, getter, func in _GETTERS:
+            args = getter(values)
+            cached = self._cache.get(name)
+            # Сравнение кортежей: таблицы каталога совпадают по объекту, остальные входы - по значению
+            if cached is not None and cached[0] == args:
+                outputs = cached[1]
+            else:
+                outputs = func(*args)
+                self._cache[name] = (args, outputs)
+                self.recomputed.append(name)
+                timer.lap(name)
+            values.update(outputs)
+        timer.lap('graph_lookup')
+        return {key: value for key, value in values.items() if key not in INPUTS}
+
+    def invalidate(self):
+        self._cache.clear()
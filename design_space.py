@@ -0,0 +1,208 @@
+# design_space.py
+#
+# Карты пространства решений для страницы pages/3_Design_Space.py: количество
+# ремней z, мощность одного ремня P0 и угол обхвата α1 по сетке d1 x n1
+# (передаточное число и мощность - как у выбранного режима) или d1 x a_прим
+# (n1 и n2 заданы). Вся сетка считается одним векторным проходом шагов 5-9
+# batch.py, только d1 берется из сетки, а не наименьший стандартный.
+#
+# Карта строится уровнями подробности по непрерывной оси (LEVELS): грубый уровень
+# готов почти сразу, подробные досчитываются в фоне. Готовые карты хранятся в общем
+# для всех сессий процесса LRU (SweepCache); одинаковые запросы нескольких
+# пользователей считаются один раз - второй получает тот же Future, что и первый.
+
+import collections
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from batch import MAX_BELT_SPEED, MAX_BELTS, MIN_WRAP_ANGLE, _section_pipeline
+from calculations import calculate_design_power, calculate_transmission_ratio, determine_belt_section
+from data import MIN_PULLEY_DIAMETERS, STANDARD_PULLEY_DIAMETERS
+from design_cache import normalize_inputs
+from profiling import lap_timer
+
+# Непрерывная ось карты: (ключ, подпись)
+AXES = {
+    'n1': "частота ведущего вала n1, об/мин",
+    'a': "примерное межосевое расстояние a_прим, мм",
+}
+# Величины на картах: (ключ, подпись)
+MAPS = (
+    ('z', "количество ремней z"),
+    ('P0', "мощность одного ремня P0, кВт"),
+    ('alpha1', "угол обхвата α1, град"),
+)
+# Число точек по непрерывной оси на уровнях уточнения
+LEVELS = (16, 64, 256)
+
+
+def pulley_diameters(section, ratio):
+    """Стандартные d1 сечения не меньше минимального, при которых d2 = d1·i еще есть в стандартном ряду."""
+    diameters = np.asarray(STANDARD_PULLEY_DIAMETERS.get(section, []), dtype=float)
+    if len(diameters) == 0:
+        return diameters
+    limit = diameters[-1] / max(ratio, 1.0)
+    return diameters[(diameters >= MIN_PULLEY_DIAMETERS[section]) & (diameters <= limit)]
+
+
+def sweep_design_space(power, n1, n2, approx_center_distance, load_type_choice, material_correction_factor=1.0,
+                       power_tables=None, lp_greater_or_equal=False, axis='n1', axis_range=(500.0, 3000.0),
+                       points=LEVELS[-1], section=None):
+    """
+    Карты z, P0, α1 (и V) на сетке d1 x axis. section=None - сечение по расчетной мощности,
+    как в design_drive. При axis='n1' n2 меняется вместе с n1 (передаточное число постоянно).
+
+    Возвращает словарь: 'section', 'axis', 'd1' и 'values' - узлы осей, 'maps' - {величина:
+    массив [d1, axis]} (NaN там, где расчет невозможен), 'feasible' - маска допустимых
+    вариантов (V, α1 и z в пределах batch.MAX_BELT_SPEED, MIN_WRAP_ANGLE, MAX_BELTS).
+    При невозможности расчета выбрасывает ValueError.
+    """
+    if axis not in AXES:
+        raise ValueError(f"Неизвестная ось карты: {axis}.")
+    low, high = (float(v) for v in axis_range)
+    if not 0 < low < high:
+        raise ValueError("Диапазон оси карты должен быть положительным и возрастающим.")
+    ratio = calculate_transmission_ratio(n1, n2)
+    P_design, _ = calculate_design_power(power, load_type_choice)
+    section = section or determine_belt_section(P_design, n1)
+    d1 = pulley_diameters(section, ratio)
+    if len(d1) == 0:
+        raise ValueError(f"Нет подходящих стандартных диаметров для сечения {section}.")
+
+    values = np.linspace(low, high, points)
+    d1_grid, value_grid = (g.ravel() for g in np.meshgrid(d1, values, indexing='ij'))
+    count = len(d1_grid)
+    n1_grid = value_grid if axis == 'n1' else np.full(count, float(n1))
+    a_grid = value_grid if axis == 'a' else np.full(count, float(approx_center_distance))
+    table = (power_tables or {}).get(section)
+    columns, too_short, no_power = _section_pipeline(
+        section, np.full(count, ratio), n1_grid, a_grid, np.full(count, P_design), material_correction_factor,
+        table, lp_greater_or_equal, lap_timer(), d1=d1_grid)
+
+    failed = too_short | no_power
+    shape = (len(d1), points)
+    maps = {name: np.where(failed, np.nan, columns[name]).reshape(shape) for name in ('z', 'P0', 'alpha1', 'V')}
+    feasible = (~failed & (columns['V'] <= MAX_BELT_SPEED) & (columns['alpha1'] >= MIN_WRAP_ANGLE)
+                & (columns['z'] <= MAX_BELTS)).reshape(shape)
+    return {'section': section, 'axis': axis, 'd1': d1, 'values': values, 'maps': maps, 'feasible': feasible}
+
+
+def heatmap_frame(result):
+    """Карты в длинном формате для графиков: строка на ячейку, x0-x1 - границы ячейки по оси."""
+    import pandas as pd
+
+    d1, values = result['d1'], result['values']
+    step = (values[-1] - values[0]) / (len(values) - 1) if len(values) > 1 else 1.0
+    d1_grid, value_grid = np.meshgrid(d1, values, indexing='ij')
+    frame = pd.DataFrame({'d1': d1_grid.ravel(), 'x': value_grid.ravel(),
+                          'x0': value_grid.ravel() - step / 2, 'x1': value_grid.ravel() + step / 2})
+    for name, array in result['maps'].items():
+        frame[name] = array.ravel()
+    frame['feasible'] = result['feasible'].ravel()
+    return frame
+
+
+class SweepCache:
+    """
+    LRU готовых карт (max_entries записей) с однократным расчетом одинаковых запросов:
+    пока карта считается, все запросившие ее получают один и тот же Future.
+    Расчеты выполняются пулом из workers фоновых потоков. Ошибки не кэшируются.
+    """
+
+    def __init__(self, max_entries=64, workers=2):
+        self.max_entries = max_entries
+        self._done = collections.OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='design-space')
+        self.counters = collections.Counter()
+
+    def peek(self, key):
+        """Готовая карта или None (без расчета)."""
+        with self._lock:
+            value = self._done.get(key)
+            if value is not None:
+                self._done.move_to_end(key)
+            return value
+
+    def submit(self, key, compute):
+        """Future с картой: уже готовой, считающейся по чужому запросу или новой фоновой compute()."""
+        with self._lock:
+            if key in self._done:
+                self._done.move_to_end(key)
+                self.counters['hits'] += 1
+                future = Future()
+                future.set_result(self._done[key])
+                return future
+            future = self._pending.get(key)
+            if future is not None:
+                self.counters['joined'] += 1
+                return future
+            self.counters['misses'] += 1
+            # _run ждет блокировку, поэтому успеет найти себя в _pending
+            future = self._pending[key] = self._executor.submit(self._run, key, compute)
+            return future
+
+    def _run(self, key, compute):
+        try:
+            value = compute()
+        except BaseException:
+            with self._lock:
+                self._pending.pop(key, None)
+            raise
+        with self._lock:
+            self._pending.pop(key, None)
+            self._done[key] = value
+            while len(self._done) > self.max_entries:
+                self._done.popitem(last=False)
+                self.counters['evictions'] += 1
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {**self.counters, 'entries': len(self._done), 'pending': len(self._pending)}
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_sweep_cache():
+    """Общий для процесса (всех сессий Streamlit) кэш карт."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SweepCache()
+        return _default_cache
+
+
+def design_space_levels(power, n1, n2, approx_center_distance, load_type_choice, material_correction_factor=1.0,
+                        power_tables=None, lp_greater_or_equal=False, axis='n1', axis_range=(500.0, 3000.0),
+                        section=None, levels=LEVELS, cache=None):
+    """
+    Запускает расчет карты на всех уровнях levels и возвращает список Future по возрастанию
+    подробности. Если самый подробный уровень уже в кэше, список состоит только из него.
+    """
+    cache = cache or default_sweep_cache()
+    power_tables = power_tables or {}
+    normalized = normalize_inputs(power, n1, n2, approx_center_distance, load_type_choice,
+                                  material_correction_factor, lp_greater_or_equal, power_tables)
+    normalized.update(axis=axis, axis_range=[round(float(v), 2) for v in axis_range], section=section)
+
+    def request(points):
+        key = json.dumps({**normalized, 'points': points}, sort_keys=True)
+
+        def compute():
+            return sweep_design_space(normalized['power'], normalized['n1'], normalized['n2'],
+                                      normalized['approx_center_distance'], normalized['load_type_choice'],
+                                      normalized['material_correction_factor'], power_tables,
+                                      lp_greater_or_equal, axis, normalized['axis_range'], points, section)
+        return key, compute
+
+    finest_key, finest = request(levels[-1])
+    if cache.peek(finest_key) is not None:
+        return [cache.submit(finest_key, finest)]
+    return [cache.submit(*request(points)) for points in levels]
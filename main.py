@@ -1,32 +1,26 @@
 # main.py
+import argparse
+import csv
+import json
 import math  # Для использования math.ceil
+import os
+import sys
+import time
 
-from calculations import (
-    calculate_transmission_ratio,
-    calculate_design_power,
-    determine_belt_section,
-    get_min_pulley_diameter,
-    find_nearest_standard_value,
-    calculate_belt_length,
-    calculate_actual_center_distance,
-    get_actual_transmission_ratio,
-    calculate_belt_speed,
-    get_p0_value,
-    get_cl_value,
-    calculate_angle_of_wrap,
-    get_calpha_value,
-    get_cz_value,
-    calculate_number_of_belts
-)
-from data import STANDARD_PULLEY_DIAMETERS, STANDARD_BELT_LENGTHS
-
-
-def calculate_v_belt_parameters():
+from calculations import calculate_transmission_ratio
+from data import MATERIAL_P0_CORRECTION_FACTORS
+from design_cache import cached_design_drive
+from profiling import StageHistogram, lap_timer, print_breakdown, profile_call, recording, span
+
+
+def calculate_v_belt_parameters(profile=False, histogram_path=None):
     """
     Калькулятор для сбора основных параметров, расчета передаточного числа,
     расчетной мощности, подбора сечения ремня, определения минимальных
     диаметров шкивов, расчета длины ремня и уточнения межосевого расстояния,
     а также количества ремней.
+    profile - после результатов вывести время по этапам расчета;
+    histogram_path - добавить время этапов в JSON-файл гистограмм (см. profiling.StageHistogram).
     """
     print("Добро пожаловать в калькулятор приводных ремней!")
     print("Для начала, пожалуйста, введите следующие параметры для клинового ремня.")
@@ -100,150 +94,274 @@ def calculate_v_belt_parameters():
         if load_type_choice not in ['1', '2', '3', '4']:
             print("Неверный ввод. Пожалуйста, введите число от 1 до 4.")
 
-    calculated_power, kp_value = calculate_design_power(power, load_type_choice)
-    print(f"Коэффициент режима работы (Kp): {kp_value}")
-    print(f"Расчетная мощность (P_расч): {calculated_power:.2f} кВт")
-
-    # --- 4. Подбор сечения ремня ---
-    belt_section = determine_belt_section(calculated_power, n1)
-    print(f"Предполагаемое сечение ремня: {belt_section}")
-
-    # --- 5. Определение диаметров шкивов ---
-    if belt_section == "Не определено":
-        print("Невозможно продолжить расчет диаметров шкивов, так как сечение ремня не определено.")
-        return
-
-    min_d1 = get_min_pulley_diameter(belt_section)
-    if min_d1 is None:
-        print(f"Невозможно найти минимальный диаметр для сечения {belt_section}.")
+    try:
+        # Повторные расчеты с теми же данными берутся из кэша (память + диск)
+        with recording() as recorder:
+            design = cached_design_drive(power, n1, n2, approx_center_distance, load_type_choice)
+    except ValueError as e:
+        print(f"Ошибка расчета: {e}")
         return
 
-    print(f"Минимальный рекомендуемый диаметр ведущего шкива (d1_min) для сечения {belt_section}: {min_d1} мм")
-
-    standard_diameters_for_section = STANDARD_PULLEY_DIAMETERS.get(belt_section, [])
+    print_design(design)
+    if profile:
+        print_breakdown(recorder)
+    if histogram_path:
+        _save_histogram(recorder, histogram_path)
 
-    if not standard_diameters_for_section:
-        print(f"ВНИМАНИЕ: Нет стандартных диаметров шкивов для сечения {belt_section} в базе данных.")
-        selected_d1 = max(min_d1, 50)
-        print(f"Используем минимальный d1: {selected_d1} мм")
-    else:
-        selected_d1 = find_nearest_standard_value(min_d1, standard_diameters_for_section, greater_or_equal=True)
-        print(f"Выбранный стандартный диаметр ведущего шкива (d1): {selected_d1} мм (ближайший >= {min_d1})")
-
-    calculated_d2 = selected_d1 * transmission_ratio
-    selected_d2 = find_nearest_standard_value(calculated_d2, standard_diameters_for_section, greater_or_equal=False)
 
-    if selected_d2 < min_d1:
-        print(
-            f"ВНИМАНИЕ: Выбранный d2 ({selected_d2} мм) меньше минимально рекомендуемого для сечения {belt_section} ({min_d1} мм). Рекомендуется выбрать другой d1 или пересмотреть передачу.")
+def _save_histogram(recorder, path, histogram=None):
+    """Добавляет время этапов (одна выборка на этап) в JSON-файл гистограмм."""
+    histogram = histogram or StageHistogram()
+    for name, stage in recorder.summary().items():
+        histogram.add(name, stage['seconds'])
+    histogram.save_json(path)
+    print(f"Гистограммы этапов сохранены: {path}")
 
-    print(f"Расчетный диаметр ведомого шкива (d2_calc): {calculated_d2:.2f} мм")
-    print(f"Выбранный стандартный диаметр ведомого шкива (d2): {selected_d2} мм")
 
-    actual_transmission_ratio = get_actual_transmission_ratio(selected_d1, selected_d2, slip_coefficient=0.01)
-    print(f"Фактическое передаточное число (i_факт) с учетом проскальзывания 1%: {actual_transmission_ratio:.2f}")
+def print_design(design):
+    """Выводит результаты расчета передачи (словарь из calculations.design_drive)."""
+    print(f"Коэффициент режима работы (Kp): {design['Kp']}")
+    print(f"Расчетная мощность (P_расч): {design['P_design']:.2f} кВт")
 
-    # --- 6. Расчет и подбор стандартной длины ремня и уточнение межосевого расстояния ---
+    # --- 4. Подбор сечения ремня ---
+    belt_section = design['section']
+    print(f"Предполагаемое сечение ремня: {belt_section}")
 
-    try:
-        required_belt_length = calculate_belt_length(selected_d1, selected_d2, approx_center_distance)
-        print(f"\nТребуемая расчетная длина ремня (L_расч): {required_belt_length:.2f} мм")
-    except ValueError as e:
-        print(f"Ошибка при расчете длины ремня: {e}")
-        return
+    # --- 5. Определение диаметров шкивов ---
+    min_d1 = design['d1_min']
+    print(f"Минимальный рекомендуемый диаметр ведущего шкива (d1_min) для сечения {belt_section}: {min_d1} мм")
+    print(f"Выбранный стандартный диаметр ведущего шкива (d1): {design['d1']} мм (ближайший >= {min_d1})")
 
-    standard_lengths_for_section = STANDARD_BELT_LENGTHS.get(belt_section, [])
+    if design['d2'] < min_d1:
+        print(
+            f"ВНИМАНИЕ: Выбранный d2 ({design['d2']} мм) меньше минимально рекомендуемого для сечения {belt_section} ({min_d1} мм). Рекомендуется выбрать другой d1 или пересмотреть передачу.")
 
-    if not standard_lengths_for_section:
-        print(f"ВНИМАНИЕ: Нет стандартных длин ремней для сечения {belt_section} в базе данных.")
-        selected_lp = required_belt_length
-        print(f"Используем расчетную длину ремня: {selected_lp:.2f} мм")
-    else:
-        selected_lp = find_nearest_standard_value(required_belt_length, standard_lengths_for_section,
-                                                  greater_or_equal=False)
-        print(f"Выбранная стандартная длина ремня (Lp): {selected_lp} мм (ближайшая к {required_belt_length:.2f})")
+    print(f"Расчетный диаметр ведомого шкива (d2_calc): {design['d2_calc']:.2f} мм")
+    print(f"Выбранный стандартный диаметр ведомого шкива (d2): {design['d2']} мм")
+    print(f"Фактическое передаточное число (i_факт) с учетом проскальзывания 1%: {design['i_actual']:.2f}")
 
-    try:
-        actual_center_distance = calculate_actual_center_distance(selected_lp, selected_d1, selected_d2)
-        print(f"Уточненное межосевое расстояние (a_ут) для Lp = {selected_lp} мм: {actual_center_distance:.2f} мм")
-    except ValueError as e:
-        print(f"Ошибка при уточнении межосевого расстояния: {e}")
-        return  # Выходим, если не можем рассчитать межосевое
+    # --- 6. Длина ремня и уточненное межосевое расстояние ---
+    print(f"\nТребуемая расчетная длина ремня (L_расч): {design['L_calc']:.2f} мм")
+    print(f"Выбранная стандартная длина ремня (Lp): {design['Lp']} мм (ближайшая к {design['L_calc']:.2f})")
+    print(f"Уточненное межосевое расстояние (a_ут) для Lp = {design['Lp']} мм: {design['a_actual']:.2f} мм")
 
     # --- 7. Расчет количества ремней (z) ---
+    # Cz зависит от z, а z - от Cz, поэтому z считается дважды:
+    # сначала при Cz = 1.0, затем с Cz для округленного вверх количества ремней.
     print("\n--- Расчет количества ремней ---")
+    print(f"Окружная скорость ремня (V): {design['V']:.2f} м/с")
+    print(f"Номинальная мощность P0, передаваемая одним ремнем: {design['P0']:.2f} кВт")
+    if design.get('Pd'):
+        print(f"  в т.ч. надбавка за передаточное число (Pd): {design['Pd']:.2f} кВт")
+    print(f"Коэффициент длины ремня (CL): {design['CL']:.2f}")
+    print(f"Угол обхвата меньшего шкива (alpha1): {design['alpha1']:.2f}°")
+    print(f"Коэффициент угла обхвата (C_alpha): {design['C_alpha']:.2f}")
+    print(f"Расчетное количество ремней (первое приближение, Cz=1.0): {design['z_initial']:.2f}")
+    print(f"Коэффициент количества ремней (Cz) для {math.ceil(design['z_initial']) or 1} ремней: {design['Cz']:.2f}")
+    print(f"Окончательное расчетное количество ремней: {design['z_calc']:.2f}")
+    print(f"**Рекомендуемое количество ремней (целое): {design['z']} шт.**")
+
+
+# --- Пакетный (неинтерактивный) режим ---
+# Записи читаются из файла потоком, считаются порциями по chunk_size через
+# batch.design_drives_batch и сразу же дописываются в выходной файл, поэтому
+# расход памяти не зависит от размера файла.
+
+BATCH_NUMERIC_FIELDS = ('P', 'n1', 'n2', 'a_approx')
+BATCH_OUTPUT_FIELDS = ['line', 'P', 'n1', 'n2', 'a_approx', 'load_type', 'material',
+                       'i', 'Kp', 'P_design', 'section', 'd1_min', 'd1', 'd2_calc', 'd2', 'i_actual',
+                       'L_calc', 'Lp', 'a_actual', 'V', 'Pd', 'P0', 'CL', 'alpha1', 'C_alpha',
+                       'z_initial', 'Cz', 'z_calc', 'z', 'error']
+
+
+def _is_csv(path):
+    return path.lower().endswith('.csv')
+
+
+def parse_drive_record(raw):
+    """Проверяет и приводит к нужным типам одну входную запись."""
+    if not isinstance(raw, dict):
+        raise ValueError("Запись должна быть объектом с полями P, n1, n2, a_approx, load_type.")
+    record = {}
+    for field in BATCH_NUMERIC_FIELDS:
+        value = raw.get(field)
+        if value is None or value == '':
+            raise ValueError(f"Не задано поле '{field}'.")
+        try:
+            record[field] = float(str(value).replace(',', '.'))
+        except ValueError:
+            raise ValueError(f"Поле '{field}' должно быть числом, получено: {value!r}.")
+    record['load_type'] = str(raw.get('load_type') or '1').strip()
+    # Материал по умолчанию - первый в справочнике (как на странице калькулятора);
+    # ключ есть у каждой записи, иначе в DataFrame порции пропуск станет NaN
+    material = raw.get('material')
+    record['material'] = str(material).strip() if material else next(iter(MATERIAL_P0_CORRECTION_FACTORS))
+    return record
 
-    # 7.1. Расчет скорости ремня (V)
-    belt_speed_v = calculate_belt_speed(selected_d1, n1)
-    print(f"Окружная скорость ремня (V): {belt_speed_v:.2f} м/с")
-
-    # 7.2. Получение P0
-    p0_value = get_p0_value(belt_section, belt_speed_v)
-    if p0_value == 0.0:
-        print(
-            "ВНИМАНИЕ: Не удалось определить P0 для данного сечения и скорости. Расчет количества ремней может быть неточным.")
-        # Если P0_value равно 0, дальнейшие расчеты будут некорректны
-        return
-    print(f"Номинальная мощность P0, передаваемая одним ремнем: {p0_value:.2f} кВт")
-
-    # 7.3. Получение CL
-    cl_value = get_cl_value(belt_section, selected_lp)
-    print(f"Коэффициент длины ремня (CL): {cl_value:.2f}")
-
-    # 7.4. Расчет угла обхвата и получение C_alpha
-    try:
-        angle_alpha1_deg = calculate_angle_of_wrap(selected_d1, selected_d2, actual_center_distance)
-        print(f"Угол обхвата меньшего шкива (alpha1): {angle_alpha1_deg:.2f}°")
-        calpha_value = get_calpha_value(angle_alpha1_deg)
-        print(f"Коэффициент угла обхвата (C_alpha): {calpha_value:.2f}")
-    except ValueError as e:
-        print(f"Ошибка при расчете угла обхвата: {e}")
-        calpha_value = 1.0  # Заглушка, если ошибка
-        print(f"Использовано значение C_alpha по умолчанию: {calpha_value:.2f}")
-
-    # 7.5. Расчет z (первое приближение, Cz = 1.0)
-    # Поскольку Cz зависит от z, а z - от Cz, сделаем итерацию:
-    # 1. Считаем z при Cz=1.0
-    # 2. Округляем z до целого числа (z_rounded)
-    # 3. Берем Cz для z_rounded
-    # 4. Пересчитываем z с новым Cz и округляем до целого.
-
-    z_calculated_initial = 0
-    try:
-        z_calculated_initial = calculate_number_of_belts(
-            calculated_power, p0_value, cl_value, calpha_value, cz_trial=1.0
-        )
-        print(f"Расчетное количество ремней (первое приближение, Cz=1.0): {z_calculated_initial:.2f}")
-    except ValueError as e:
-        print(f"Ошибка при расчете количества ремней: {e}")
-        return
-
-    # Округляем до ближайшего целого числа ремней вверх (т.к. ремней должно быть достаточно)
-    num_belts_rounded = math.ceil(z_calculated_initial)
-    if num_belts_rounded == 0:  # Если вдруг получилось 0, то минимум 1 ремень
-        num_belts_rounded = 1
-
-    # Получаем Cz для округленного количества ремней
-    cz_value_final = get_cz_value(num_belts_rounded)
-    print(f"Коэффициент количества ремней (Cz) для {num_belts_rounded} ремней: {cz_value_final:.2f}")
-
-    # Пересчитываем z с окончательным Cz
-    try:
-        final_z_value = calculate_number_of_belts(
-            calculated_power, p0_value, cl_value, calpha_value, cz_trial=cz_value_final
-        )
-        # Окончательно округляем вверх, так как количество ремней должно быть целым
-        final_num_belts = math.ceil(final_z_value)
-        if final_num_belts == 0:
-            final_num_belts = 1
-        print(f"Окончательное расчетное количество ремней: {final_z_value:.2f}")
-        print(f"**Рекомендуемое количество ремней (целое): {final_num_belts} шт.**")
 
-    except ValueError as e:
-        print(f"Ошибка при окончательном расчете количества ремней: {e}")
-        return
+def read_drive_records(path):
+    """
+    Генератор входных записей из JSONL- или CSV-файла.
+    Выдает пары (номер строки, запись); если строку разобрать не удалось,
+    вместо записи выдается исключение ValueError с описанием ошибки.
+    """
+    with open(path, mode='r', encoding='utf-8', newline='') as infile:
+        if _is_csv(path):
+            reader = csv.DictReader(infile)
+            for row in reader:
+                try:
+                    yield reader.line_num, parse_drive_record(row)
+                except ValueError as e:
+                    yield reader.line_num, e
+        else:
+            for line_number, line in enumerate(infile, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, parse_drive_record(json.loads(line))
+                except ValueError as e:  # json.JSONDecodeError - тоже ValueError
+                    yield line_number, e
+
+
+def design_drive_chunks(records, chunk_size=10000, **batch_options):
+    """
+    Генератор результатов: считает записи из read_drive_records порциями
+    и выдает по одному DataFrame на порцию (столбцы BATCH_OUTPUT_FIELDS,
+    строки - в исходном порядке, включая строки с ошибками разбора).
+    """
+    import pandas as pd  # pandas/NumPy нужны только в пакетном режиме
+    from batch import SECTION_CHOICE_COLUMNS, design_drives_batch
+
+    fields = BATCH_OUTPUT_FIELDS
+    if batch_options.get('section_mode') == 'all':
+        fields = fields + SECTION_CHOICE_COLUMNS
+
+    def flush(chunk):
+        valid = [(line_number, record) for line_number, record in chunk if not isinstance(record, Exception)]
+        result = design_drives_batch([record for _, record in valid], **batch_options) if valid else None
+        timer = lap_timer()
+        parts = []
+        if result is not None:
+            result.insert(0, 'line', [line_number for line_number, _ in valid])
+            parts.append(result)
+        broken = [{'line': line_number, 'error': str(record)}
+                  for line_number, record in chunk if isinstance(record, Exception)]
+        if broken:
+            parts.append(pd.DataFrame(broken))
+        frame = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        frame = frame.sort_values('line', kind='stable').reindex(columns=fields)
+        timer.lap('merge')
+        return frame
+
+    chunk = []
+    timer = lap_timer()
+    for item in records:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            timer.lap('read')
+            yield flush(chunk)
+            chunk = []
+            timer = lap_timer()
+    if chunk:
+        timer.lap('read')
+        yield flush(chunk)
+
+
+def run_batch(input_path, output_path, chunk_size=10000, lp_greater_or_equal=False, profile=False,
+              histogram_path=None, section_mode='all', power_tables=None):
+    """
+    Пакетный расчет файла передач. Возвращает словарь со статистикой.
+    section_mode - по умолчанию 'all': сечение выбирается перебором всех допустимых;
+    'threshold' - по порогам мощности, как в интерактивном режиме (см. batch.design_drives_batch).
+    power_tables - таблицы мощности каталога {сечение: PowerTable}; без них P0 берется
+    из встроенных таблиц data.py (как в интерактивном режиме).
+    profile - вывести время по этапам за весь файл; histogram_path - добавить время
+    этапов каждой порции в JSON-файл гистограмм (накапливается между запусками).
+    """
+    started = time.perf_counter()
+    total = failed = 0
+    records = read_drive_records(input_path)
+    chunks = design_drive_chunks(records, chunk_size=chunk_size, power_tables=power_tables,
+                                 lp_greater_or_equal=lp_greater_or_equal, section_mode=section_mode)
+    histogram = StageHistogram()
+
+    with recording() as recorder, open(output_path, mode='w', encoding='utf-8', newline='') as outfile:
+        chunk_start = 0
+        for number, frame in enumerate(chunks):
+            total += len(frame)
+            failed += int(frame['error'].notna().sum())
+            with span('write'):
+                if _is_csv(output_path):
+                    frame.to_csv(outfile, header=number == 0, index=False)
+                else:
+                    text = frame.to_json(orient='records', lines=True, force_ascii=False, double_precision=15)
+                    outfile.write(text if text.endswith('\n') else text + '\n')
+            # Одна выборка гистограммы - суммарное время этапа в порции
+            for name, stage in recorder.summary(chunk_start).items():
+                histogram.add(name, stage['seconds'])
+            chunk_start = len(recorder.spans)
+
+    elapsed = time.perf_counter() - started
+    stats = {'records': total, 'ok': total - failed, 'errors': failed, 'seconds': elapsed,
+             'records_per_second': total / elapsed if elapsed > 0 else 0.0}
+    print(f"Обработано записей: {total} (успешно: {total - failed}, с ошибками: {failed})")
+    print(f"Время: {elapsed:.2f} с, производительность: {stats['records_per_second']:.0f} записей/с")
+    if profile:
+        print_breakdown(recorder)
+    if histogram_path:
+        histogram.save_json(histogram_path)
+        print(f"Гистограммы этапов сохранены: {histogram_path}")
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Калькулятор клиноременных передач.")
+    parser.add_argument('--batch', metavar='INPUT',
+                        help="пакетный режим: входной файл .jsonl или .csv (поля P, n1, n2, a_approx, "
+                             "load_type, material)")
+    parser.add_argument('--out', metavar='OUTPUT', help="файл результатов .jsonl или .csv")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="размер порции расчета (по умолчанию 10000)")
+    parser.add_argument('--lp-ge', action='store_true',
+                        help="подбирать стандартную длину ремня не меньше расчетной (как на странице калькулятора)")
+    parser.add_argument('--threshold-sections', action='store_true',
+                        help="пакетный режим: выбирать сечение по порогам мощности, как интерактивный режим; "
+                             "по умолчанию считаются все допустимые сечения и берется лучшее "
+                             "(меньше ремней, меньше шкивы, больше запас по скорости)")
+    parser.add_argument('--catalog', action='store_true',
+                        help="пакетный режим: брать P0 из каталожных таблиц мощности (parsed_data), как страница "
+                             "калькулятора и service.py; без флага - из встроенных таблиц data.py "
+                             "(P0 и z могут отличаться)")
+    parser.add_argument('--profile', action='store_true', help="вывести время по этапам расчета")
+    parser.add_argument('--profile-dump', metavar='FILE',
+                        help="запустить под cProfile и сохранить статистику в FILE (pstats)")
+    parser.add_argument('--profile-json', metavar='FILE',
+                        help="добавить гистограммы времени этапов в JSON-файл")
+    args = parser.parse_args(argv)
+
+    if not args.batch:
+        run = lambda: calculate_v_belt_parameters(args.profile, args.profile_json)  # noqa: E731
+    elif not args.out:
+        parser.error("в пакетном режиме нужно указать --out")
+    elif not os.path.exists(args.batch):
+        print(f"Файл {args.batch} не найден.")
+        return 1
+    else:
+        power_tables = None
+        if args.catalog:
+            from catalog import power_table_registry
+            power_tables = power_table_registry().tables() or None
+        run = lambda: run_batch(args.batch, args.out, chunk_size=args.chunk_size,  # noqa: E731
+                                lp_greater_or_equal=args.lp_ge, profile=args.profile,
+                                histogram_path=args.profile_json,
+                                section_mode='threshold' if args.threshold_sections else 'all',
+                                power_tables=power_tables)
+
+    stats = profile_call(run, dump_path=args.profile_dump) if args.profile_dump else run()
+    if not args.batch:
+        return 0
+    return 1 if stats['records'] and stats['errors'] == stats['records'] else 0
 
 
 # Вызов функции для запуска калькулятора
 if __name__ == "__main__":
-    calculate_v_belt_parameters()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
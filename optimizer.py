@@ -0,0 +1,207 @@
+# optimizer.py
+#
+# Перебор ВСЕХ допустимых сочетаний стандартных компонентов (сечение x d1 x d2 x Lp)
+# для заданного режима работы и выбор Парето-оптимальных вариантов.
+# Вместо вложенных циклов по ~54 x 54 x 70 x 6 вариантам перебор идет ярусами:
+# на каждом ярусе недопустимые ветви отсекаются целиком, а оставшиеся
+# варианты считаются векторно (NumPy).
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from batch import p0_many, cl_many, calpha_many, cz_many, ceil_belts
+from calculations import calculate_transmission_ratio, calculate_design_power
+from data import (
+    MIN_PULLEY_DIAMETERS, STANDARD_PULLEY_DIAMETERS, STANDARD_BELT_LENGTHS, CALPHA_DATA, CL_DATA, CZ_DATA
+)
+
+SLIP_COEFFICIENT = 0.01
+
+# Критерии Парето (все минимизируются)
+PARETO_OBJECTIVES = ['z', 'a_actual', 'ratio_error', 'd_max']
+
+
+def _pareto_mask(points, block=256):
+    """
+    Маска недоминируемых строк матрицы points (все критерии минимизируются).
+    После лексикографической сортировки (сначала z) строка доминируема или повторяет
+    уже взятую ровно тогда, когда какая-то строка раньше нее не больше по всем критериям.
+    Проверка идет блоками по block строк: блок сравнивается с найденным фронтом
+    и сам с собой одной векторной операцией.
+    """
+    order = np.lexsort(points.T[::-1])
+    ordered = points[order]
+    mask = np.zeros(len(points), dtype=bool)
+    front = ordered[:0]
+    earlier = np.tri(block, k=-1, dtype=bool)
+    for start in range(0, len(ordered), block):
+        chunk = ordered[start:start + block]
+        # covered[p, q]: строка q не больше строки p по всем критериям; внутри блока - только q раньше p
+        covered = _all_not_greater(chunk, chunk) & earlier[:len(chunk), :len(chunk)]
+        dominated = covered.any(axis=1)
+        if len(front):
+            dominated |= _all_not_greater(chunk, front).any(axis=1)
+        front = np.concatenate([front, chunk[~dominated]])
+        mask[order[start:start + block][~dominated]] = True
+    return mask
+
+
+def _all_not_greater(rows, others):
+    """Матрица [строка rows, строка others]: others не больше rows по всем столбцам."""
+    result = others[None, :, 0] <= rows[:, None, 0]
+    for column in range(1, rows.shape[1]):
+        result &= others[None, :, column] <= rows[:, None, column]
+    return result
+
+
+def _section_candidates(section, n1, i_target, P_design, material_correction_factor, power_table,
+                        max_ratio_error, max_belt_speed, min_wrap_angle, a_min, a_max, max_belts):
+    """Все допустимые варианты одного сечения в виде словаря массивов (или None)."""
+    diameters = np.asarray(STANDARD_PULLEY_DIAMETERS.get(section, []), dtype=float)
+    lengths = np.asarray(STANDARD_BELT_LENGTHS.get(section, []), dtype=float)
+    if len(diameters) == 0 or len(lengths) == 0:
+        return None
+
+    # --- Ярус 1: ведущий шкив. Отсекаем по минимальному диаметру и скорости ремня ---
+    d1 = diameters[diameters >= MIN_PULLEY_DIAMETERS[section]]
+    V = np.pi * d1 * n1 / 60000
+    keep = V <= max_belt_speed
+    d1, V = d1[keep], V[keep]
+    if len(d1) == 0:
+        return None
+
+    p0_base = np.full(len(d1), np.nan)
+    if power_table is not None:
+        p0_base = power_table.power_many(d1, n1)
+    from_catalog = p0_base > 0
+    p0_base = np.where(from_catalog, p0_base, p0_many(section, V))
+    # Надбавка Pd зависит от d2 (через i_факт) и добавляется на ярусе 3;
+    # для оценки сверху берется наибольшая надбавка при данной n1
+    additional = power_table.additional if power_table is not None else None
+    pd_best = np.where(from_catalog, additional.max_power(n1), 0.0) if additional is not None else 0.0
+
+    # Оптимистичная оценка: наибольшие CL, Cα, Cz и Pd. Если даже так ремней
+    # больше max_belts - вся ветвь d1 отбрасывается.
+    cl_best = max(CL_DATA.get(section, {}).values(), default=1.0)
+    calpha_best = max(CALPHA_DATA.values())
+    cz_best = max(CZ_DATA.values())
+    P0_best = (p0_base + pd_best) * material_correction_factor
+    with np.errstate(divide='ignore'):
+        z_bound = np.ceil(P_design / (P0_best * cl_best * calpha_best * cz_best))
+    keep = (P0_best > 0) & (z_bound <= max_belts)
+    d1, V, p0_base, from_catalog = d1[keep], V[keep], p0_base[keep], from_catalog[keep]
+    if len(d1) == 0:
+        return None
+
+    # --- Ярус 2: ведомый шкив. Только в окне допустимой ошибки передаточного числа ---
+    d2_low = d1 * (1 - SLIP_COEFFICIENT) * i_target * (1 - max_ratio_error)
+    d2_high = d1 * (1 - SLIP_COEFFICIENT) * i_target * (1 + max_ratio_error)
+    start = np.searchsorted(diameters, d2_low, side='left')
+    stop = np.searchsorted(diameters, d2_high, side='right')
+    count = stop - start
+    if count.sum() == 0:
+        return None
+    pair = np.repeat(np.arange(len(d1)), count)
+    d2 = diameters[np.concatenate([np.arange(a, b) for a, b in zip(start, stop)])]
+    d1p = d1[pair]
+
+    # --- Ярус 3: длина ремня. Окно межосевого расстояния -> окно длин ---
+    # Нижняя граница a: конструктивная 0.55(d1 + d2), заданная a_min и
+    # минимальный угол обхвата: α1 >= min_wrap_angle <=> a >= |d2 - d1| / (2 sin((180 - α)/2)).
+    half_gap = math.sin(math.radians(180 - min_wrap_angle) / 2)
+    lower_a = np.maximum.reduce([0.55 * (d1p + d2), np.full(len(d2), a_min),
+                                 np.abs(d2 - d1p) / (2 * half_gap) if half_gap > 0 else np.zeros(len(d2))])
+    upper_a = np.minimum(2.0 * (d1p + d2), a_max)
+    valid = lower_a <= upper_a
+
+    def length(a):
+        return 2 * a + 0.5 * np.pi * (d1p + d2) + (d2 - d1p) ** 2 / (4 * a)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        l_start = np.searchsorted(lengths, length(lower_a), side='left')
+        l_stop = np.searchsorted(lengths, length(upper_a), side='right')
+    l_count = np.where(valid, np.maximum(l_stop - l_start, 0), 0)
+    if l_count.sum() == 0:
+        return None
+    triple = np.repeat(np.arange(len(d2)), l_count)
+    Lp = lengths[np.concatenate([np.arange(a, a + c) for a, c in zip(l_start, l_count)])]
+    d1t, d2t, pair_t = d1p[triple], d2[triple], pair[triple]
+
+    # --- Векторный расчет оставшихся вариантов ---
+    w = 0.5 * np.pi * (d1t + d2t)
+    discriminant = (Lp - w) ** 2 - 2 * (d2t - d1t) ** 2
+    ok = discriminant >= 0
+    a_actual = 0.25 * ((Lp - w) + np.sqrt(np.where(ok, discriminant, 0.0)))
+    alpha1 = np.degrees(np.pi - 2 * np.arcsin(np.clip((d2t - d1t) / (2 * a_actual), -1, 1)))
+    ok &= (a_actual >= lower_a[triple] - 1e-9) & (a_actual <= upper_a[triple] + 1e-9) & (alpha1 >= min_wrap_angle)
+
+    i_actual = d2t / (d1t * (1 - SLIP_COEFFICIENT))
+    Pd = np.zeros(len(Lp))
+    if additional is not None:
+        Pd = np.where(from_catalog[pair_t], additional.power_many(i_actual, n1), 0.0)
+    P0 = (p0_base[pair_t] + Pd) * material_correction_factor
+    ok &= P0 > 0
+
+    CL = cl_many(section, Lp)
+    C_alpha = calpha_many(alpha1)
+    denominator = P0 * CL * C_alpha
+    z_initial = P_design / denominator
+    Cz = cz_many(ceil_belts(z_initial))
+    z_calc = P_design / (denominator * Cz)
+    z = ceil_belts(z_calc)
+    ok &= z <= max_belts
+
+    return {
+        'section': np.full(int(ok.sum()), section, dtype=object),
+        'd1': d1t[ok], 'd2': d2t[ok], 'Lp': Lp[ok], 'a_actual': a_actual[ok],
+        'i_actual': i_actual[ok], 'ratio_error': np.abs(i_actual[ok] - i_target) / i_target,
+        'V': V[pair_t][ok], 'Pd': Pd[ok], 'P0': P0[ok], 'CL': CL[ok], 'alpha1': alpha1[ok],
+        'C_alpha': C_alpha[ok], 'Cz': Cz[ok], 'z_calc': z_calc[ok], 'z': z[ok],
+        'd_max': np.maximum(d1t, d2t)[ok],
+    }
+
+
+def optimize_drive(power, n1, n2, load_type_choice='1', material_correction_factor=1.0, power_tables=None,
+                   sections=None, max_ratio_error=0.05, max_belt_speed=30.0, min_wrap_angle=120.0,
+                   center_distance_range=None, max_belts=10, pareto_only=True):
+    """
+    Подбирает все допустимые сочетания стандартных шкивов и ремней для режима работы
+    и возвращает фронт Парето по критериям: количество ремней, межосевое расстояние,
+    ошибка передаточного числа и наибольший диаметр шкива (габарит).
+
+    Ограничения (варианты, их нарушающие, отбрасываются):
+        max_ratio_error       - допустимое относительное отклонение i_факт от n1/n2;
+        max_belt_speed        - наибольшая окружная скорость ремня, м/с;
+        min_wrap_angle        - наименьший угол обхвата меньшего шкива, град;
+        center_distance_range - (a_min, a_max) в мм, дополнительно к 0.55(d1+d2) <= a <= 2(d1+d2);
+        max_belts             - наибольшее допустимое количество ремней.
+    power_tables - словарь {сечение: PowerTable} с каталожными данными P0 (и надбавкой Pd).
+    pareto_only=False возвращает все допустимые варианты, а не только фронт.
+
+    Возвращает DataFrame, отсортированный по количеству ремней и межосевому расстоянию.
+    """
+    i_target = calculate_transmission_ratio(n1, n2)
+    P_design, _ = calculate_design_power(power, load_type_choice)
+    power_tables = power_tables or {}
+    a_min, a_max = center_distance_range or (0.0, math.inf)
+
+    parts = []
+    for section in (sections or list(MIN_PULLEY_DIAMETERS)):
+        part = _section_candidates(section, n1, i_target, P_design, material_correction_factor,
+                                   power_tables.get(section), max_ratio_error, max_belt_speed,
+                                   min_wrap_angle, a_min, a_max, max_belts)
+        if part is not None and len(part['z']):
+            parts.append(pd.DataFrame(part))
+
+    if not parts:
+        return pd.DataFrame(columns=['section', 'd1', 'd2', 'Lp', 'a_actual', 'i_actual', 'ratio_error', 'V',
+                                     'Pd', 'P0', 'CL', 'alpha1', 'C_alpha', 'Cz', 'z_calc', 'z', 'd_max'])
+
+    candidates = pd.concat(parts, ignore_index=True)
+    if pareto_only:
+        candidates = candidates[_pareto_mask(candidates[PARETO_OBJECTIVES].to_numpy(dtype=float))]
+    candidates = candidates.sort_values(['z', 'a_actual', 'ratio_error']).reset_index(drop=True)
+    candidates['z'] = candidates['z'].astype(int)
+    return candidates
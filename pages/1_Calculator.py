@@ -1,20 +1,14 @@
 # 1_Calculator.py (Финальная, рабочая версия)
 
 import streamlit as st
-import math
-
-from calculations import (
-    calculate_transmission_ratio, calculate_design_power, determine_belt_section, get_min_pulley_diameter,
-    find_nearest_standard_value, calculate_belt_length, calculate_actual_center_distance,
-    get_actual_transmission_ratio, calculate_belt_speed, get_p0_value, get_cl_value,
-    calculate_angle_of_wrap, get_calpha_value, get_cz_value, calculate_number_of_belts,
-    get_power_from_dataframe
-)
-from data import (
-    STANDARD_PULLEY_DIAMETERS, STANDARD_BELT_LENGTHS, P0_DATA_BY_V_RANGES, P0_VALUES,
-    CL_DATA, CALPHA_DATA, CZ_DATA, LOAD_COEFFICIENTS, MATERIAL_P0_CORRECTION_FACTORS,
-    load_power_data
-)
+
+from catalog import power_table_registry
+from data import MATERIAL_P0_CORRECTION_FACTORS
+from design_cache import cached_design_drive
+from design_graph import DesignGraph
+from optimizer import optimize_drive
+from profiling import format_breakdown, recording, span
+from sensitivity import INPUTS, OUTPUTS, sensitivity_analysis
 
 st.set_page_config(page_title="Калькулятор приводных ремней", page_icon="⚙️", layout="centered")
 st.title("⚙️ Калькулятор приводных ремней")
@@ -38,78 +32,105 @@ material_options = list(MATERIAL_P0_CORRECTION_FACTORS.keys())
 selected_material_name = st.radio("Выберите тип материала ремня:", material_options, index=0)
 material_correction_factor = MATERIAL_P0_CORRECTION_FACTORS[selected_material_name]
 
+show_alternatives = st.checkbox("Подобрать альтернативные варианты из стандартного ряда (фронт Парето)")
+live = st.toggle("Пересчитывать сразу при изменении параметров", value=True)
+
 st.markdown("---")
 
-if st.button("Выполнить расчет"):
+if live or st.button("Выполнить расчет"):
     st.header("4. Результаты расчета")
     try:
-        transmission_ratio = calculate_transmission_ratio(n1, n2)
-        st.write(f"**Теоретическое передаточное число (i):** {transmission_ratio:.2f}")
-
-        calculated_power, kp_value = calculate_design_power(power, load_type_choice)
-        st.write(f"**Коэффициент режима работы (Kp):** {kp_value}")
-        st.write(f"**Расчетная мощность (P_расч):** {calculated_power:.2f} кВт")
-
-        belt_section = determine_belt_section(calculated_power, n1)
+        with recording() as recorder:
+            # Таблицы каталога всех профилей - одна копия на процесс для всех сессий
+            with span('catalog'):
+                power_tables = power_table_registry().tables()
+
+            if live:
+                # Граф этапов сессии: пересчитываются только этапы, чьи входы изменились
+                graph = st.session_state.setdefault('design_graph', DesignGraph())
+                design = graph.evaluate(power, n1, n2, approx_center_distance, load_type_choice,
+                                        material_correction_factor, power_tables=power_tables,
+                                        lp_greater_or_equal=True)
+            else:
+                # Одинаковые исходные данные не пересчитываются: результат берется из кэша
+                design = cached_design_drive(power, n1, n2, approx_center_distance, load_type_choice,
+                                             material_correction_factor, power_tables=power_tables,
+                                             lp_greater_or_equal=True)
+        belt_section = design['section']
+
+        st.write(f"**Теоретическое передаточное число (i):** {design['i']:.2f}")
+        st.write(f"**Коэффициент режима работы (Kp):** {design['Kp']}")
+        st.write(f"**Расчетная мощность (P_расч):** {design['P_design']:.2f} кВт")
         st.write(f"**Предполагаемое сечение ремня:** {belt_section}")
-
-        min_d1 = get_min_pulley_diameter(belt_section)
-        standard_diameters = STANDARD_PULLEY_DIAMETERS.get(belt_section, [])
-        selected_d1 = find_nearest_standard_value(min_d1, standard_diameters, greater_or_equal=True)
-        st.write(f"**Выбранный стандартный диаметр ведущего шкива (d1):** {selected_d1} мм")
-
-        calculated_d2 = selected_d1 * transmission_ratio
-        selected_d2 = find_nearest_standard_value(calculated_d2, standard_diameters, greater_or_equal=False)
-        st.write(f"**Выбранный стандартный диаметр ведомого шкива (d2):** {selected_d2} мм")
-
-        actual_transmission_ratio = get_actual_transmission_ratio(selected_d1, selected_d2)
-        st.write(f"**Фактическое передаточное число (i_факт):** {actual_transmission_ratio:.2f}")
-
-        required_belt_length = calculate_belt_length(selected_d1, selected_d2, approx_center_distance)
-        standard_lengths = STANDARD_BELT_LENGTHS.get(belt_section, [])
-        selected_lp = find_nearest_standard_value(required_belt_length, standard_lengths, greater_or_equal=True)
-        st.write(f"**Выбранная стандартная длина ремня (Lp):** {selected_lp} мм")
-
-        actual_center_distance = calculate_actual_center_distance(selected_lp, selected_d1, selected_d2)
-        st.write(f"**Уточненное межосевое расстояние (a_ут):** {actual_center_distance:.2f} мм")
+        st.write(f"**Выбранный стандартный диаметр ведущего шкива (d1):** {design['d1']} мм")
+        st.write(f"**Выбранный стандартный диаметр ведомого шкива (d2):** {design['d2']} мм")
+        st.write(f"**Фактическое передаточное число (i_факт):** {design['i_actual']:.2f}")
+        st.write(f"**Выбранная стандартная длина ремня (Lp):** {design['Lp']} мм")
+        st.write(f"**Уточненное межосевое расстояние (a_ут):** {design['a_actual']:.2f} мм")
 
         st.subheader("5. Расчет количества ремней")
-        belt_speed_v = calculate_belt_speed(selected_d1, n1)
-        st.write(f"**Окружная скорость ремня (V):** {belt_speed_v:.2f} м/с")
-
-        p0_base = 0.0
-
-        if 'power_data_c' not in st.session_state:
-            st.session_state['power_data_c'] = load_power_data('C')
+        st.write(f"**Окружная скорость ремня (V):** {design['V']:.2f} м/с")
 
-        if belt_section == 'C' and st.session_state['power_data_c'] is not None:
-            st.success("✅ Используются точные данные из каталога для профиля 'C'.")
-            p0_base = get_power_from_dataframe(st.session_state['power_data_c'], float(selected_d1), float(n1))
+        if design['p0_source'] == 'catalog':
+            st.success(f"✅ Используются точные данные из каталога для профиля '{belt_section}'.")
+        elif belt_section in power_tables:
+            st.warning("⚠️ Для этих d1 и n1 в каталоге нет данных. Используется обобщенный расчет.")
         else:
             st.warning(f"⚠️ Используется обобщенный расчет для профиля '{belt_section}'.")
-            p0_base = get_p0_value(belt_section, belt_speed_v, 1.0)
-
-        if p0_base <= 0.0:
-            st.error("ВНИМАНИЕ: Не удалось определить базовую мощность P0. Расчет невозможен.")
-            st.stop()
-
-        p0_final = p0_base * material_correction_factor
-        st.write(f"**Номинальная мощность P0 (с учетом материала):** {p0_final:.2f} кВт")
-
-        cl_value = get_cl_value(belt_section, selected_lp)
-        angle_alpha1_deg = calculate_angle_of_wrap(selected_d1, selected_d2, actual_center_distance)
-        calpha_value = get_calpha_value(angle_alpha1_deg)
 
-        z_calculated_initial = calculate_number_of_belts(calculated_power, p0_final, cl_value, calpha_value, 1.0)
-        num_belts_rounded = math.ceil(z_calculated_initial) if z_calculated_initial > 0 else 1
-        cz_value_final = get_cz_value(num_belts_rounded)
-        final_z_value = calculate_number_of_belts(calculated_power, p0_final, cl_value, calpha_value, cz_value_final)
-        final_num_belts = math.ceil(final_z_value) if final_z_value > 0 else 1
+        st.write(f"**Номинальная мощность P0 (с учетом материала):** {design['P0']:.2f} кВт")
+        if design.get('Pd'):
+            st.caption(f"В т.ч. каталожная надбавка за передаточное число Pd: {design['Pd']:.2f} кВт")
 
         st.info(
-            f"Коэффициент длины (CL): {cl_value:.2f} | Угол обхвата (α1): {angle_alpha1_deg:.2f}° | Коэф. угла (Cα): {calpha_value:.2f} | Коэф. кол-ва (Cz): {cz_value_final:.2f}")
-        st.success(f"**Рекомендуемое количество ремней: {final_num_belts} шт.**")
+            f"Коэффициент длины (CL): {design['CL']:.2f} | Угол обхвата (α1): {design['alpha1']:.2f}° | Коэф. угла (Cα): {design['C_alpha']:.2f} | Коэф. кол-ва (Cz): {design['Cz']:.2f}")
+        st.success(f"**Рекомендуемое количество ремней: {design['z']} шт.**")
+
+        if show_alternatives:
+            st.subheader("6. Альтернативные варианты")
+            with recording(recorder), span('alternatives'):
+                alternatives = optimize_drive(power, n1, n2, load_type_choice, material_correction_factor,
+                                              power_tables=power_tables)
+            if alternatives.empty:
+                st.warning("Допустимых вариантов из стандартного ряда не найдено.")
+            else:
+                st.caption("Варианты, которые нельзя улучшить по одному критерию (ремни, межосевое расстояние, "
+                           "ошибка передаточного числа, габарит шкива), не ухудшив другой.")
+                st.dataframe(alternatives[['section', 'd1', 'd2', 'Lp', 'a_actual', 'i_actual', 'ratio_error',
+                                           'V', 'alpha1', 'z']].round(3), hide_index=True)
+
+        with st.expander("Чувствительность к исходным данным"):
+            with recording(recorder), span('sensitivity'):
+                sensitivity = sensitivity_analysis(power, n1, n2, approx_center_distance, load_type_choice,
+                                                   material_correction_factor, power_tables=power_tables,
+                                                   lp_greater_or_equal=True)
+            st.caption("Производные результатов по исходным данным в текущей точке. 'Тренд' - тот же расчет "
+                       "без округления d2 и Lp до стандартных значений.")
+            for tab, key in zip(st.tabs(["Фактический расчет", "Тренд"]), ('jacobian', 'trend')):
+                tab.dataframe([{'величина': title, 'значение': round(sensitivity['nominal'][name], 4),
+                                **{f"∂/∂{symbol}": round(sensitivity[key][name][k], 6) for k, symbol in INPUTS}}
+                               for name, title in OUTPUTS], hide_index=True)
+            for jump in sensitivity['jumps']:
+                if jump['near']:
+                    deltas = ", ".join(f"{symbol} {jump['to_jump_trend'][k]:+.4g}" for k, symbol in INPUTS
+                                       if k in jump['to_jump_trend'])
+                    st.warning(f"Близко к скачку: {jump['title']} ({jump['quantity']} = {jump['value']:.4g}, "
+                               f"граница {jump['target']:.4g})"
+                               + (f"; изменение входа до скачка: {deltas}" if deltas else ""))
+
+        with st.expander("Производительность"):
+            if live:
+                st.caption(f"Пересчитаны этапы: {', '.join(graph.recomputed) or 'нет (входы не изменились)'}.")
+            else:
+                st.caption("Время этапов этого расчета. Этапы design_power … belts выполняются только при "
+                           "промахе кэша; при попадании остается только 'cache'.")
+            st.code("\n".join(format_breakdown(recorder.summary())), language=None)
 
     except Exception as e:
         st.error(f"Произошла непредвиденная ошибка: {e}")
-        st.warning("Пожалуйста, проверьте входные данные и попробуйте снова.")
\ No newline at end of file
+        st.warning("Пожалуйста, проверьте входные данные и попробуйте снова.")
+with st.sidebar.expander("Каталог мощностей"):
+    registry = power_table_registry()
+    st.write(f"Профили с каталожными данными: {', '.join(registry.profiles()) or 'нет'}")
+    for profile, size in registry.memory_report().items():
+        st.write(f"Профиль {profile}: {size / 1024:.1f} КБ в памяти (общие для всех сессий)")
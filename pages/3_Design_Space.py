@@ -0,0 +1,110 @@
+# 3_Design_Space.py - карты пространства решений (z, P0, α1 по d1 x n1 или d1 x a_прим)
+
+import streamlit as st
+
+from catalog import power_table_registry
+from data import MATERIAL_P0_CORRECTION_FACTORS
+from design_space import AXES, MAPS, design_space_levels, heatmap_frame
+
+st.set_page_config(page_title="Пространство решений", page_icon="🗺️", layout="wide")
+st.title("🗺️ Пространство решений")
+st.caption("Количество ремней, мощность одного ремня и угол обхвата для всех стандартных d1 "
+           "в диапазоне частот или межосевых расстояний. Карты общие для всех пользователей: "
+           "уже построенные открываются сразу, новые сначала показываются на грубой сетке.")
+
+REFRESH = 0.5  # с, период обновления карты, пока она уточняется
+
+load_type_mapping = {"Спокойная (равномерная) нагрузка": '1', "Средняя нагрузка (небольшие толчки)": '2',
+                     "Тяжелая нагрузка (умеренные толчки)": '3', "Ударная нагрузка (сильные толчки)": '4'}
+
+# Параметры собираются формой: карта пересчитывается только по кнопке, а не при каждом изменении поля
+with st.form("design_space"):
+    left, middle, right = st.columns(3)
+    power = left.number_input("Номинальная мощность (P) в кВт:", 0.1, value=15.0, step=0.1, format="%.2f")
+    n1 = left.number_input("Частота ведущего вала (n1) в об/мин:", 1.0, value=1450.0, step=1.0, format="%.1f")
+    n2 = left.number_input("Частота ведомого вала (n2) в об/мин:", 1.0, value=650.0, step=1.0, format="%.1f")
+    approx_center_distance = middle.number_input("Примерное межосевое расстояние (a_прим) в мм:", 100.0,
+                                                 value=1000.0, step=10.0, format="%.1f")
+    load_type_name = middle.selectbox("Тип нагрузки:", list(load_type_mapping.keys()), index=2)
+    material_name = middle.selectbox("Материал ремня:", list(MATERIAL_P0_CORRECTION_FACTORS.keys()))
+    axis = right.radio("Ось карты:", list(AXES), format_func=lambda key: AXES[key])
+    n1_range = right.slider("Диапазон n1, об/мин:", 100, 4000, (500, 3000), step=50)
+    a_range = right.slider("Диапазон a_прим, мм:", 100, 6000, (300, 3000), step=50)
+    section = right.selectbox("Сечение ремня:", ["по расчетной мощности", 'Z(0)', 'A', 'B', 'C', 'D', 'E'])
+    submitted = st.form_submit_button("Построить карты")
+
+if submitted:
+    st.session_state['design_space_request'] = {
+        'power': power, 'n1': n1, 'n2': n2, 'approx_center_distance': approx_center_distance,
+        'load_type_choice': load_type_mapping[load_type_name],
+        'material_correction_factor': MATERIAL_P0_CORRECTION_FACTORS[material_name],
+        'axis': axis, 'axis_range': n1_range if axis == 'n1' else a_range,
+        'section': None if section.startswith("по ") else section,
+    }
+
+
+def heatmap_spec(name, title, axis, nominal):
+    """Тепловая карта name по d1 x axis; недопустимые варианты - полупрозрачные, линия - исходная точка."""
+    return {
+        'layer': [
+            {
+                'mark': {'type': 'rect'},
+                'encoding': {
+                    'x': {'field': 'x0', 'type': 'quantitative', 'title': AXES[axis]},
+                    'x2': {'field': 'x1'},
+                    'y': {'field': 'd1', 'type': 'ordinal', 'sort': 'descending', 'title': "d1, мм"},
+                    'color': {'field': name, 'type': 'quantitative', 'title': title,
+                              'scale': {'scheme': 'viridis', 'reverse': name == 'z'}},
+                    'opacity': {'condition': {'test': 'datum.feasible', 'value': 1.0}, 'value': 0.35},
+                    'tooltip': [{'field': 'd1', 'title': "d1, мм"},
+                                {'field': 'x', 'title': AXES[axis], 'format': '.1f'},
+                                {'field': 'z'}, {'field': 'P0', 'format': '.2f'},
+                                {'field': 'alpha1', 'format': '.1f'}, {'field': 'V', 'format': '.1f'}],
+                },
+            },
+            {
+                'data': {'values': [{'nominal': nominal}]},
+                'mark': {'type': 'rule', 'color': 'red', 'strokeDash': [4, 4]},
+                'encoding': {'x': {'field': 'nominal', 'type': 'quantitative'}},
+            },
+        ],
+    }
+
+
+def show_maps(request):
+    """Показывает самый подробный из готовых уровней карты."""
+    futures = design_space_levels(**request, power_tables=power_table_registry().tables(),
+                                  lp_greater_or_equal=True)
+    ready = [future for future in futures if future.done()]
+    try:
+        result = (ready[-1] if ready else futures[0]).result()
+    except ValueError as e:
+        st.error(f"Ошибка: {e}")
+        return
+    refining = len(ready) < len(futures)
+    if not refining and st.session_state.get('design_space_refining'):
+        # Все уровни готовы: полный перезапуск страницы отключает опрос фрагмента
+        st.session_state['design_space_refining'] = False
+        st.rerun()
+
+    d1, values = result['d1'], result['values']
+    status = f"Сечение {result['section']}, сетка {len(d1)} × {len(values)}"
+    st.caption(status + (" - уточняется..." if refining else ". Полупрозрачные ячейки: V > 30 м/с, α1 < 120° "
+                                                            "или больше 10 ремней."))
+    frame = heatmap_frame(result)
+    nominal = request['n1'] if request['axis'] == 'n1' else request['approx_center_distance']
+    for tab, (name, title) in zip(st.tabs([title for _, title in MAPS]), MAPS):
+        tab.vega_lite_chart(frame, heatmap_spec(name, title, request['axis'], nominal), use_container_width=True)
+
+
+if 'design_space_request' in st.session_state:
+    request = st.session_state['design_space_request']
+    # Пока подробные уровни считаются в фоне, фрагмент с картами сам перерисовывается
+    # каждые REFRESH секунд (остальная страница при этом не выполняется)
+    futures = design_space_levels(**request, power_tables=power_table_registry().tables(),
+                                  lp_greater_or_equal=True)
+    refining = not all(future.done() for future in futures)
+    st.session_state['design_space_refining'] = refining
+    st.fragment(run_every=REFRESH if refining else None)(show_maps)(request)
+else:
+    st.info("Задайте параметры и нажмите «Построить карты».")
@@ -0,0 +1,131 @@
+# pdf_cache.py
+#
+# Постраничный кэш разбора PDF-каталога для повторной загрузки новых редакций.
+# Ключ страницы - хеш ее "сырого" потока содержимого (page.read_contents()),
+# поэтому страница, не изменившаяся между редакциями каталога, повторно не
+# извлекается, даже если сместился ее номер. Результат разбора профиля
+# кэшируется по набору хешей его страниц. Для каждого профиля и режима разбора
+# (text, geometry) хранится последний результат - по нему строится отчет об
+# изменившихся ячейках таблиц Pb и Pd. Режимы не сравниваются между собой.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+CACHE_DIR = ".cache"
+CACHE_FILE = "pdf_pages.sqlite"
+
+
+def page_hash(page):
+    """Хеш страницы fitz по потоку содержимого и размеру страницы."""
+    digest = hashlib.sha256(page.read_contents())
+    digest.update(repr(tuple(page.rect)).encode('ascii'))
+    return digest.hexdigest()
+
+
+def pages_key(hashes):
+    """Ключ набора страниц профиля (порядок страниц важен)."""
+    return hashlib.sha256("\n".join(hashes).encode('ascii')).hexdigest()
+
+
+class PageCache:
+    """
+    SQLite-кэш: текст страниц по хешу, разобранные строки по набору страниц,
+    ключ последнего разбора для каждой пары (профиль, режим разбора).
+    Строки Pd хранятся под ключом строк Pb с суффиксом ':Pd'.
+    """
+
+    def __init__(self, path=os.path.join(CACHE_DIR, CACHE_FILE)):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS pages (hash TEXT PRIMARY KEY, text TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS parsed (key TEXT PRIMARY KEY, rows TEXT)")
+            # Прежняя таблица latest была общей для всех режимов разбора
+            conn.execute("DROP TABLE IF EXISTS latest")
+            conn.execute("CREATE TABLE IF NOT EXISTS latest_runs (profile TEXT, engine TEXT, key TEXT, "
+                         "PRIMARY KEY (profile, engine))")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def known_pages(self):
+        """Множество хешей страниц, текст которых уже есть в кэше."""
+        return {row[0] for row in self._connect().execute("SELECT hash FROM pages")}
+
+    def page_texts(self, hashes):
+        hashes = list(set(hashes))
+        texts = {}
+        for start in range(0, len(hashes), 500):
+            part = hashes[start:start + 500]
+            query = f"SELECT hash, text FROM pages WHERE hash IN ({','.join('?' * len(part))})"
+            texts.update(self._connect().execute(query, part).fetchall())
+        return texts
+
+    def put_pages(self, texts):
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?)", texts.items())
+
+    def get_rows(self, key):
+        row = self._connect().execute("SELECT rows FROM parsed WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_rows(self, key, rows):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO parsed VALUES (?, ?)", (key, json.dumps(rows)))
+
+    def latest_rows(self, profile, engine='text', kind='Pb'):
+        """
+        Строки таблицы kind ('Pb' или 'Pd') последнего разбора профиля режимом engine
+        (или None, если профиль этим режимом еще не разбирался).
+        """
+        row = self._connect().execute("SELECT key FROM latest_runs WHERE profile = ? AND engine = ?",
+                                      (profile, engine)).fetchone()
+        if row is None:
+            return None
+        return self.get_rows(row[0] if kind == 'Pb' else row[0] + ':' + kind)
+
+    def set_latest(self, profile, key, engine='text'):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO latest_runs VALUES (?, ?, ?)", (profile, engine, key))
+
+
+def _diff_cells(old, new, names):
+    changes = []
+    for key in sorted(old.keys() | new.keys()):
+        before, after = old.get(key), new.get(key)
+        if before == after:
+            continue
+        change = 'added' if before is None else 'removed' if after is None else 'changed'
+        changes.append({**dict(zip(names, key)), 'old': before, 'new': after, 'change': change})
+    return changes
+
+
+def diff_power_rows(old_rows, new_rows, old_pd_rows=None, new_pd_rows=None):
+    """
+    Сравнивает две таблицы Pb (списки записей {'d', 'n1', 'Pb'}) по ячейкам (d, n1)
+    и две таблицы Pd (записи {'i_min', 'i_max', 'n1', 'Pd'}) по ячейкам (i_min, i_max, n1).
+    Возвращает список изменений: {'table': 'Pb', 'd', 'n1', 'old', 'new', 'change'}
+    и {'table': 'Pd', 'i_min', 'i_max', 'n1', 'old', 'new', 'change'},
+    где change - 'added', 'removed' или 'changed'.
+    """
+    def cells(rows, names, value):
+        result = {}
+        for r in rows or []:
+            result.setdefault(tuple(float(r[name]) for name in names), float(r[value]))
+        return result
+
+    pb_names, pd_names = ('d', 'n1'), ('i_min', 'i_max', 'n1')
+    changes = [{'table': 'Pb', **change} for change in
+               _diff_cells(cells(old_rows, pb_names, 'Pb'), cells(new_rows, pb_names, 'Pb'), pb_names)]
+    changes += [{'table': 'Pd', **change} for change in
+                _diff_cells(cells(old_pd_rows, pd_names, 'Pd'), cells(new_pd_rows, pd_names, 'Pd'), pd_names)]
+    return changes
@@ -0,0 +1,133 @@
+# pdf_geometry.py
+#
+# Извлечение таблиц мощности Pb по координатам слов PyMuPDF.
+# Вместо цепочки "текст -> поток чисел -> эвристика RPM/диаметр -> CSV"
+# таблица восстанавливается по геометрии: строка шапки 'RPM / Ø' задает
+# диаметры столбцов, строки данных группируются по y. Границы столбцов -
+# середины между соседними центрами столбцов; центры берутся по полным строкам
+# данных (у них значение в каждом столбце), а если таких нет - по шапке.
+# Значение попадает в столбец, в чей интервал по x лежит его центр, поэтому
+# пропущенная ячейка остается NaN и не сдвигает соседние значения.
+#
+# Разбираются только таблицы Pb; таблицы Pd (надбавка за передаточное число)
+# извлекает только текстовый режим pdf_parser.py.
+
+import numpy as np
+
+HEADER_WORD = "RPM"
+END_WORD = "Pd"
+SKIP_WORDS = {"/", "Ø", "RPM/Ø", "Ø(mm)"}
+
+
+def _number(word):
+    """'1,20*' -> 1.2; None, если слово не число."""
+    text = word.replace('*', '').replace(',', '.').strip()
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _rpm(word):
+    """'1.000' -> 1000.0; None, если слово не целое число оборотов."""
+    text = word.replace('.', '').replace(',', '').strip()
+    return float(text) if text.isdigit() else None
+
+
+def _rows(words, tolerance):
+    """Группирует слова (x0, y0, x1, y1, текст) в строки по вертикальному центру."""
+    rows = []
+    for word in sorted(words, key=lambda w: ((w[1] + w[3]) / 2, w[0])):
+        center = (word[1] + word[3]) / 2
+        if rows and center - rows[-1][0] <= tolerance:
+            rows[-1][1].append(word)
+        else:
+            rows.append([center, [word]])
+    return [sorted(row, key=lambda w: w[0]) for _, row in rows]
+
+
+def extract_page_cells(page):
+    """
+    Все ячейки таблиц Pb на странице fitz: словарь {(d, n1): Pb}.
+    Если на странице несколько таблиц, при повторе ячейки берется первое значение.
+    Таблицы Pd пропускаются: их разбирает только текстовый режим (pdf_parser.parse_catalog).
+    """
+    words = [tuple(w[:5]) for w in page.get_text("words")]
+    starts = sorted((w for w in words if w[4] == HEADER_WORD), key=lambda w: w[1])
+    cells = {}
+    for k, start in enumerate(starts):
+        height = start[3] - start[1]
+        tolerance = height / 2
+        # Границы таблицы - по центрам строк: от строки 'RPM' (заголовок над ней не входит)
+        # до строки 'Pd' или следующей 'RPM'
+        top = (start[1] + start[3]) / 2 - tolerance
+        bottom = (starts[k + 1][1] + starts[k + 1][3]) / 2 - tolerance if k + 1 < len(starts) else page.rect.y1
+        ends = [(w[1] + w[3]) / 2 for w in words if w[4] == END_WORD and w[1] > start[3]]
+        if ends:
+            bottom = min(bottom, min(ends) - tolerance)
+
+        table_words = [w for w in words if top <= (w[1] + w[3]) / 2 < bottom and w[4] not in SKIP_WORDS]
+        rows = _rows([w for w in table_words if w[4] != HEADER_WORD], tolerance)
+
+        # Шапка - первая строка чисел не левее 'RPM' (в той же строке или сразу под ней)
+        header, body = None, []
+        for row in rows:
+            if header is None:
+                numbers = [(w, _number(w[4])) for w in row if w[0] >= start[0]]
+                numbers = [(w, value) for w, value in numbers if value is not None]
+                if numbers:
+                    header = numbers
+                continue
+            # Строка данных: частота вращения и значения (x-центр, значение)
+            rpm = _rpm(row[0][4])
+            values = [((w[0] + w[2]) / 2, _number(w[4])) for w in row[1:]]
+            values = [(x, value) for x, value in values if value is not None]
+            if rpm is not None and values:
+                body.append(((row[0][0] + row[0][2]) / 2, rpm, values))
+        if not header:
+            continue
+
+        diameters = [value for _, value in header]
+        full = [[x for x, _ in values] for _, _, values in body if len(values) == len(diameters)]
+        if full:
+            columns = np.median(np.array(full), axis=0)
+        else:
+            columns = np.array([(w[0] + w[2]) / 2 for w, _ in header])
+        half = np.diff(columns) / 2
+        edge = half.min() if len(half) else 2 * height
+        # Интервалы столбцов: от середины до середины между соседними центрами
+        bounds = np.concatenate([[columns[0] - (half[0] if len(half) else edge)], columns[:-1] + half,
+                                 [columns[-1] + (half[-1] if len(half) else edge)]])
+
+        for rpm_x, rpm, values in body:
+            # Частота вращения - левее первого столбца
+            if rpm_x >= bounds[0]:
+                continue
+            for x, value in values:
+                column = int(np.searchsorted(bounds, x, side='right')) - 1
+                if 0 <= column < len(diameters):
+                    cells.setdefault((diameters[column], rpm), value)
+    return cells
+
+
+def cells_to_arrays(cells):
+    """{(d, n1): Pb} -> (оси d и n1 по возрастанию, сетка Pb[d, n1] с NaN в пустых ячейках)."""
+    d_axis = np.array(sorted({d for d, _ in cells}), dtype=np.float64)
+    n_axis = np.array(sorted({n for _, n in cells}), dtype=np.float64)
+    grid = np.full((len(d_axis), len(n_axis)), np.nan)
+    d_pos = {d: i for i, d in enumerate(d_axis.tolist())}
+    n_pos = {n: j for j, n in enumerate(n_axis.tolist())}
+    for (d, n), value in cells.items():
+        grid[d_pos[d], n_pos[n]] = value
+    return d_axis, n_axis, grid
+
+
+def save_arrays(path, d_axis, n_axis, grid):
+    """Сохраняет таблицу в .npz - исходный формат каталога наравне с CSV (см. catalog.py)."""
+    with open(path, 'wb') as f:
+        np.savez(f, d=d_axis, n1=n_axis, Pb=grid)
+
+
+def load_arrays(path):
+    with np.load(path) as arrays:
+        return arrays['d'], arrays['n1'], arrays['Pb']
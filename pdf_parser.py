@@ -1,14 +1,54 @@
 # pdf_parser.py (Версия 12, Финальная, основанная на фактах)
 
+import argparse
+import json
+import math
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import fitz
 import pandas as pd
-import re
-import os
+
+from catalog import compile_catalog
+from pdf_cache import PageCache, diff_power_rows, page_hash, pages_key
+from pdf_geometry import cells_to_arrays, extract_page_cells, save_arrays
 
 PDF_PATH = "catalog.pdf"
 OUTPUT_DIR = "parsed_data"
 
 
+# Таблица Pb - это текст между 'RPM / Ø' и 'Pd (kW)';
+# re.DOTALL позволяет точке (.) соответствовать также и символу новой строки
+POWER_TABLE_MARKER = "RPM / Ø"
+POWER_BLOCK_RE = re.compile(r"RPM / Ø(.*?)Pd \(kW\)", re.DOTALL)
+NUMBER_RE = re.compile(r'[\d\.]+')
+
+# Пара таблиц: Pb до 'Pd (kW)' и Pd после него - до следующей таблицы или конца текста
+TABLE_PAIR_RE = re.compile(r"RPM / Ø(.*?)Pd \(kW\)(.*?)(?=RPM / Ø|\Z)", re.DOTALL)
+# Токены таблицы Pd: диапазон передаточного числа, открытый диапазон (≥ 2,00) или число
+ADDITIONAL_TOKEN_RE = re.compile(r"(?P<low>\d+\.\d+)\s*[-÷–]\s*(?P<high>\d+\.\d+)"
+                                 r"|[≥>]=?\s*(?P<open>\d+\.\d+)"
+                                 r"|(?P<number>\d[\d.]*)")
+RPM_RE = re.compile(r"\d+|\d{1,3}(?:\.\d{3})+")
+
+# Подпись профиля на странице: "Profile C", "SECTION SPB", "Профиль: B" и т.п.
+PROFILE_RE = re.compile(r"\b(?i:profile|profil|section|профиль|сечение)\s*[:\-]?\s*(SP[ZABC]|XP[ZABC]|[ZABCDE])\b")
+# Подписи профилей, которые в остальном проекте называются иначе
+PROFILE_ALIASES = {'Z': 'Z(0)'}
+
+
+def iter_table_numbers(text_content):
+    """Поток всех чисел из всех блоков таблиц Pb (без сборки промежуточных списков)."""
+    for block in POWER_BLOCK_RE.finditer(text_content):
+        # Внутри каждого блока находим абсолютно все числа
+        # Убираем звездочки, заменяем запятые на точки
+        cleaned_block = block.group(1).replace(',', '.').replace('*', '')
+        for number in NUMBER_RE.finditer(cleaned_block):
+            yield number.group()
+
+
 def parse_power_tables_from_text(text_content):
     """
     Самый надежный парсер, основанный на анализе реального вывода debug_output.txt.
@@ -19,25 +59,23 @@ def parse_power_tables_from_text(text_content):
     # --- Шаг 1: Найти и извлечь все числа из всех таблиц Pb ---
 
     # Находим весь текст, который находится между 'RPM / Ø' и 'Pd (kW)'
-    # re.DOTALL позволяет точке (.) соответствовать также и символу новой строки
-    power_blocks = re.findall(r"RPM / Ø(.*?)Pd \(kW\)", text_content, re.DOTALL)
-
-    if not power_blocks:
+    # (регулярные выражения скомпилированы заранее, см. POWER_BLOCK_RE)
+    if not POWER_BLOCK_RE.search(text_content):
         print("ОШИБКА: Не удалось найти блоки таблиц с мощностью (между 'RPM / Ø' и 'Pd (kW)').")
         return None
 
-    all_numbers_from_tables = []
-    for block in power_blocks:
-        # Внутри каждого блока находим абсолютно все числа
-        # Убираем звездочки, заменяем запятые на точки
-        cleaned_block = block.replace(',', '.').replace('*', '')
-        numbers_in_block = re.findall(r'[\d\.]+', cleaned_block)
-        all_numbers_from_tables.extend(numbers_in_block)
+    return _power_rows_from_numbers(iter_table_numbers(text_content))
+
+
+def _power_rows_from_numbers(all_numbers_from_tables):
+    """Шаги 2-3 разбора таблиц Pb: поток чисел -> шапка с диаметрами и строки данных."""
 
-    # --- Шаг 2: Собрать из потока чисел шапку и данные ---
+    # --- Шаг 2: Собрать из потока чисел шапку, затем строки данных ---
+    # Поток не буферизуется: в памяти только шапка, текущая строка и готовые записи
 
     diameters = []
-    data_stream = []
+    row = []
+    final_data = []
     header_collected = False
 
     for num_str in all_numbers_from_tables:
@@ -51,32 +89,16 @@ def parse_power_tables_from_text(text_content):
             if cleaned_num_str.isdigit() and int(cleaned_num_str) >= 100:
                 # Да, это RPM. Сбор шапки окончен.
                 header_collected = True
-                # Это число уже относится к данным, добавляем его в поток данных
-                data_stream.append(num_str)
             else:
                 # Нет, это диаметр. Добавляем в шапку.
                 diameters.append(float(num_str))
-        else:
-            # Шапка уже собрана, все последующие числа - это данные
-            data_stream.append(num_str)
-
-    # --- Шаг 3: Превратить поток данных в структурированную таблицу ---
-
-    if not diameters or not data_stream:
-        print("ОШИБКА: Не удалось собрать шапку с диаметрами или поток данных.")
-        return None
-
-    final_data = []
-    row_width = len(diameters) + 1  # Ширина строки = 1 RPM + кол-во диаметров
-
-    # Нарезаем поток данных на строки правильной ширины
-    # len(data_stream) // row_width - это количество полных строк, которые мы можем составить
-    num_full_rows = len(data_stream) // row_width
-
-    for i in range(num_full_rows):
-        row_start_index = i * row_width
-        row = data_stream[row_start_index: row_start_index + row_width]
+                continue
 
+        # --- Шаг 3: Превратить поток данных в структурированную таблицу ---
+        # Ширина строки = 1 RPM + кол-во диаметров; неполная последняя строка отбрасывается
+        row.append(num_str)
+        if len(row) <= len(diameters):
+            continue
         try:
             # Первое число в строке - это RPM
             rpm = int(row[0].replace('.', ''))
@@ -92,46 +114,400 @@ def parse_power_tables_from_text(text_content):
                 })
         except (ValueError, IndexError):
             # Пропускаем строку, если в ней мусор
-            continue
+            pass
+        row = []
+
+    if not diameters or not header_collected:
+        print("ОШИБКА: Не удалось собрать шапку с диаметрами или поток данных.")
+        return None
 
     return final_data
 
 
-def main():
-    print(f"===== Запуск парсера PDF (Версия 12, Финальная) =====")
-    if not os.path.exists(PDF_PATH):
-        print(f"ОШИБКА: Файл '{PDF_PATH}' не найден.")
-        return
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-    # --- Читаем ТОЛЬКО страницы с таблицами мощности Pb ---
-    PROFILE_MAP = {'C': [37, 39]}
-
-    for profile, pages_indices in PROFILE_MAP.items():
-        print(f"\n--- Обработка профиля: {profile} ---")
-        text_content = ""
-        with fitz.open(PDF_PATH) as doc:
-            for page_num in pages_indices:
-                if page_num < len(doc):
-                    print(f"Читаю страницу {page_num + 1}...")
-                    page = doc[page_num]
-                    text_content += page.get_text("text") + "\n"
-
-        full_data = parse_power_tables_from_text(text_content)
+def _parse_additional_block(block):
+    """
+    Таблица Pd из текста после 'Pd (kW)': шапка - диапазоны передаточного числа
+    ("1,00-1,01", "1,02÷1,05", ..., "≥2,00"), затем строки "RPM, Pd, Pd, ...".
+    Возвращает список записей {'i_min', 'i_max', 'n1', 'Pd'}.
+    """
+    ranges, data_stream = [], []
+    for token in ADDITIONAL_TOKEN_RE.finditer(block.replace(',', '.').replace('*', '')):
+        if data_stream:
+            if token.group('number'):
+                data_stream.append(token.group('number'))
+        elif token.group('low'):
+            ranges.append((float(token.group('low')), float(token.group('high'))))
+        elif token.group('open'):
+            ranges.append((float(token.group('open')), math.inf))
+        elif RPM_RE.fullmatch(token.group('number')) and int(token.group('number').replace('.', '')) >= 100:
+            # Данные начинаются с первого RPM: целое число от 100 ("100", "1.000")
+            data_stream.append(token.group('number'))
+        elif ranges and '.' in token.group('number'):
+            # Открытый диапазон, у которого знак "≥" потерялся при извлечении текста
+            ranges.append((float(token.group('number')), math.inf))
+
+    rows = []
+    row_width = len(ranges) + 1
+    if not ranges:
+        return rows
+    for start in range(0, len(data_stream) - row_width + 1, row_width):
+        row = data_stream[start:start + row_width]
+        try:
+            rpm = int(row[0].replace('.', ''))
+            values = [float(p) for p in row[1:]]
+        except ValueError:
+            continue
+        for (i_min, i_max), value in zip(ranges, values):
+            rows.append({'i_min': i_min, 'i_max': i_max, 'n1': rpm, 'Pd': value})
+    return rows
+
+
+def parse_catalog_tables_from_text(text_content):
+    """
+    Таблицы Pb и Pd за один проход по тексту: каждое совпадение TABLE_PAIR_RE дает
+    блок Pb (между 'RPM / Ø' и 'Pd (kW)') и следующий за ним блок Pd (до следующей
+    таблицы). Строки Pb совпадают с parse_power_tables_from_text.
+    Возвращает (строки Pb или None, строки Pd - возможно, пустой список).
+    """
+    pd_rows = []
+
+    def pb_numbers():
+        # Поток чисел Pb, как в iter_table_numbers; строки Pd собираются попутно
+        for match in TABLE_PAIR_RE.finditer(text_content):
+            pd_rows.extend(_parse_additional_block(match.group(2)))
+            cleaned_block = match.group(1).replace(',', '.').replace('*', '')
+            for number in NUMBER_RE.finditer(cleaned_block):
+                yield number.group()
+
+    if not TABLE_PAIR_RE.search(text_content):
+        print("ОШИБКА: Не удалось найти блоки таблиц с мощностью (между 'RPM / Ø' и 'Pd (kW)').")
+        return None, pd_rows
+    pb_rows = _power_rows_from_numbers(pb_numbers())
+    return pb_rows, pd_rows
+
+
+# Страницы (индексы с нуля) с таблицами мощности Pb для каждого профиля
+DEFAULT_PROFILE_MAP = {'C': [37, 39]}
 
+
+# --- Поиск таблиц по всему каталогу ---
+
+def iter_page_texts(pdf_path, pages=None):
+    """Текст страниц по одной: (индекс страницы, текст). В памяти всегда только одна страница."""
+    with fitz.open(pdf_path) as doc:
+        for page_num in (range(len(doc)) if pages is None else pages):
+            yield page_num, doc[page_num].get_text("text")
+
+
+def index_catalog(pdf_path, profile_re=PROFILE_RE):
+    """
+    Просматривает весь PDF постранично и выдает (индекс страницы, профиль)
+    для страниц, где есть таблица Pb. Профиль берется из подписи на странице
+    (profile_re); если ее нет - от предыдущей страницы с таблицей (продолжение
+    таблицы), а если и ее нет - страница помечается как 'p<номер>'.
+    """
+    profile = None
+    for page_num, text in iter_page_texts(pdf_path):
+        if POWER_TABLE_MARKER not in text:
+            continue
+        match = profile_re.search(text)
+        if match:
+            profile = match.group(1).upper()
+            # Классическое сечение Z в справочниках и data.py называется 'Z(0)'
+            profile = PROFILE_ALIASES.get(profile, profile)
+        yield page_num, profile or f"p{page_num + 1}"
+
+
+def discover_profile_map(pdf_path, profile_re=PROFILE_RE):
+    """Карта "профиль -> страницы" по всему каталогу (см. index_catalog)."""
+    profile_map = {}
+    for page_num, profile in index_catalog(pdf_path, profile_re):
+        profile_map.setdefault(profile, []).append(page_num)
+    return profile_map
+
+
+def load_profile_map(path):
+    """
+    Читает карту "профиль -> страницы" из JSON-файла, например:
+        {"A": [30, 31], "B": [33, 34], "C": [37, 39]}
+    Страницы - индексы с нуля, как в DEFAULT_PROFILE_MAP.
+    """
+    with open(path, encoding='utf-8') as f:
+        profile_map = json.load(f)
+    return {str(profile): [int(page) for page in pages] for profile, pages in profile_map.items()}
+
+
+# --- Воркер: у каждого процесса свой дескриптор документа ---
+
+_documents = {}
+_known_pages = set()
+
+
+def _init_worker(known_pages):
+    _known_pages.update(known_pages)
+
+
+def _extract_page_text(pdf_path, profile, page_num):
+    """
+    Хеш и текст одной страницы. Документ открывается один раз на процесс.
+    Если страница с таким хешем уже есть в кэше, текст не извлекается (None).
+    """
+    started = time.perf_counter()
+    digest, text, error = None, "", None
+    try:
+        doc = _documents.get(pdf_path)
+        if doc is None:
+            doc = _documents[pdf_path] = fitz.open(pdf_path)
+        if page_num >= len(doc):
+            raise IndexError(f"страницы {page_num + 1} нет в документе ({len(doc)} стр.)")
+        page = doc[page_num]
+        digest = page_hash(page)
+        text = None if digest in _known_pages else page.get_text("text")
+    except Exception as e:
+        error = str(e)
+    return profile, page_num, digest, text, error, time.perf_counter() - started
+
+
+def parse_catalog(pdf_path=PDF_PATH, profile_map=None, workers=None, cache=None):
+    """
+    Извлекает и разбирает таблицы Pb и Pd всех профилей параллельно
+    (обе таблицы - за один проход по тексту, см. parse_catalog_tables_from_text).
+    Каждая страница читается отдельной задачей в пуле процессов, поэтому общее
+    время определяется самой медленной страницей, а не суммой всех страниц.
+
+    cache - PageCache (см. pdf_cache.py). С ним текст извлекается только из
+    страниц, которых еще нет в кэше, профиль заново разбирается, только если
+    изменилась хотя бы одна его страница, а в сводку добавляется список
+    изменившихся ячеек Pb и Pd по сравнению с предыдущим разбором этим же режимом ('changes').
+
+    Возвращает (словарь {профиль: DataFrame d, n1, Pb},
+                словарь {профиль: DataFrame i_min, i_max, n1, Pd} для профилей с таблицей Pd,
+                сводку по профилям).
+    """
+    profile_map = profile_map or DEFAULT_PROFILE_MAP
+    tasks = [(profile, page_num) for profile, pages in profile_map.items() for page_num in pages]
+    pages_text = {profile: {} for profile in profile_map}
+    pages_hash = {profile: {} for profile in profile_map}
+    summary = {profile: {'pages': len(pages), 'pages_cached': 0, 'reparsed': True, 'rows': 0, 'pd_rows': 0,
+                         'page_seconds': 0.0, 'errors': []}
+               for profile, pages in profile_map.items()}
+
+    known_pages = cache.known_pages() if cache is not None else set()
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks) or 1))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(known_pages,)) as pool:
+        futures = [pool.submit(_extract_page_text, pdf_path, profile, page_num) for profile, page_num in tasks]
+        for future in as_completed(futures):
+            profile, page_num, digest, text, error, seconds = future.result()
+            pages_text[profile][page_num] = text
+            pages_hash[profile][page_num] = digest
+            summary[profile]['page_seconds'] = max(summary[profile]['page_seconds'], seconds)
+            if error:
+                summary[profile]['errors'].append(f"стр. {page_num + 1}: {error}")
+
+    if cache is not None:
+        new_texts = {pages_hash[profile][page_num]: text for profile in profile_map
+                     for page_num, text in pages_text[profile].items() if text is not None and text != ""}
+        cache.put_pages(new_texts)
+        cached = cache.page_texts(digest for profile in profile_map for page_num, digest in
+                                  pages_hash[profile].items() if digest and pages_text[profile][page_num] is None)
+        for profile in profile_map:
+            for page_num, text in pages_text[profile].items():
+                if text is None:
+                    pages_text[profile][page_num] = cached.get(pages_hash[profile][page_num], "")
+                    summary[profile]['pages_cached'] += 1
+
+    tables, additional = {}, {}
+    for profile, pages in profile_map.items():
+        key = None
+        full_data = additional_data = None
+        if cache is not None and not summary[profile]['errors']:
+            key = pages_key([pages_hash[profile][page_num] for page_num in pages])
+            full_data, additional_data = cache.get_rows(key), cache.get_rows(key + ':Pd')
+            if additional_data is None:
+                full_data = None
+            summary[profile]['reparsed'] = full_data is None
+        if full_data is None:
+            # Страницы склеиваются в исходном порядке, как при последовательном чтении
+            text_content = "".join(pages_text[profile][page_num] + "\n" for page_num in pages)
+            full_data, additional_data = (parse_catalog_tables_from_text(text_content) if text_content.strip()
+                                          else (None, []))
         if not full_data:
-            print(f"ОШИБКА: Не удалось извлечь данные для профиля {profile}.")
+            summary[profile]['errors'].append("не удалось извлечь данные")
+            continue
+        tables[profile] = pd.DataFrame(full_data)
+        summary[profile]['rows'] = len(tables[profile])
+        if additional_data:
+            additional[profile] = pd.DataFrame(additional_data, columns=['i_min', 'i_max', 'n1', 'Pd'])
+            summary[profile]['pd_rows'] = len(additional_data)
+        if key is not None:
+            summary[profile]['changes'] = diff_power_rows(
+                cache.latest_rows(profile, 'text'), full_data,
+                cache.latest_rows(profile, 'text', 'Pd'), additional_data)
+            cache.put_rows(key, full_data)
+            cache.put_rows(key + ':Pd', additional_data)
+            cache.set_latest(profile, key, 'text')
+    return tables, additional, summary
+
+
+def _extract_page_cells(pdf_path, profile, page_num):
+    """Хеш и ячейки {(d, n1): Pb} одной страницы, восстановленные по координатам слов."""
+    started = time.perf_counter()
+    digest, cells, error = None, {}, None
+    try:
+        doc = _documents.get(pdf_path)
+        if doc is None:
+            doc = _documents[pdf_path] = fitz.open(pdf_path)
+        if page_num >= len(doc):
+            raise IndexError(f"страницы {page_num + 1} нет в документе ({len(doc)} стр.)")
+        page = doc[page_num]
+        digest, cells = page_hash(page), extract_page_cells(page)
+    except Exception as e:
+        error = str(e)
+    return profile, page_num, digest, cells, error, time.perf_counter() - started
+
+
+def parse_catalog_geometry(pdf_path=PDF_PATH, profile_map=None, workers=None, cache=None):
+    """
+    То же, что parse_catalog, но таблицы восстанавливаются по координатам слов
+    (pdf_geometry.py) сразу в массивы, без текста, эвристики RPM/диаметр и CSV.
+    Извлекаются только таблицы Pb; таблицы Pd пока разбирает текстовый режим.
+
+    Возвращает (словарь {профиль: (оси d, n1, сетка Pb)}, сводку по профилям).
+    """
+    profile_map = profile_map or DEFAULT_PROFILE_MAP
+    tasks = [(profile, page_num) for profile, pages in profile_map.items() for page_num in pages]
+    pages_cells = {profile: {} for profile in profile_map}
+    pages_hash = {profile: {} for profile in profile_map}
+    summary = {profile: {'pages': len(pages), 'pages_cached': 0, 'reparsed': True, 'rows': 0, 'pd_rows': 0,
+                         'page_seconds': 0.0, 'errors': []}
+               for profile, pages in profile_map.items()}
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks) or 1))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_extract_page_cells, pdf_path, profile, page_num) for profile, page_num in tasks]
+        for future in as_completed(futures):
+            profile, page_num, digest, cells, error, seconds = future.result()
+            pages_cells[profile][page_num] = cells
+            pages_hash[profile][page_num] = digest
+            summary[profile]['page_seconds'] = max(summary[profile]['page_seconds'], seconds)
+            if error:
+                summary[profile]['errors'].append(f"стр. {page_num + 1}: {error}")
+
+    grids = {}
+    for profile, pages in profile_map.items():
+        cells = {}
+        for page_num in pages:  # при повторе ячейки берется значение с более ранней страницы
+            for key, value in pages_cells[profile][page_num].items():
+                cells.setdefault(key, value)
+        if not cells:
+            summary[profile]['errors'].append("не удалось извлечь данные")
             continue
+        grids[profile] = cells_to_arrays(cells)
+        summary[profile]['rows'] = len(cells)
+        if cache is not None and not summary[profile]['errors']:
+            rows = [{'d': d, 'n1': n1, 'Pb': value} for (d, n1), value in sorted(cells.items())]
+            key = 'geometry:' + pages_key([pages_hash[profile][page_num] for page_num in pages])
+            summary[profile]['changes'] = diff_power_rows(cache.latest_rows(profile, 'geometry'), rows)
+            cache.put_rows(key, rows)
+            cache.set_latest(profile, key, 'geometry')
+    return grids, summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Извлечение таблиц мощности Pb из PDF-каталога.")
+    parser.add_argument('--pdf', default=PDF_PATH, help="PDF-каталог производителя")
+    parser.add_argument('--profiles', help="JSON-файл с картой 'профиль -> страницы' (индексы с нуля)")
+    parser.add_argument('--workers', type=int, default=None, help="число процессов (по умолчанию - все ядра)")
+    parser.add_argument('--discover', action='store_true',
+                        help="найти страницы с таблицами Pb во всем каталоге (вместо карты страниц)")
+    parser.add_argument('--save-profiles', help="сохранить найденную карту 'профиль -> страницы' в JSON-файл")
+    parser.add_argument('--out-dir', default=OUTPUT_DIR)
+    parser.add_argument('--engine', choices=['text', 'geometry'], default='text',
+                        help="text - разбор текста страниц (таблицы Pb и Pd); geometry - таблицы Pb "
+                             "по координатам слов сразу в каталог (Pd разбирает только text)")
+    parser.add_argument('--no-cache', action='store_true', help="не использовать постраничный кэш")
+    parser.add_argument('--diff-out', help="сохранить отчет об изменившихся ячейках в файл .csv")
+    args = parser.parse_args(argv)
 
-        df = pd.DataFrame(full_data)
-        output_filename = os.path.join(OUTPUT_DIR, f"power_data_{profile}_Pb.csv")
-        df.to_csv(output_filename, index=False)
+    print(f"===== Запуск парсера PDF (Версия 12, Финальная) =====")
+    if not os.path.exists(args.pdf):
+        print(f"ОШИБКА: Файл '{args.pdf}' не найден.")
+        return 1
+    if args.discover:
+        started = time.perf_counter()
+        profile_map = discover_profile_map(args.pdf)
+        print(f"Просмотр каталога: {time.perf_counter() - started:.2f} с")
+        if not profile_map:
+            print("ОШИБКА: Страницы с таблицами мощности Pb не найдены.")
+            return 1
+        for profile, pages in profile_map.items():
+            print(f"Профиль {profile}: страницы {', '.join(str(page + 1) for page in pages)}")
+        if args.save_profiles:
+            with open(args.save_profiles, 'w', encoding='utf-8') as f:
+                json.dump(profile_map, f, ensure_ascii=False, indent=2)
+            print(f"Карта страниц сохранена: {args.save_profiles}")
+    else:
+        profile_map = load_profile_map(args.profiles) if args.profiles else DEFAULT_PROFILE_MAP
+    cache = None if args.no_cache else PageCache()
+
+    started = time.perf_counter()
+    additional = {}
+    if args.engine == 'geometry':
+        tables, summary = parse_catalog_geometry(args.pdf, profile_map, args.workers, cache)
+    else:
+        tables, additional, summary = parse_catalog(args.pdf, profile_map, args.workers, cache)
+    wall = time.perf_counter() - started
 
-        print(f"\nУСПЕШНО: Профиль {profile} обработан. Извлечено {len(df)} строк.")
+    # Все таблицы записываются вместе, после разбора всех профилей
+    os.makedirs(args.out_dir, exist_ok=True)
+    for profile, table in tables.items():
+        if args.engine == 'geometry':
+            output_filename = os.path.join(args.out_dir, f"power_data_{profile}_Pb_geometry.npz")
+            save_arrays(output_filename, *table)
+        else:
+            output_filename = os.path.join(args.out_dir, f"power_data_{profile}_Pb.csv")
+            table.to_csv(output_filename, index=False)
         print(f"Файл сохранен: {output_filename}")
+    for profile, table in additional.items():
+        output_filename = os.path.join(args.out_dir, f"power_data_{profile}_Pd.csv")
+        table.to_csv(output_filename, index=False)
+        print(f"Файл сохранен: {output_filename}")
+    if args.engine == 'geometry' and tables:
+        print(f"Каталог обновлен: {compile_catalog(args.out_dir)}")
+
+    print("\n--- Сводка ---")
+    for profile, info in summary.items():
+        status = "ОШИБКА: " + "; ".join(info['errors']) if info['errors'] else "УСПЕШНО"
+        print(f"Профиль {profile}: страниц {info['pages']} (из кэша {info['pages_cached']}), "
+              f"строк Pb {info['rows']}, Pd {info['pd_rows']}, {'разобран заново' if info['reparsed'] else 'разбор из кэша'}, "
+              f"самая долгая страница {info['page_seconds']:.2f} с - {status}")
+    print(f"Общее время: {wall:.2f} с")
+
+    changes = [dict(profile=profile, **change) for profile, info in summary.items()
+               for change in info.get('changes', [])]
+    if cache is not None:
+        print("\n--- Изменения по сравнению с предыдущим разбором ---")
+        for profile, info in summary.items():
+            if 'changes' in info:
+                for table in ('Pb', 'Pd'):
+                    counts = {kind: sum(c['change'] == kind for c in info['changes'] if c['table'] == table)
+                              for kind in ('added', 'removed', 'changed')}
+                    print(f"Профиль {profile}, {table}: добавлено {counts['added']}, удалено {counts['removed']}, "
+                          f"изменено {counts['changed']} ячеек")
+        for change in changes:
+            if change['change'] == 'changed':
+                cell = (f"d={change['d']:g}" if change['table'] == 'Pb'
+                        else f"i={change['i_min']:g}-{change['i_max']:g}")
+                print(f"  {change['profile']} {change['table']}: {cell}, n1={change['n1']:g}: "
+                      f"{change['old']:g} -> {change['new']:g}")
+        if args.diff_out:
+            columns = ['profile', 'table', 'd', 'i_min', 'i_max', 'n1', 'old', 'new', 'change']
+            pd.DataFrame(changes, columns=columns).to_csv(args.diff_out, index=False)
+            print(f"Отчет об изменениях сохранен: {args.diff_out}")
 
     print("\n===== Парсинг завершен! =====")
+    return 0 if tables and len(tables) == len(summary) else 1
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(main())
@@ -0,0 +1,152 @@
+# power_model.py
+#
+# Аналитическая модель мощности ремня P0(d, n1) в форме стандартного уравнения
+# мощности клинового ремня:
+#
+#   P0 = a·(d·n1) + b·n1 + c·(d·n1)³
+#
+# (d·n1 пропорционально скорости ремня: первый член - передаваемая сила, член с n1 -
+# потери на изгиб на шкиве, кубический - центробежная сила). Коэффициенты
+# подбираются методом наименьших квадратов по всем заполненным ячейкам
+# каталожной таблицы профиля при сборке каталога (catalog.compile_catalog) и
+# хранятся в его манифесте вместе со статистикой ошибки подгонки.
+#
+# В отличие от таблицы модель непрерывна и определена и вне сетки каталога
+# (extrapolated() сообщает, что точка вне области подгонки), а скалярный расчет -
+# несколько арифметических операций без NumPy и без таблицы в памяти.
+# У модели те же power / power_many / slope / additional, что у PowerTable, поэтому ее
+# можно передать в design_drive / design_drives_batch вместо таблицы.
+#
+#   python power_model.py [parsed_data]   - отчет о подгонке всех профилей каталога
+
+import math
+import sys
+
+TERMS = ('d*n1', 'n1', '(d*n1)^3')
+
+# Масштаб при подгонке (чтобы столбцы матрицы были одного порядка); в манифесте
+# коэффициенты хранятся уже в исходных единицах: d - мм, n1 - об/мин, P0 - кВт
+_X_SCALE = 1e6
+_N_SCALE = 1e3
+
+
+class PowerModel:
+    """Модель P0(d, n1) одного профиля: коэффициенты a, b, c и область подгонки."""
+
+    __slots__ = ('a', 'b', 'c', 'd_range', 'n_range', 'stats', 'profile')
+    additional = None  # надбавки Pd у модели нет (совместимость с PowerTable)
+
+    def __init__(self, a, b, c, d_range, n_range, stats=None, profile=None):
+        self.a, self.b, self.c = float(a), float(b), float(c)
+        self.d_range = (float(d_range[0]), float(d_range[1]))
+        self.n_range = (float(n_range[0]), float(n_range[1]))
+        self.stats = stats or {}
+        self.profile = profile
+
+    def power(self, d, n1):
+        """P0(d, n1), кВт. Отрицательные значения (далеко за пределами подгонки) заменяются нулем."""
+        x = d * n1
+        p = x * (self.a + self.c * x * x) + self.b * n1
+        return p if p > 0.0 else 0.0
+
+    def power_many(self, d, n1):
+        import numpy as np
+        d = np.asarray(d, dtype=np.float64)
+        n1 = np.asarray(n1, dtype=np.float64)
+        x = d * n1
+        return np.maximum(x * (self.a + self.c * x * x) + self.b * n1, 0.0)
+
+    def slope(self, d, n1):
+        """Производная ∂P0/∂n1 при фиксированном d (0 там, где power() обнулена)."""
+        x = d * n1
+        if x * (self.a + self.c * x * x) + self.b * n1 <= 0.0:
+            return 0.0
+        return d * (self.a + 3 * self.c * x * x) + self.b
+
+    def extrapolated(self, d, n1):
+        """True, если точка вне прямоугольника, по которому подбирались коэффициенты."""
+        return not (self.d_range[0] <= d <= self.d_range[1] and self.n_range[0] <= n1 <= self.n_range[1])
+
+    def peak_speed(self, d):
+        """
+        Частота n1, при которой P0 для диаметра d максимальна (dP0/dn1 = 0), или None,
+        если максимума нет (c >= 0). Выше нее модель описывает уже спад мощности
+        из-за центробежной силы.
+        """
+        slope = self.a * d + self.b
+        if self.c >= 0 or slope <= 0:
+            return None
+        return math.sqrt(-slope / (3 * self.c * d ** 3))
+
+    def to_dict(self):
+        return {'terms': list(TERMS), 'coefficients': [self.a, self.b, self.c],
+                'd_range': list(self.d_range), 'n_range': list(self.n_range), 'stats': self.stats}
+
+    @classmethod
+    def from_dict(cls, data, profile=None):
+        a, b, c = data['coefficients']
+        return cls(a, b, c, data['d_range'], data['n_range'], data.get('stats'), profile)
+
+    def __repr__(self):
+        return (f"PowerModel({self.profile!r}: P0 = {self.a:.6g}·d·n1 {self.b:+.6g}·n1 {self.c:+.6g}·(d·n1)³, "
+                f"RMSE {self.stats.get('rmse', float('nan')):.3f} кВт)")
+
+
+def fit_power_model(d_axis, n_axis, grid, profile=None):
+    """
+    Подгоняет модель по таблице Pb[d, n1] (NaN - пустые ячейки).
+    Возвращает PowerModel или None, если заполненных ячеек меньше, чем коэффициентов.
+    """
+    import numpy as np
+
+    d_grid, n_grid = np.meshgrid(np.asarray(d_axis, dtype=np.float64), np.asarray(n_axis, dtype=np.float64),
+                                 indexing='ij')
+    filled = ~np.isnan(grid)
+    if filled.sum() < len(TERMS):
+        return None
+    d, n, p = d_grid[filled], n_grid[filled], np.asarray(grid)[filled]
+    x = d * n / _X_SCALE
+    matrix = np.column_stack([x, n / _N_SCALE, x ** 3])
+    scaled, *_ = np.linalg.lstsq(matrix, p, rcond=None)
+    a, b, c = scaled[0] / _X_SCALE, scaled[1] / _N_SCALE, scaled[2] / _X_SCALE ** 3
+
+    residual = matrix @ scaled - p
+    positive = p > 0
+    total = float(((p - p.mean()) ** 2).sum())
+    stats = {
+        'points': int(p.size),
+        'rmse': float(np.sqrt((residual ** 2).mean())),
+        'max_abs_error': float(np.abs(residual).max()),
+        'mean_rel_error': float(np.abs(residual[positive] / p[positive]).mean()) if positive.any() else None,
+        'r2': 1.0 - float((residual ** 2).sum()) / total if total > 0 else None,
+    }
+    return PowerModel(a, b, c, (d.min(), d.max()), (n.min(), n.max()), stats, profile)
+
+
+def main(argv=None):
+    from catalog import load_catalog
+
+    data_dir = (argv if argv is not None else sys.argv[1:])[:1] or ["parsed_data"]
+    catalog = load_catalog(data_dir[0])
+    if catalog is None:
+        print(f"Каталог в {data_dir[0]} недоступен.")
+        return 1
+    for profile in catalog.profiles():
+        model = catalog.power_model(profile)
+        if model is None:
+            print(f"Профиль {profile}: недостаточно данных для подгонки.")
+            continue
+        stats = model.stats
+        print(f"Профиль {profile}: P0 = {model.a:.6e}·d·n1 {model.b:+.6e}·n1 {model.c:+.6e}·(d·n1)³")
+        print(f"  область подгонки: d {model.d_range[0]:g}-{model.d_range[1]:g} мм, "
+              f"n1 {model.n_range[0]:g}-{model.n_range[1]:g} об/мин, ячеек: {stats['points']}")
+        # Средней относительной ошибки нет, если все ячейки нулевые, R² - если они одинаковые
+        relative = f"{stats['mean_rel_error'] * 100:.1f}%" if stats.get('mean_rel_error') is not None else "-"
+        r2 = f"{stats['r2']:.4f}" if stats.get('r2') is not None else "-"
+        print(f"  RMSE {stats['rmse']:.3f} кВт, макс. ошибка {stats['max_abs_error']:.3f} кВт, "
+              f"средняя отн. ошибка {relative}, R² {r2}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
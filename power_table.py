@@ -0,0 +1,528 @@
+# power_table.py
+#
+# Скомпилированная таблица мощностей Pb(d, n1) из каталога производителя.
+# Таблица строится ОДИН раз из "длинного" DataFrame (см. data.load_power_data)
+# и дальше отвечает на запросы без фильтрации DataFrame: поиск интервала
+# выполняется бинарным поиском по отсортированным осям, значения берутся из
+# плотной NumPy-сетки.
+#
+# AdditionalPowerTable - таблица дополнительной мощности Pd(i, n1), которую
+# каталог добавляет к Pb в зависимости от передаточного числа. Вместе они дают
+# мощность одного ремня P = Pb(d, n1) + Pd(i, n1) (см. PowerTable.total_power).
+#
+# SplinePowerTable - та же таблица Pb с гладкой (бикубической) интерполяцией
+# по коэффициентам, заранее посчитанным при сборке каталога.
+
+import bisect
+import math
+import sys
+
+import numpy as np
+
+
+class PowerTable:
+    """
+    Плотная сетка мощностей Pb[d, n1] с отсортированными осями.
+
+    Пустые ячейки каталога (например, для больших шкивов на высоких оборотах)
+    хранятся в сетке как NaN и отмечены в маске `missing`. Если в интерполяции
+    участвует пустая ячейка, результат - NaN (а не подмешанный 0, как в
+    get_power_from_dataframe). Для полной совместимости со старым поведением
+    можно передать strict=False - тогда пропуски считаются нулями.
+
+    Вне диапазона таблицы значения, как и раньше, "прижимаются" к краю.
+    """
+
+    def __init__(self, d_axis, n_axis, grid, profile=None, additional=None):
+        self.d_axis = np.asarray(d_axis, dtype=float)
+        self.n_axis = np.asarray(n_axis, dtype=float)
+        self.grid = np.asarray(grid, dtype=float)
+        self.profile = profile
+        self.additional = additional  # AdditionalPowerTable того же профиля или None
+
+        if self.grid.shape != (len(self.d_axis), len(self.n_axis)):
+            raise ValueError("Размер сетки мощностей не совпадает с размерами осей d и n1.")
+        if len(self.d_axis) == 0 or len(self.n_axis) == 0:
+            raise ValueError("Таблица мощностей пуста.")
+        if np.any(np.diff(self.d_axis) <= 0) or np.any(np.diff(self.n_axis) <= 0):
+            raise ValueError("Оси таблицы мощностей должны строго возрастать.")
+
+        self.missing = np.isnan(self.grid)
+        # Сетка с нулями вместо пропусков - для арифметики (NaN * 0 = NaN)
+        self._filled = np.where(self.missing, 0.0, self.grid)
+
+        # Копии осей и сетки в виде списков Python для быстрого скалярного пути
+        self._d_list = self.d_axis.tolist()
+        self._n_list = self.n_axis.tolist()
+        self._grid_list = self.grid.tolist()
+
+    @classmethod
+    def from_dataframe(cls, df, profile=None):
+        """Строит таблицу из "длинного" DataFrame со столбцами d, n1, Pb."""
+        if df is None or df.empty:
+            raise ValueError("Нет данных для построения таблицы мощностей.")
+        wide = df.pivot_table(index='d', columns='n1', values='Pb', aggfunc='first')
+        wide = wide.sort_index(axis=0).sort_index(axis=1)
+        return cls(wide.index.to_numpy(), wide.columns.to_numpy(), wide.to_numpy(), profile=profile)
+
+    @property
+    def shape(self):
+        return self.grid.shape
+
+    @property
+    def nbytes(self):
+        """Примерный объем памяти таблицы: массивы NumPy и списки для скалярного пути."""
+        arrays = (self.d_axis, self.n_axis, self.grid, self.missing, self._filled)
+        lists = [self._d_list, self._n_list, self._grid_list, *self._grid_list]
+        floats = len(self._d_list) + len(self._n_list) + self.grid.size
+        return (sum(a.nbytes for a in arrays) + sum(sys.getsizeof(v) for v in lists)
+                + floats * sys.getsizeof(0.0)
+                + (self.additional.nbytes if self.additional is not None else 0))
+
+    @property
+    def coverage(self):
+        """Доля заполненных ячеек каталога."""
+        return 1.0 - self.missing.sum() / self.missing.size
+
+    def upper_bound(self):
+        """Оценка сверху для power() по всей таблице (для отсечения заведомо недопустимых вариантов)."""
+        return float(np.max(self._filled))
+
+    # --- Скалярный путь ---
+
+    @staticmethod
+    def _bracket(axis, value):
+        """Возвращает индексы (low, high) узлов вокруг value с прижатием к краям."""
+        if value <= axis[0]:
+            return 0, 0
+        if value >= axis[-1]:
+            last = len(axis) - 1
+            return last, last
+        high = bisect.bisect_left(axis, value)
+        if axis[high] == value:
+            return high, high
+        return high - 1, high
+
+    def power(self, d, n1, strict=True):
+        """Мощность Pb одного ремня для диаметра d (мм) и частоты n1 (об/мин)."""
+        d_axis, n_axis, grid = self._d_list, self._n_list, self._grid_list
+        i_low, i_high = self._bracket(d_axis, d)
+        j_low, j_high = self._bracket(n_axis, n1)
+
+        def cell(i, j):
+            value = grid[i][j]
+            return 0.0 if value != value else value
+
+        q11, q12 = cell(i_low, j_low), cell(i_low, j_high)
+        q21, q22 = cell(i_high, j_low), cell(i_high, j_high)
+        d_low, d_high = d_axis[i_low], d_axis[i_high]
+        n_low, n_high = n_axis[j_low], n_axis[j_high]
+
+        # Формулы и порядок операций повторяют get_power_from_dataframe,
+        # чтобы результаты совпадали до последнего бита.
+        if i_low == i_high and j_low == j_high:
+            p, used = q11, ((i_low, j_low),)
+        elif i_low == i_high:
+            p = q11 + (q12 - q11) * (n1 - n_low) / (n_high - n_low)
+            used = ((i_low, j_low), (i_low, j_high))
+        elif j_low == j_high:
+            p = q11 + (q21 - q11) * (d - d_low) / (d_high - d_low)
+            used = ((i_low, j_low), (i_high, j_low))
+        else:
+            r1 = ((d_high - d) / (d_high - d_low)) * q11 + ((d - d_low) / (d_high - d_low)) * q21
+            r2 = ((d_high - d) / (d_high - d_low)) * q12 + ((d - d_low) / (d_high - d_low)) * q22
+            p = ((n_high - n1) / (n_high - n_low)) * r1 + ((n1 - n_low) / (n_high - n_low)) * r2
+            used = ((i_low, j_low), (i_low, j_high), (i_high, j_low), (i_high, j_high))
+
+        if strict:
+            for i, j in used:
+                if grid[i][j] != grid[i][j]:
+                    return math.nan
+        return float(p)
+
+    @staticmethod
+    def _segment(axis, value):
+        """
+        Отрезок оси для производной справа: (j, доля отрезка t, длина h) или None,
+        если value за пределами таблицы (power() там "прижат" к краю и не меняется).
+        """
+        if len(axis) < 2 or value < axis[0] or value >= axis[-1]:
+            return None
+        j = bisect.bisect_right(axis, value) - 1
+        h = axis[j + 1] - axis[j]
+        return j, (value - axis[j]) / h, h
+
+    def slope(self, d, n1):
+        """
+        Производная ∂Pb/∂n1 интерполяции power() при фиксированном d, кВт на об/мин.
+        На линиях сетки n1 (изломах билинейной поверхности) - производная справа,
+        за краями таблицы - 0. NaN, если нужная ячейка каталога пуста.
+        """
+        d_axis, grid = self._d_list, self._grid_list
+        segment = self._segment(self._n_list, n1)
+        if segment is None:
+            return 0.0
+        j, _, h = segment
+        i_low, i_high = self._bracket(d_axis, d)
+        low = (grid[i_low][j + 1] - grid[i_low][j]) / h
+        if i_low == i_high:
+            return float(low)
+        high = (grid[i_high][j + 1] - grid[i_high][j]) / h
+        u = (d - d_axis[i_low]) / (d_axis[i_high] - d_axis[i_low])
+        return float((1 - u) * low + u * high)
+
+    def is_covered(self, d, n1):
+        """True, если для (d, n1) все нужные ячейки каталога заполнены."""
+        return not math.isnan(self.power(d, n1))
+
+    # --- Векторный путь ---
+
+    @staticmethod
+    def _bracket_many(axis, values):
+        high = np.searchsorted(axis, values, side='left')
+        high = np.clip(high, 0, len(axis) - 1)
+        exact = axis[high] == values
+        low = np.where(exact, high, np.maximum(high - 1, 0))
+        below = values <= axis[0]
+        above = values >= axis[-1]
+        low = np.where(below, 0, np.where(above, len(axis) - 1, low))
+        high = np.where(below, 0, np.where(above, len(axis) - 1, high))
+        return low, high
+
+    def power_many(self, d_array, n1_array, strict=True):
+        """Векторный вариант power(): принимает массивы (или скаляры) одинаковой формы."""
+        d, n = np.broadcast_arrays(np.asarray(d_array, dtype=float), np.asarray(n1_array, dtype=float))
+        i_low, i_high = self._bracket_many(self.d_axis, d)
+        j_low, j_high = self._bracket_many(self.n_axis, n)
+
+        g = self._filled
+        q11, q12 = g[i_low, j_low], g[i_low, j_high]
+        q21, q22 = g[i_high, j_low], g[i_high, j_high]
+        d_low, d_high = self.d_axis[i_low], self.d_axis[i_high]
+        n_low, n_high = self.n_axis[j_low], self.n_axis[j_high]
+
+        same_d = i_low == i_high
+        same_n = j_low == j_high
+        with np.errstate(divide='ignore', invalid='ignore'):
+            along_n = q11 + (q12 - q11) * (n - n_low) / (n_high - n_low)
+            along_d = q11 + (q21 - q11) * (d - d_low) / (d_high - d_low)
+            r1 = ((d_high - d) / (d_high - d_low)) * q11 + ((d - d_low) / (d_high - d_low)) * q21
+            r2 = ((d_high - d) / (d_high - d_low)) * q12 + ((d - d_low) / (d_high - d_low)) * q22
+            full = ((n_high - n) / (n_high - n_low)) * r1 + ((n - n_low) / (n_high - n_low)) * r2
+
+        p = np.where(same_d & same_n, q11,
+                     np.where(same_d, along_n,
+                              np.where(same_n, along_d, full)))
+
+        if not strict:
+            return p
+        m = self.missing
+        hole = m[i_low, j_low] | m[i_low, j_high] | m[i_high, j_low] | m[i_high, j_high]
+        return np.where(hole, np.nan, p)
+
+    # --- Pb + Pd ---
+
+    def total_power(self, d, n1, i, strict=True):
+        """Мощность одного ремня с учетом передаточного числа: Pb(d, n1) + Pd(i, n1)."""
+        p = self.power(d, n1, strict)
+        if self.additional is None:
+            return p
+        return p + self.additional.power(i, n1)
+
+    def total_power_many(self, d_array, n1_array, i_array, strict=True):
+        """Векторный вариант total_power()."""
+        p = self.power_many(d_array, n1_array, strict)
+        if self.additional is None:
+            return p
+        return p + self.additional.power_many(i_array, n1_array)
+
+
+class AdditionalPowerTable:
+    """
+    Дополнительная мощность Pd[i, n1]: строки - диапазоны передаточного числа
+    (i_axis - их нижние границы по возрастанию), столбцы - частоты n1.
+
+    Диапазон выбирается ступенчато (без интерполяции по i), по n1 значения
+    интерполируются линейно и "прижимаются" к краям таблицы. Передаточное
+    число меньше 1 (повышающая передача) рассматривается как 1/i.
+    Если i ниже первого диапазона или нужная ячейка каталога пуста,
+    надбавка не начисляется (0).
+    """
+
+    def __init__(self, i_axis, n_axis, grid, profile=None):
+        self.i_axis = np.asarray(i_axis, dtype=float)
+        self.n_axis = np.asarray(n_axis, dtype=float)
+        self.grid = np.asarray(grid, dtype=float)
+        self.profile = profile
+
+        if self.grid.shape != (len(self.i_axis), len(self.n_axis)):
+            raise ValueError("Размер сетки Pd не совпадает с размерами осей i и n1.")
+        if len(self.i_axis) == 0 or len(self.n_axis) == 0:
+            raise ValueError("Таблица Pd пуста.")
+        if np.any(np.diff(self.i_axis) <= 0) or np.any(np.diff(self.n_axis) <= 0):
+            raise ValueError("Оси таблицы Pd должны строго возрастать.")
+
+        # Пустая ячейка - надбавки нет
+        self._filled = np.where(np.isnan(self.grid), 0.0, self.grid)
+        self._i_list = self.i_axis.tolist()
+        self._n_list = self.n_axis.tolist()
+        self._grid_list = self._filled.tolist()
+
+    @property
+    def nbytes(self):
+        arrays = (self.i_axis, self.n_axis, self.grid, self._filled)
+        return sum(a.nbytes for a in arrays) + self.grid.size * sys.getsizeof(0.0)
+
+    def power(self, i, n1):
+        """Надбавка Pd для передаточного числа i и частоты n1 (об/мин)."""
+        i = 1.0 / i if 0 < i < 1 else i
+        row = bisect.bisect_right(self._i_list, i) - 1
+        if row < 0:
+            return 0.0
+        values, n_axis = self._grid_list[row], self._n_list
+        j_low, j_high = PowerTable._bracket(n_axis, n1)
+        if j_low == j_high:
+            return values[j_low]
+        n_low, n_high = n_axis[j_low], n_axis[j_high]
+        return values[j_low] + (values[j_high] - values[j_low]) * (n1 - n_low) / (n_high - n_low)
+
+    def slope(self, i, n1):
+        """Производная ∂Pd/∂n1 при фиксированном i (справа на узлах, 0 за краями таблицы)."""
+        i = 1.0 / i if 0 < i < 1 else i
+        row = bisect.bisect_right(self._i_list, i) - 1
+        segment = PowerTable._segment(self._n_list, n1)
+        if row < 0 or segment is None:
+            return 0.0
+        j, _, h = segment
+        values = self._grid_list[row]
+        return (values[j + 1] - values[j]) / h
+
+    def power_many(self, i_array, n1_array):
+        """Векторный вариант power()."""
+        i, n = np.broadcast_arrays(np.asarray(i_array, dtype=float), np.asarray(n1_array, dtype=float))
+        with np.errstate(divide='ignore'):
+            i = np.where((i > 0) & (i < 1), 1.0 / i, i)
+        row = np.searchsorted(self.i_axis, i, side='right') - 1
+        j_low, j_high = PowerTable._bracket_many(self.n_axis, n)
+        safe_row = np.maximum(row, 0)
+        low, high = self._filled[safe_row, j_low], self._filled[safe_row, j_high]
+        n_low, n_high = self.n_axis[j_low], self.n_axis[j_high]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            p = np.where(j_low == j_high, low, low + (high - low) * (n - n_low) / (n_high - n_low))
+        return np.where(row < 0, 0.0, p)
+
+    def max_power(self, n1):
+        """Наибольшая надбавка при частоте n1 по всем диапазонам i (для оценок сверху)."""
+        return float(np.max(self.power_many(self.i_axis, np.full(len(self.i_axis), float(n1)))))
+
+    def upper_bound(self):
+        """Наибольшая надбавка по всей таблице."""
+        return float(np.max(self._filled))
+
+
+# --- Бикубическая интерполяция ---
+# Вместо билинейной интерполяции (с изломами на линиях сетки) поверхность Pb(d, n1)
+# составляется из бикубических эрмитовых кусков. Производные в узлах - монотонные
+# (PCHIP, как scipy.interpolate.PchipInterpolator): вдоль каждой линии сетки
+# кривая не дает ложных экстремумов между узлами каталога. Коэффициенты всех
+# ячеек считаются один раз (catalog.compile_catalog хранит их в каталоге),
+# а запрос - это поиск ячейки и вычисление многочлена по схеме Горнера.
+
+# Переход от [f0, f1, h·f'0, h·f'1] к коэффициентам многочлена c0 + c1·t + c2·t² + c3·t³ на [0, 1]
+_HERMITE = np.array([[1.0, 0.0, 0.0, 0.0],
+                     [0.0, 0.0, 1.0, 0.0],
+                     [-3.0, 3.0, -2.0, -1.0],
+                     [2.0, -2.0, 1.0, 1.0]])
+
+
+def _pchip_edge(h0, h1, delta0, delta1):
+    slope = ((2 * h0 + h1) * delta0 - h0 * delta1) / (h0 + h1)
+    if np.sign(slope) != np.sign(delta0):
+        return 0.0
+    if np.sign(delta0) != np.sign(delta1) and abs(slope) > 3 * abs(delta0):
+        return 3 * delta0
+    return slope
+
+
+def pchip_slopes(x, y):
+    """
+    Монотонные производные dy/dx в узлах (Fritsch-Carlson, как в scipy PCHIP).
+    NaN в y разбивают ряд на независимые участки; в NaN-узлах производная - NaN.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    slopes = np.full(len(y), np.nan)
+    finite = ~np.isnan(y)
+    start = 0
+    while start < len(y):
+        if not finite[start]:
+            start += 1
+            continue
+        stop = start
+        while stop < len(y) and finite[stop]:
+            stop += 1
+        xs, ys = x[start:stop], y[start:stop]
+        if len(xs) == 1:
+            slopes[start] = 0.0
+        elif len(xs) == 2:
+            slopes[start:stop] = (ys[1] - ys[0]) / (xs[1] - xs[0])
+        else:
+            h = np.diff(xs)
+            delta = np.diff(ys) / h
+            inner = np.zeros(len(xs) - 2)
+            w1, w2 = 2 * h[1:] + h[:-1], h[1:] + 2 * h[:-1]
+            same_sign = delta[:-1] * delta[1:] > 0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                harmonic = (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:])
+            inner[same_sign] = harmonic[same_sign]
+            slopes[start + 1:stop - 1] = inner
+            slopes[start] = _pchip_edge(h[0], h[1], delta[0], delta[1])
+            slopes[stop - 1] = _pchip_edge(h[-1], h[-2], delta[-1], delta[-2])
+        start = stop
+    return slopes
+
+
+def spline_coefficients(d_axis, n_axis, grid):
+    """
+    Коэффициенты бикубической поверхности по сетке Pb[d, n1] (NaN - пустые ячейки):
+      cells[i, j, a, b]  - ячейка [d_i, d_i+1] x [n_j, n_j+1]: Pb = sum C[a, b]·u^a·v^b,
+                           u, v - доли ячейки по d и по n1;
+      d_lines[i, j, a]   - кривая вдоль n1 на линии d = d_i (запросы ровно по стандартному d);
+      n_lines[i, j, a]   - кривая вдоль d на линии n1 = n_j.
+    Если в ячейке (на отрезке линии) есть пустой узел каталога, ее коэффициенты - NaN.
+    """
+    d_axis = np.asarray(d_axis, dtype=float)
+    n_axis = np.asarray(n_axis, dtype=float)
+    f = np.asarray(grid, dtype=float)
+    fd = np.column_stack([pchip_slopes(d_axis, f[:, j]) for j in range(f.shape[1])])
+    fn = np.vstack([pchip_slopes(n_axis, f[i, :]) for i in range(f.shape[0])])
+    fdn = np.vstack([pchip_slopes(n_axis, fd[i, :]) for i in range(f.shape[0])])
+    hd = np.diff(d_axis)[:, None]
+    hn = np.diff(n_axis)[None, :]
+
+    F = np.empty((len(d_axis) - 1, len(n_axis) - 1, 4, 4))
+    for a, rows in enumerate((slice(None, -1), slice(1, None))):
+        for b, cols in enumerate((slice(None, -1), slice(1, None))):
+            F[..., a, b] = f[rows, cols]
+            F[..., a, b + 2] = fn[rows, cols] * hn
+            F[..., a + 2, b] = fd[rows, cols] * hd
+            F[..., a + 2, b + 2] = fdn[rows, cols] * hd * hn
+    cells = np.einsum('ab,ijbc,dc->ijad', _HERMITE, F, _HERMITE)
+
+    d_lines = np.einsum('ab,ijb->ija', _HERMITE, np.stack(
+        [f[:, :-1], f[:, 1:], fn[:, :-1] * hn, fn[:, 1:] * hn], axis=-1))
+    n_lines = np.einsum('ab,ijb->ija', _HERMITE, np.stack(
+        [f[:-1, :], f[1:, :], fd[:-1, :] * hd, fd[1:, :] * hd], axis=-1))
+    return cells, d_lines, n_lines
+
+
+class SplinePowerTable(PowerTable):
+    """
+    PowerTable с бикубической (монотонной по линиям сетки) интерполяцией вместо билинейной.
+    В узлах каталога значения совпадают с таблицей, покрытие то же: если нужный
+    кусок поверхности опирается на пустую ячейку каталога, результат - NaN
+    (при strict=False - 0). Вне диапазона таблицы запрос "прижимается" к краю.
+
+    coefficients - (cells, d_lines, n_lines) из spline_coefficients(); если не заданы,
+    считаются при создании (каталог хранит их готовыми).
+    """
+
+    def __init__(self, d_axis, n_axis, grid, profile=None, additional=None, coefficients=None):
+        super().__init__(d_axis, n_axis, grid, profile, additional)
+        if coefficients is None:
+            coefficients = spline_coefficients(self.d_axis, self.n_axis, self.grid)
+        self.cells, self.d_lines, self.n_lines = (np.asarray(c, dtype=float) for c in coefficients)
+        self._cells_list = self.cells.tolist()
+        self._d_lines_list = self.d_lines.tolist()
+        self._n_lines_list = self.n_lines.tolist()
+
+    @property
+    def nbytes(self):
+        coefficients = self.cells.size + self.d_lines.size + self.n_lines.size
+        return super().nbytes + coefficients * (8 + sys.getsizeof(0.0))
+
+    def upper_bound(self):
+        # Внутри куска u^a·v^b лежит в [0, 1], поэтому сумма положительных коэффициентов - оценка сверху
+        bounds = [super().upper_bound()]
+        for coefficients, axes in ((self.cells, (-2, -1)), (self.d_lines, -1), (self.n_lines, -1)):
+            if coefficients.size:
+                bounds.append(float(np.nanmax(np.maximum(coefficients, 0.0).sum(axis=axes), initial=0.0)))
+        return max(bounds)
+
+    def power(self, d, n1, strict=True):
+        d_axis, n_axis = self._d_list, self._n_list
+        d = min(max(d, d_axis[0]), d_axis[-1])
+        n1 = min(max(n1, n_axis[0]), n_axis[-1])
+        i = bisect.bisect_right(d_axis, d) - 1
+        j = bisect.bisect_right(n_axis, n1) - 1
+        on_d, on_n = d_axis[i] == d, n_axis[j] == n1
+
+        if on_d and on_n:
+            p = self._grid_list[i][j]
+        elif on_d:
+            c = self._d_lines_list[i][j]
+            v = (n1 - n_axis[j]) / (n_axis[j + 1] - n_axis[j])
+            p = c[0] + v * (c[1] + v * (c[2] + v * c[3]))
+        elif on_n:
+            c = self._n_lines_list[i][j]
+            u = (d - d_axis[i]) / (d_axis[i + 1] - d_axis[i])
+            p = c[0] + u * (c[1] + u * (c[2] + u * c[3]))
+        else:
+            u = (d - d_axis[i]) / (d_axis[i + 1] - d_axis[i])
+            v = (n1 - n_axis[j]) / (n_axis[j + 1] - n_axis[j])
+            rows = [c[0] + v * (c[1] + v * (c[2] + v * c[3])) for c in self._cells_list[i][j]]
+            p = rows[0] + u * (rows[1] + u * (rows[2] + u * rows[3]))
+        if p != p:
+            return math.nan if strict else 0.0
+        return float(p)
+
+    def slope(self, d, n1):
+        d_axis = self._d_list
+        segment = self._segment(self._n_list, n1)
+        if segment is None:
+            return 0.0
+        j, v, h = segment
+        d = min(max(d, d_axis[0]), d_axis[-1])
+        i = bisect.bisect_right(d_axis, d) - 1
+        if d_axis[i] == d:
+            c = self._d_lines_list[i][j]
+            return (c[1] + v * (2 * c[2] + v * 3 * c[3])) / h
+        u = (d - d_axis[i]) / (d_axis[i + 1] - d_axis[i])
+        rows = [c[1] + v * (2 * c[2] + v * 3 * c[3]) for c in self._cells_list[i][j]]
+        return (rows[0] + u * (rows[1] + u * (rows[2] + u * rows[3]))) / h
+
+    def power_many(self, d_array, n1_array, strict=True):
+        d, n = np.broadcast_arrays(np.asarray(d_array, dtype=float), np.asarray(n1_array, dtype=float))
+        d = np.clip(d, self.d_axis[0], self.d_axis[-1])
+        n = np.clip(n, self.n_axis[0], self.n_axis[-1])
+        i = np.searchsorted(self.d_axis, d, side='right') - 1
+        j = np.searchsorted(self.n_axis, n, side='right') - 1
+        on_d, on_n = self.d_axis[i] == d, self.n_axis[j] == n
+        p = np.full(d.shape, np.nan)
+
+        node = on_d & on_n
+        p[node] = self.grid[i[node], j[node]]
+
+        rows = on_d & ~on_n
+        if rows.any():
+            ii, jj = i[rows], j[rows]
+            v = (n[rows] - self.n_axis[jj]) / (self.n_axis[jj + 1] - self.n_axis[jj])
+            c = self.d_lines[ii, jj]
+            p[rows] = c[:, 0] + v * (c[:, 1] + v * (c[:, 2] + v * c[:, 3]))
+
+        rows = on_n & ~on_d
+        if rows.any():
+            ii, jj = i[rows], j[rows]
+            u = (d[rows] - self.d_axis[ii]) / (self.d_axis[ii + 1] - self.d_axis[ii])
+            c = self.n_lines[ii, jj]
+            p[rows] = c[:, 0] + u * (c[:, 1] + u * (c[:, 2] + u * c[:, 3]))
+
+        rows = ~on_d & ~on_n
+        if rows.any():
+            ii, jj = i[rows], j[rows]
+            u = ((d[rows] - self.d_axis[ii]) / (self.d_axis[ii + 1] - self.d_axis[ii]))[:, None]
+            v = ((n[rows] - self.n_axis[jj]) / (self.n_axis[jj + 1] - self.n_axis[jj]))[:, None]
+            c = self.cells[ii, jj]
+            by_v = c[..., 0] + v * (c[..., 1] + v * (c[..., 2] + v * c[..., 3]))
+            p[rows] = by_v[:, 0] + u[:, 0] * (by_v[:, 1] + u[:, 0] * (by_v[:, 2] + u[:, 0] * by_v[:, 3]))
+        return p if strict else np.where(np.isnan(p), 0.0, p)
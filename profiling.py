@@ -0,0 +1,233 @@
+# profiling.py
+#
+# Поэтапные замеры времени расчета передачи.
+# Пока замер не включен (нет активного StageRecorder в текущем потоке),
+# lap_timer() возвращает общий пустой объект, и вызовы .lap() в расчетных
+# функциях ничего не делают - накладные расходы сводятся к вызову пустого метода.
+#
+#   with recording() as recorder:
+#       design_drive(...)
+#   print_breakdown(recorder)
+#
+# Только стандартная библиотека: модуль используется в скалярном пути calculations.py.
+
+import contextlib
+import json
+import math
+import os
+import threading
+import time
+
+
+class _State(threading.local):
+    # Атрибут класса - значение по умолчанию для каждого потока (без исключения в getattr)
+    recorder = None
+
+
+_state = _State()
+
+
+class StageRecorder:
+    """Список замеров (этап, секунды) одного или нескольких расчетов."""
+
+    def __init__(self):
+        self.spans = []
+
+    def add(self, name, seconds):
+        self.spans.append((name, seconds))
+
+    def summary(self, start=0):
+        """{этап: {'calls', 'seconds'}} в порядке первого появления этапа (по замерам начиная с start)."""
+        result = {}
+        for name, seconds in self.spans[start:]:
+            stage = result.setdefault(name, {'calls': 0, 'seconds': 0.0})
+            stage['calls'] += 1
+            stage['seconds'] += seconds
+        return result
+
+    def total(self):
+        return sum(seconds for _, seconds in self.spans)
+
+
+class LapTimer:
+    """Замер последовательных этапов: lap(name) записывает время с предыдущей отметки."""
+    __slots__ = ('recorder', 'last')
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self.last = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.recorder.add(name, now - self.last)
+        self.last = now
+
+
+class _NullLapTimer:
+    __slots__ = ()
+
+    def lap(self, name):
+        pass
+
+
+NULL_LAP_TIMER = _NullLapTimer()
+
+
+def current_recorder():
+    """Активный StageRecorder текущего потока или None."""
+    return _state.recorder
+
+
+def lap_timer():
+    recorder = _state.recorder
+    return NULL_LAP_TIMER if recorder is None else LapTimer(recorder)
+
+
+@contextlib.contextmanager
+def span(name):
+    """Замер блока кода как одного этапа (если замер включен)."""
+    recorder = _state.recorder
+    if recorder is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add(name, time.perf_counter() - started)
+
+
+@contextlib.contextmanager
+def recording(recorder=None):
+    """Включает замер в текущем потоке. Возвращает StageRecorder с результатами."""
+    recorder = recorder if recorder is not None else StageRecorder()
+    previous = _state.recorder
+    _state.recorder = recorder
+    try:
+        yield recorder
+    finally:
+        _state.recorder = previous
+
+
+class StageHistogram:
+    """
+    Распределение времени этапов по многим расчетам (например, по порциям
+    пакетного режима). Интервалы логарифмические: BUCKETS_PER_DECADE на порядок,
+    от 1 мкс; все, что быстрее, попадает в первый интервал.
+    """
+    BUCKETS_PER_DECADE = 4
+    MIN_SECONDS = 1e-6
+
+    def __init__(self):
+        self.stages = {}
+
+    def _bucket(self, seconds):
+        if seconds <= self.MIN_SECONDS:
+            return 0
+        return int(math.log10(seconds / self.MIN_SECONDS) * self.BUCKETS_PER_DECADE) + 1
+
+    def bucket_bounds(self, bucket):
+        """Границы интервала (от, до] в секундах."""
+        if bucket == 0:
+            return 0.0, self.MIN_SECONDS
+        return (self.MIN_SECONDS * 10 ** ((bucket - 1) / self.BUCKETS_PER_DECADE),
+                self.MIN_SECONDS * 10 ** (bucket / self.BUCKETS_PER_DECADE))
+
+    def add(self, name, seconds):
+        stage = self.stages.setdefault(name, {'count': 0, 'total': 0.0, 'min': seconds, 'max': seconds,
+                                              'buckets': {}})
+        stage['count'] += 1
+        stage['total'] += seconds
+        stage['min'] = min(stage['min'], seconds)
+        stage['max'] = max(stage['max'], seconds)
+        bucket = self._bucket(seconds)
+        stage['buckets'][bucket] = stage['buckets'].get(bucket, 0) + 1
+
+    def add_recorder(self, recorder):
+        for name, seconds in recorder.spans:
+            self.add(name, seconds)
+
+    def merge(self, other):
+        for name, theirs in other.stages.items():
+            stage = self.stages.get(name)
+            if stage is None:
+                self.stages[name] = {**theirs, 'buckets': dict(theirs['buckets'])}
+                continue
+            stage['count'] += theirs['count']
+            stage['total'] += theirs['total']
+            stage['min'] = min(stage['min'], theirs['min'])
+            stage['max'] = max(stage['max'], theirs['max'])
+            for bucket, count in theirs['buckets'].items():
+                stage['buckets'][bucket] = stage['buckets'].get(bucket, 0) + count
+
+    def to_dict(self):
+        stages = {}
+        for name, stage in self.stages.items():
+            buckets = [{'bucket': bucket, 'from': low, 'to': high, 'count': stage['buckets'][bucket]}
+                       for bucket in sorted(stage['buckets'])
+                       for low, high in [self.bucket_bounds(bucket)]]
+            stages[name] = {'count': stage['count'], 'total_seconds': stage['total'],
+                            'mean_seconds': stage['total'] / stage['count'],
+                            'min_seconds': stage['min'], 'max_seconds': stage['max'], 'buckets': buckets}
+        return {'buckets_per_decade': self.BUCKETS_PER_DECADE, 'stages': stages}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        for name, stage in data.get('stages', {}).items():
+            buckets = {item['bucket']: item['count'] for item in stage['buckets']}
+            histogram.stages[name] = {'count': stage['count'], 'total': stage['total_seconds'],
+                                      'min': stage['min_seconds'], 'max': stage['max_seconds'], 'buckets': buckets}
+        return histogram
+
+    def save_json(self, path, accumulate=True):
+        """
+        Сохраняет гистограммы в JSON. При accumulate=True и существующем файле
+        гистограммы прошлых запусков складываются с текущими.
+        """
+        histogram = self
+        if accumulate and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                histogram = StageHistogram.from_dict(json.load(f))
+            histogram.merge(self)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(histogram.to_dict(), f, ensure_ascii=False, indent=2)
+        return histogram
+
+
+def format_breakdown(summary):
+    """Таблица этапов из StageRecorder.summary() (или совместимого словаря) в виде строк."""
+    total = sum(stage['seconds'] for stage in summary.values())
+    lines = [f"{'этап':<22} {'вызовов':>8} {'время, мс':>11} {'доля':>7}"]
+    for name, stage in summary.items():
+        share = stage['seconds'] / total * 100 if total > 0 else 0.0
+        lines.append(f"{name:<22} {stage['calls']:>8} {stage['seconds'] * 1000:>11.3f} {share:>6.1f}%")
+    lines.append(f"{'всего':<22} {'':>8} {total * 1000:>11.3f}")
+    return lines
+
+
+def print_breakdown(recorder):
+    print("\n--- Время по этапам расчета ---")
+    for line in format_breakdown(recorder.summary()):
+        print(line)
+
+
+def profile_call(func, *args, dump_path=None, top=20, **kwargs):
+    """
+    Вызывает func под cProfile. Печатает top самых затратных функций;
+    при dump_path сохраняет статистику (открывается pstats / snakeviz).
+    """
+    import cProfile
+    import io
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        if dump_path:
+            profiler.dump_stats(dump_path)
+            print(f"Профиль cProfile сохранен: {dump_path}")
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(top)
+        print(stream.getvalue())
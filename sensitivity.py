@@ -0,0 +1,420 @@
+# sensitivity.py
+#
+# Чувствительность результатов расчета передачи к исходным данным.
+# Вместо многократного пересчета design_drive с "шевелением" каждого входа
+# (конечные разности) цепочка расчета один раз проходится в прямом режиме
+# автоматического дифференцирования: каждая величина несет вместе со значением
+# вектор производных по P, n1, n2 и a_прим (класс Dual). Непрерывные шаги -
+# calculate_belt_length, центровое расстояние, угол обхвата, скорость ремня,
+# интерполяция P0 по таблице и calculate_number_of_belts - дают точные
+# производные; ступенчатые (округление d2 и Lp до стандартных, Cz, Cα, выбор
+# сечения, z = ceil) локально постоянны. Для каждой ступени отчет показывает,
+# насколько далеко до ее скачка и какое изменение каждого входа к нему приведет
+# (по линейному прогнозу).
+#
+# Два прохода:
+#   'jacobian' - производные фактического расчета (округленные d2 и Lp постоянны,
+#                поэтому a_ут и α1 от входов локально не зависят);
+#   'trend'    - тот же расчет без округлений d2 и Lp (d2 = d2_расч, Lp = L_расч):
+#                как результаты меняются "в среднем", через скачки стандартных рядов.
+#
+#   python sensitivity.py --P 11 --n1 1450 --n2 500 --a 800 --load-type 2
+
+import argparse
+import functools
+import math
+
+from calculations import (
+    calculate_belt_length, calculate_belt_speed, calculate_design_power, calculate_number_of_belts,
+    calculate_transmission_ratio, determine_belt_section, find_nearest_standard_value, get_actual_transmission_ratio,
+    get_calpha_value, get_cl_value, get_cz_value, get_min_pulley_diameter, get_p0_value,
+)
+from data import STANDARD_BELT_LENGTHS, STANDARD_PULLEY_DIAMETERS, calpha_index, cz_index, index_for, p0_index
+
+# Входы, по которым считаются производные: (ключ, обозначение)
+INPUTS = (
+    ('power', "P"),
+    ('n1', "n1"),
+    ('n2', "n2"),
+    ('approx_center_distance', "a_прим"),
+)
+# Непрерывные величины расчета (ключи design_drive): (ключ, описание)
+OUTPUTS = (
+    ('i', "передаточное число i"),
+    ('P_design', "расчетная мощность, кВт"),
+    ('d2_calc', "расчетный диаметр d2, мм"),
+    ('L_calc', "расчетная длина ремня, мм"),
+    ('a_actual', "межосевое расстояние a_ут, мм"),
+    ('alpha1', "угол обхвата α1, град"),
+    ('V', "скорость ремня, м/с"),
+    ('P0', "мощность одного ремня P0, кВт"),
+    ('z_initial', "z без учета Cz"),
+    ('z_calc', "расчетное количество ремней"),
+)
+# Границы сечений по расчетной мощности (determine_belt_section: P_design <= граница)
+SECTION_POWER_LIMITS = (0.75, 7.5, 30.0, 75.0)
+# Ступень считается близкой, если до скачка меньше этой доли от величины или от входа
+NEAR_JUMP = 0.02
+
+
+class Dual:
+    """Значение и вектор производных по входам INPUTS (прямой режим дифференцирования)."""
+
+    __slots__ = ('value', 'grad')
+
+    def __init__(self, value, grad):
+        self.value = value
+        self.grad = grad
+
+    @classmethod
+    def variable(cls, value, k):
+        return cls(float(value), tuple([1.0 if m == k else 0.0 for m in range(len(INPUTS))]))
+
+    # Операции развернуты по четырем компонентам INPUTS: расчет одной передачи делает
+    # сотню таких операций, и циклы по кортежу заметно дороже самой арифметики
+    def _scaled(self, value, factor):
+        g0, g1, g2, g3 = self.grad
+        return Dual(value, (g0 * factor, g1 * factor, g2 * factor, g3 * factor))
+
+    def __add__(self, other):
+        if isinstance(other, Dual):
+            a0, a1, a2, a3 = self.grad
+            b0, b1, b2, b3 = other.grad
+            return Dual(self.value + other.value, (a0 + b0, a1 + b1, a2 + b2, a3 + b3))
+        return Dual(self.value + other, self.grad)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return self._scaled(-self.value, -1.0)
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __mul__(self, other):
+        if isinstance(other, Dual):
+            x, y = self.value, other.value
+            a0, a1, a2, a3 = self.grad
+            b0, b1, b2, b3 = other.grad
+            return Dual(x * y, (a0 * y + x * b0, a1 * y + x * b1, a2 * y + x * b2, a3 * y + x * b3))
+        return self._scaled(self.value * other, other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, Dual):
+            y = other.value
+            q = self.value / y
+            a0, a1, a2, a3 = self.grad
+            b0, b1, b2, b3 = other.grad
+            return Dual(q, ((a0 - q * b0) / y, (a1 - q * b1) / y, (a2 - q * b2) / y, (a3 - q * b3) / y))
+        return self._scaled(self.value / other, 1.0 / other)
+
+    def __rtruediv__(self, other):
+        q = other / self.value
+        return self._scaled(q, -q / self.value)
+
+    def __pow__(self, exponent):
+        return self._scaled(self.value ** exponent, exponent * self.value ** (exponent - 1))
+
+    # Сравнения - по значению (для проверок внутри функций calculations)
+    def __eq__(self, other):
+        return self.value == value_of(other)
+
+    def __lt__(self, other):
+        return self.value < value_of(other)
+
+    def __le__(self, other):
+        return self.value <= value_of(other)
+
+    def __gt__(self, other):
+        return self.value > value_of(other)
+
+    def __ge__(self, other):
+        return self.value >= value_of(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Dual({self.value!r}, {self.grad!r})"
+
+
+def value_of(x):
+    return x.value if isinstance(x, Dual) else x
+
+
+def grad_of(x):
+    return x.grad if isinstance(x, Dual) else (0.0,) * len(INPUTS)
+
+
+def _sqrt(x):
+    root = math.sqrt(x.value)
+    return x._scaled(root, 0.5 / root if root > 0 else 0.0)
+
+
+def _asin(x):
+    # Как в calculate_angle_of_wrap: аргумент прижимается к [-1, 1], там производная 0
+    if x.value >= 1 or x.value <= -1:
+        return Dual(math.asin(max(-1.0, min(1.0, x.value))), grad_of(None))
+    return x._scaled(math.asin(x.value), 1.0 / math.sqrt(1 - x.value * x.value))
+
+
+def _lift(x):
+    return x if isinstance(x, Dual) else Dual(x, grad_of(None))
+
+
+def _center_distance(lp, d1, d2):
+    """calculate_actual_center_distance для Dual."""
+    w = 0.5 * math.pi * (d1 + d2)
+    y = (d2 - d1) ** 2
+    discriminant = _lift((lp - w) ** 2 - 2 * y)
+    if discriminant < 0:
+        raise ValueError("Невозможно рассчитать: длина ремня слишком мала для выбранных шкивов.")
+    return 0.25 * ((lp - w) + _sqrt(discriminant))
+
+
+def _wrap_angle(d1, d2, a):
+    """calculate_angle_of_wrap для Dual."""
+    if a == 0:
+        raise ValueError("Межосевое расстояние не может быть равно нулю.")
+    return math.degrees(1.0) * (math.pi - 2 * _asin(_lift((d2 - d1) / (2 * a))))
+
+
+# --- Ступени ---
+
+def _snap_bounds(index, x, greater_or_equal):
+    """Интервал x, в котором округление до стандартного ряда дает то же значение."""
+    values = index.values
+    if greater_or_equal:
+        k = index.position_ge(x)
+        return (values[k - 1] if k > 0 else -math.inf), (values[k] if k < len(values) - 1 else math.inf)
+    k = index.position_nearest(x)
+    return ((values[k - 1] + values[k]) / 2 if k > 0 else -math.inf,
+            (values[k] + values[k + 1]) / 2 if k < len(values) - 1 else math.inf)
+
+
+@functools.lru_cache(maxsize=None)
+def _range_edges(index):
+    """Границы RangeIndex, на которых табличное значение действительно меняется."""
+    return tuple(e for e in sorted(set(index.lower + index.upper))
+                 if index.lookup(e) != index.lookup(math.nextafter(e, math.inf)))
+
+
+def _range_bounds(index, x):
+    """Ближайшие к x границы скачков RangeIndex."""
+    edges = _range_edges(index)
+    lower = max((e for e in edges if e < x), default=-math.inf)
+    upper = min((e for e in edges if e >= x), default=math.inf)
+    return lower, upper
+
+
+def _count_bounds(x, lookup=None):
+    """Для ceil(x): интервал (k-1, k], внутри которого ceil (и lookup(ceil), если задан) не меняется."""
+    k = math.ceil(x)
+    lower, upper = k - 1, k
+    if lookup is not None:
+        while lower > 0 and lookup(lower) == lookup(k):
+            lower -= 1
+        upper = math.inf if lookup(k + 1) == lookup(k) else k
+        if lower == 0:
+            lower = -math.inf
+    return lower, upper
+
+
+def _to_jump(x, target, grad):
+    """{вход: изменение входа, переводящее величину x в target} по линейному прогнозу."""
+    if not math.isfinite(target):
+        return {}
+    return {name: (target - x) / g for (name, _), g in zip(INPUTS, grad) if g}
+
+
+def _jump(step, title, quantity, bounds, exact, trend, inputs):
+    """Запись о ступени: до ближайшей границы сколько и какое изменение входов к ней приведет."""
+    x = exact.value
+    lower, upper = bounds
+    target = lower if x - lower < upper - x else upper
+    margin = abs(target - x)
+    to_jump = _to_jump(x, target, exact.grad)
+    shares = [abs(delta / inputs[name]) for name, delta in to_jump.items() if inputs[name]]
+    if x:
+        shares.append(margin / abs(x))
+    return {
+        'step': step, 'title': title, 'quantity': quantity, 'value': x, 'lower': lower, 'upper': upper,
+        'target': target, 'margin': margin, 'to_jump': to_jump, 'to_jump_trend': _to_jump(x, target, trend.grad),
+        'near': min(shares, default=math.inf) <= NEAR_JUMP,
+    }
+
+
+def _forward(inputs, load_type_choice, material_correction_factor, power_tables, lp_greater_or_equal, snap):
+    """
+    Один проход цепочки design_drive над Dual. snap=False - без округления d2 и Lp.
+    Возвращает (значения, параметры ступеней).
+    """
+    power, n1, n2, a = (Dual.variable(inputs[name], k) for k, (name, _) in enumerate(INPUTS))
+    i = calculate_transmission_ratio(n1, n2)
+    P_design, kp = calculate_design_power(power, load_type_choice)
+    section = determine_belt_section(P_design.value, n1.value)
+
+    d1_min = get_min_pulley_diameter(section)
+    diameters = STANDARD_PULLEY_DIAMETERS.get(section)
+    lengths = STANDARD_BELT_LENGTHS.get(section)
+    if d1_min is None or not diameters or not lengths:
+        raise ValueError(f"Нет справочных данных для сечения {section}.")
+    d1 = find_nearest_standard_value(d1_min, diameters, greater_or_equal=True)
+    d2_calc = d1 * i
+    d2 = find_nearest_standard_value(d2_calc.value, diameters, greater_or_equal=False) if snap else d2_calc
+    i_actual = get_actual_transmission_ratio(d1, d2)
+
+    L_calc = calculate_belt_length(d1, d2, a)
+    Lp = find_nearest_standard_value(L_calc.value, lengths, greater_or_equal=lp_greater_or_equal) if snap else L_calc
+    a_actual = _center_distance(Lp, d1, d2)
+
+    V = calculate_belt_speed(d1, n1)
+    p0_source = 'catalog'
+    table = (power_tables or {}).get(section)
+    P0_base = table.power(float(d1), n1.value) if table is not None else 0.0
+    Pd = 0.0
+    if not P0_base > 0.0:
+        # Обобщенная P0 ступенчата по V: производная 0
+        p0_source = 'approx'
+        P0_base = Dual(get_p0_value(section, V.value, 1.0), grad_of(None))
+    else:
+        slope = table.slope(float(d1), n1.value)
+        if table.additional is not None:
+            # Pd ступенчата по i_факт и линейна по n1
+            Pd = table.additional.power(value_of(i_actual), n1.value)
+            slope += table.additional.slope(value_of(i_actual), n1.value)
+            P0_base += Pd
+        P0_base = n1._scaled(P0_base, slope)
+    if P0_base <= 0.0:
+        raise ValueError("Не удалось определить базовую мощность P0.")
+    P0 = P0_base * material_correction_factor
+
+    CL = get_cl_value(section, value_of(Lp))
+    alpha1 = _wrap_angle(d1, d2, a_actual)
+    C_alpha = get_calpha_value(alpha1.value)
+
+    z_initial = calculate_number_of_belts(P_design, P0, CL, C_alpha, cz_trial=1.0)
+    Cz = get_cz_value(math.ceil(z_initial.value) if z_initial > 0 else 1)
+    z_calc = calculate_number_of_belts(P_design, P0, CL, C_alpha, cz_trial=Cz)
+    z = math.ceil(z_calc.value) if z_calc > 0 else 1
+
+    values = {
+        'i': i, 'Kp': kp, 'P_design': P_design, 'section': section, 'd1_min': d1_min, 'd1': d1,
+        'd2_calc': d2_calc, 'd2': d2, 'i_actual': i_actual, 'L_calc': L_calc, 'Lp': Lp, 'a_actual': a_actual,
+        'V': V, 'P0_base': P0_base, 'Pd': Pd, 'p0_source': p0_source, 'P0': P0, 'CL': CL, 'alpha1': alpha1,
+        'C_alpha': C_alpha, 'z_initial': z_initial, 'Cz': Cz, 'z_calc': z_calc, 'z': z,
+    }
+    return values, (diameters, lengths, table)
+
+
+def sensitivity_analysis(power, n1, n2, approx_center_distance, load_type_choice, material_correction_factor=1.0,
+                         power_tables=None, lp_greater_or_equal=False):
+    """
+    Чувствительность передачи, рассчитанной design_drive(...) с теми же аргументами.
+
+    Возвращает словарь: 'nominal' - значения расчета (как у design_drive), 'jacobian' и
+    'trend' - {величина: {вход: производная}} для OUTPUTS по INPUTS (см. заголовок модуля),
+    'jumps' - список ступеней: текущее значение величины, интервал без скачка
+    ('lower', 'upper'), ближайшая граница 'target' и расстояние до нее 'margin',
+    изменение каждого входа до этой границы по фактическим ('to_jump') и
+    трендовым ('to_jump_trend') производным и признак 'near' (до скачка меньше NEAR_JUMP).
+    При невозможности расчета выбрасывает ValueError.
+    """
+    inputs = {'power': power, 'n1': n1, 'n2': n2, 'approx_center_distance': approx_center_distance}
+    args = (load_type_choice, material_correction_factor, power_tables, lp_greater_or_equal)
+    exact, (diameters, lengths, table) = _forward(inputs, *args, snap=True)
+    trend, _ = _forward(inputs, *args, snap=False)
+    section = exact['section']
+
+    def jump(step, title, quantity, bounds):
+        return _jump(step, title, quantity, bounds, _lift(exact[quantity]), _lift(trend[quantity]), inputs)
+
+    P_design = exact['P_design'].value
+    limits = (-math.inf, *SECTION_POWER_LIMITS, math.inf)
+    k = next(k for k in range(1, len(limits)) if P_design <= limits[k])
+    jumps = [
+        jump('section', "выбор сечения по P_расч", 'P_design', (limits[k - 1], limits[k])),
+        jump('d2', "округление d2 до стандартного", 'd2_calc',
+             _snap_bounds(index_for(diameters), exact['d2_calc'].value, False)),
+        jump('Lp', "округление длины ремня до стандартной", 'L_calc',
+             _snap_bounds(index_for(lengths), exact['L_calc'].value, lp_greater_or_equal)),
+    ]
+    if exact['p0_source'] == 'approx' and p0_index(section) is not None:
+        jumps.append(jump('P0', "обобщенная P0 по диапазонам V", 'V',
+                          _range_bounds(p0_index(section), exact['V'].value)))
+    jumps += [
+        jump('C_alpha', "Cα по диапазонам угла обхвата", 'alpha1',
+             _range_bounds(calpha_index(), exact['alpha1'].value)),
+        jump('Cz', "Cz по числу ремней", 'z_initial', _count_bounds(exact['z_initial'].value, cz_index().lookup)),
+        jump('z', "округление z вверх", 'z_calc', _count_bounds(exact['z_calc'].value)),
+    ]
+
+    nominal = {key: value_of(value) for key, value in exact.items()}
+    return {
+        'nominal': nominal,
+        'inputs': inputs,
+        'jacobian': {name: dict(zip(inputs, grad_of(exact[name]))) for name, _ in OUTPUTS},
+        'trend': {name: dict(zip(inputs, grad_of(trend[name]))) for name, _ in OUTPUTS},
+        'jumps': jumps,
+    }
+
+
+def _format_delta(value):
+    return f"{value:+.4g}" if value is not None else "-"
+
+
+def print_report(report):
+    nominal = report['nominal']
+    print(f"Расчет: сечение {nominal['section']}, d1 = {nominal['d1']} мм, d2 = {nominal['d2']} мм, "
+          f"Lp = {nominal['Lp']} мм, a_ут = {nominal['a_actual']:.1f} мм, z = {nominal['z']}")
+    header = f"{'величина':<32} {'значение':>10} " + " ".join(f"{'∂/∂' + symbol:>11}" for _, symbol in INPUTS)
+    for key, caption in (('jacobian', "Производные фактического расчета (d2, Lp округлены):"),
+                         ('trend', "Тренд без округления d2 и Lp:")):
+        print(caption)
+        print(header)
+        for name, title in OUTPUTS:
+            row = report[key][name]
+            print(f"{title:<32} {nominal[name]:>10.4g} " + " ".join(f"{row[k]:>11.4g}" for k, _ in INPUTS))
+    print("Ступени (изменение входа до скачка; в скобках - по тренду):")
+    for jump in report['jumps']:
+        mark = "!" if jump['near'] else " "
+        deltas = ", ".join(f"{symbol} {_format_delta(jump['to_jump'].get(name))}"
+                           f" ({_format_delta(jump['to_jump_trend'].get(name))})" for name, symbol in INPUTS)
+        print(f"{mark} {jump['title']}: {jump['quantity']} = {jump['value']:.4g} в ({jump['lower']:.4g}; "
+              f"{jump['upper']:.4g}]; {deltas}")
+    near = [jump['title'] for jump in report['jumps'] if jump['near']]
+    if near:
+        print(f"Близко к скачку: {', '.join(near)}.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Чувствительность результатов расчета клиноременной передачи.")
+    parser.add_argument('--P', type=float, required=True, help="номинальная мощность, кВт")
+    parser.add_argument('--n1', type=float, required=True, help="частота ведущего вала, об/мин")
+    parser.add_argument('--n2', type=float, required=True, help="частота ведомого вала, об/мин")
+    parser.add_argument('--a', type=float, required=True, help="примерное межосевое расстояние, мм")
+    parser.add_argument('--load-type', default='1', help="тип нагрузки 1-4")
+    parser.add_argument('--catalog', action='store_true', help="использовать каталожные таблицы мощности")
+    parser.add_argument('--lp-ge', action='store_true', help="подбирать длину ремня не меньше расчетной")
+    args = parser.parse_args(argv)
+
+    power_tables = None
+    if args.catalog:
+        from catalog import power_table_registry
+        power_tables = power_table_registry().tables() or None
+    try:
+        report = sensitivity_analysis(args.P, args.n1, args.n2, args.a, args.load_type, power_tables=power_tables,
+                                      lp_greater_or_equal=args.lp_ge)
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        return 1
+    print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
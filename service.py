@@ -0,0 +1,319 @@
+# service.py
+#
+# Локальный HTTP/JSON-сервис расчета клиноременных передач (только asyncio из
+# стандартной библиотеки, без веб-фреймворков).
+#
+#   POST /design  - одна передача: {"P": 11, "n1": 1450, "n2": 500, "a_approx": 800,
+#                   "load_type": "2", "material": "..."} -> результат расчета;
+#   POST /batch   - {"drives": [...]} (или просто список) -> {"results": [...]};
+#   GET  /stats   - число запросов, размеры пакетов и перцентили задержки;
+#   GET  /health  - проверка доступности.
+#
+# Одиночные запросы, пришедшие почти одновременно, объединяются: первый запрос
+# открывает окно window_ms, все запросы за это окно (но не больше max_batch)
+# считаются одним вызовом batch.design_drives_batch (по умолчанию с перебором
+# всех допустимых сечений, как main.py --batch). Таблицы каталога
+# загружаются один раз при старте и общие для всех запросов.
+#
+#   python service.py --port 8765 --window-ms 2
+
+import argparse
+import asyncio
+import collections
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from batch import SECTION_CHOICE_COLUMNS, design_drives_batch
+from catalog import power_table_registry
+from main import BATCH_OUTPUT_FIELDS, parse_drive_record
+
+RESULT_FIELDS = [field for field in BATCH_OUTPUT_FIELDS if field != 'line']
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class RequestError(Exception):
+    """Ошибка запроса: текст уходит клиенту в поле 'error' с кодом status."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _record(raw):
+    try:
+        record = parse_drive_record(raw)
+    except ValueError as e:
+        raise RequestError(str(e))
+    return record
+
+
+def _column(series):
+    """Столбец -> список для JSON: NaN, <NA> и ±inf (например, i при n2 = 0) -> None."""
+    values = series.to_numpy(dtype=object, na_value=None)
+    if series.dtype.kind == 'f':
+        values[~np.isfinite(series.to_numpy())] = None
+    return values.tolist()
+
+
+def _results(frame, fields=RESULT_FIELDS):
+    """DataFrame из design_drives_batch -> список словарей с полями fields (нечисловые значения -> null)."""
+    columns = [_column(frame[field]) for field in fields]
+    return [dict(zip(fields, row)) for row in zip(*columns)]
+
+
+class LatencyStats:
+    """Задержки последних window запросов и перцентили по ним."""
+
+    def __init__(self, window=100000):
+        self.latencies = collections.deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.coalesced = 0
+        self.started = time.monotonic()
+
+    def add(self, seconds, ok=True):
+        self.requests += 1
+        self.errors += not ok
+        self.latencies.append(seconds)
+
+    def add_batch(self, size):
+        self.batches += 1
+        self.coalesced += size
+
+    def report(self):
+        values = sorted(self.latencies)
+
+        def percentile(q):
+            return values[min(len(values) - 1, int(q / 100 * len(values)))] * 1000 if values else None
+
+        uptime = time.monotonic() - self.started
+        return {
+            'requests': self.requests, 'errors': self.errors, 'uptime_seconds': uptime,
+            'requests_per_second': self.requests / uptime if uptime > 0 else 0.0,
+            'coalesced_batches': self.batches,
+            'mean_batch_size': self.coalesced / self.batches if self.batches else 0.0,
+            'latency_ms': {'p50': percentile(50), 'p90': percentile(90), 'p99': percentile(99),
+                           'max': values[-1] * 1000 if values else None, 'samples': len(values)},
+        }
+
+
+class Coalescer:
+    """
+    Собирает одиночные расчеты в пакеты по времени (window) и размеру (max_batch).
+    Одновременно считается не больше одного пакета: запросы, пришедшие во время
+    расчета, копятся и уходят следующим пакетом сразу после его окончания,
+    поэтому под нагрузкой пакеты сами укрупняются.
+    """
+
+    def __init__(self, compute, stats, window=0.002, max_batch=1024):
+        self.compute = compute
+        self.stats = stats
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = []
+        self._timer = None
+        self._busy = False
+
+    def submit(self, record):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((record, future))
+        if self._busy:
+            pass  # уйдет следующим пакетом по окончании текущего
+        elif len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        if pending:
+            self._busy = True
+            self.stats.add_batch(len(pending))
+            asyncio.ensure_future(self._run(pending))
+
+    async def _run(self, pending):
+        try:
+            results = await self.compute([record for record, _ in pending])
+        except Exception as e:  # ошибка всего пакета - всем его запросам
+            results = [e] * len(pending)
+        finally:
+            self._busy = False
+            if self._pending:
+                self._flush()
+        for (_, future), result in zip(pending, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+class DesignService:
+    """HTTP-сервис: разбор запросов, маршрутизация, расчет в отдельном потоке."""
+
+    def __init__(self, power_tables=None, window=0.002, max_batch=1024, lp_greater_or_equal=False,
+                 section_mode='all'):
+        self.power_tables = power_tables if power_tables is not None else power_table_registry().tables()
+        self.lp_greater_or_equal = lp_greater_or_equal
+        # Как и main.py --batch, по умолчанию сечение выбирается перебором всех допустимых
+        self.section_mode = section_mode
+        self.fields = RESULT_FIELDS + SECTION_CHOICE_COLUMNS if section_mode == 'all' else RESULT_FIELDS
+        self.stats = LatencyStats()
+        # Один поток расчета: NumPy считает пакет, а цикл событий тем временем принимает запросы
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="design")
+        self.coalescer = Coalescer(self._compute, self.stats, window, max_batch)
+
+    def _compute_sync(self, records):
+        frame = design_drives_batch(records, self.power_tables, self.lp_greater_or_equal, self.section_mode)
+        return _results(frame, self.fields)
+
+    async def _compute(self, records):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._compute_sync, records)
+
+    async def handle(self, method, path, body):
+        """Возвращает (код ответа, объект для JSON)."""
+        if path == '/health':
+            return 200, {'status': 'ok', 'profiles': sorted(self.power_tables)}
+        if path == '/stats':
+            return 200, self.stats.report()
+        if path not in ('/design', '/batch'):
+            raise RequestError(f"Неизвестный адрес: {path}", 404)
+        if method != 'POST':
+            raise RequestError("Ожидается метод POST.", 405)
+        try:
+            payload = json.loads(body or b'null')
+        except ValueError:
+            raise RequestError("Тело запроса должно быть JSON.")
+
+        if path == '/design':
+            result = await self.coalescer.submit(_record(payload))
+            return 200, result
+        drives = payload.get('drives') if isinstance(payload, dict) else payload
+        if not isinstance(drives, list):
+            raise RequestError("Ожидается список передач или объект {\"drives\": [...]}.")
+        results = [None] * len(drives)
+        records, positions = [], []
+        for position, raw in enumerate(drives):
+            try:
+                records.append(_record(raw))
+                positions.append(position)
+            except RequestError as e:
+                results[position] = {'error': str(e)}
+        if records:
+            for position, result in zip(positions, await self._compute(records)):
+                results[position] = result
+        return 200, {'results': results}
+
+    async def serve_connection(self, reader, writer):
+        """Обработка соединения HTTP/1.1 (keep-alive, тело по Content-Length)."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                started = time.perf_counter()
+                lines = head.decode('latin-1').split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version.upper() != 'HTTP/1.0')
+
+                status, payload = 200, None
+                try:
+                    length = int(headers.get('content-length') or 0)
+                    if length > MAX_BODY_BYTES:
+                        keep_alive = False
+                        raise RequestError("Слишком большое тело запроса.", 413)
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = await self.handle(method.upper(), target.split('?', 1)[0], body)
+                except RequestError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except asyncio.IncompleteReadError:
+                    return
+                except Exception as e:
+                    status, payload = 500, {'error': f"Внутренняя ошибка: {e}"}
+
+                try:
+                    # allow_nan=False: NaN/Infinity - не JSON, клиенты их не разберут
+                    data = json.dumps(payload, ensure_ascii=False, allow_nan=False).encode('utf-8')
+                except ValueError as e:
+                    status, payload = 500, {'error': f"Внутренняя ошибка: {e}"}
+                    data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data)
+                await writer.drain()
+                self.stats.add(time.perf_counter() - started, status == 200)
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            return
+        finally:
+            writer.close()
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+async def serve(host="127.0.0.1", port=8765, window=0.002, max_batch=1024, lp_greater_or_equal=False,
+                ready=None, section_mode='all'):
+    """Запускает сервис и работает до отмены. ready - asyncio.Event, выставляется после старта."""
+    service = DesignService(window=window, max_batch=max_batch, lp_greater_or_equal=lp_greater_or_equal,
+                            section_mode=section_mode)
+    server = await asyncio.start_server(service.serve_connection, host, port, backlog=1024)
+    print(f"Сервис расчета передач: http://{host}:{port} (окно объединения {window * 1000:.1f} мс, "
+          f"пакет до {max_batch}, профили каталога: {', '.join(sorted(service.power_tables)) or 'нет'})")
+    if ready is not None:
+        ready.set()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP/JSON-сервис расчета клиноременных передач.")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--window-ms', type=float, default=2.0,
+                        help="окно объединения одиночных запросов в пакет, мс (по умолчанию 2)")
+    parser.add_argument('--max-batch', type=int, default=1024, help="максимальный размер пакета")
+    parser.add_argument('--lp-ge', action='store_true',
+                        help="подбирать стандартную длину ремня не меньше расчетной (как на странице калькулятора)")
+    parser.add_argument('--threshold-sections', action='store_true',
+                        help="выбирать сечение по порогам мощности; по умолчанию считаются все допустимые "
+                             "сечения и берется лучшее (как main.py --batch)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.window_ms / 1000, args.max_batch, args.lp_ge,
+                          section_mode='threshold' if args.threshold_sections else 'all'))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
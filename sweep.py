@@ -0,0 +1,238 @@
+# sweep.py
+#
+# Многопроцессный перебор пространства параметров (например, все n1 x все P x сетка i)
+# для построения диаграмм подбора. Сетка не передается воркерам целиком: каждая
+# порция задается диапазоном номеров [start, stop), и воркер сам восстанавливает
+# свои точки по осям. Таблицы мощностей каталога один раз кладутся в разделяемую
+# память (multiprocessing.shared_memory), воркеры подключаются к ней без копирования.
+
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from batch import design_drives_batch
+from power_model import PowerModel
+from power_table import AdditionalPowerTable, PowerTable, SplinePowerTable
+
+DEFAULT_COLUMNS = ['P', 'n1', 'n2', 'a_approx', 'section', 'd1', 'd2', 'Lp', 'a_actual', 'V', 'Pd', 'P0', 'z', 'error']
+
+
+class SharedPowerTables:
+    """
+    Таблицы мощностей {сечение: PowerTable} в одном блоке разделяемой памяти.
+    descriptor - небольшой словарь (имя блока, смещения и размеры массивов),
+    которого достаточно, чтобы подключиться к таблицам из другого процесса.
+    SplinePowerTable передается вместе с коэффициентами кусков, PowerModel - только
+    коэффициентами модели в самом descriptor (массивов у нее нет); таблицы других
+    типов воспроизвести в воркере нельзя, для них выбрасывается TypeError.
+    Используется как контекстный менеджер: при выходе блок освобождается.
+    """
+
+    def __init__(self, power_tables):
+        arrays, layout, offset = [], [], 0
+        for section, table in (power_tables or {}).items():
+            if type(table) not in (PowerTable, SplinePowerTable, PowerModel):
+                raise TypeError(f"Таблицу типа {type(table).__name__} (сечение {section}) нельзя передать воркерам.")
+            entry = {'section': section, 'profile': table.profile, 'arrays': [],
+                     'kind': 'spline' if isinstance(table, SplinePowerTable) else 'table'}
+            if isinstance(table, PowerModel):
+                entry.update(kind='model', model=table.to_dict())
+                layout.append(entry)
+                continue
+            additional = table.additional
+            parts = (table.d_axis, table.n_axis, table.grid)
+            if entry['kind'] == 'spline':
+                parts += (table.cells, table.d_lines, table.n_lines)
+            if additional is not None:
+                parts += (additional.i_axis, additional.n_axis, additional.grid)
+            for array in parts:
+                array = np.ascontiguousarray(array, dtype=np.float64)
+                entry['arrays'].append((offset, array.shape))
+                arrays.append((offset, array))
+                offset += array.nbytes
+            layout.append(entry)
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for start, array in arrays:
+            np.ndarray(array.shape, dtype=np.float64, buffer=self._shm.buf, offset=start)[...] = array
+        self.descriptor = {'name': self._shm.name, 'layout': layout}
+
+    @staticmethod
+    def attach(descriptor):
+        """Подключается к блоку и возвращает (блок, {сечение: таблица}) без копирования сеток."""
+        try:
+            shm = shared_memory.SharedMemory(name=descriptor['name'], track=False)
+        except TypeError:  # Python < 3.13: отслеживание отключить нельзя, блок освобождает владелец
+            shm = shared_memory.SharedMemory(name=descriptor['name'])
+        tables = {}
+        for entry in descriptor['layout']:
+            if entry['kind'] == 'model':
+                tables[entry['section']] = PowerModel.from_dict(entry['model'], profile=entry['profile'])
+                continue
+            parts = [np.ndarray(shape, dtype=np.float64, buffer=shm.buf, offset=start)
+                     for start, shape in entry['arrays']]
+            grid, parts = parts[:3], parts[3:]
+            coefficients = None
+            if entry['kind'] == 'spline':
+                coefficients, parts = parts[:3], parts[3:]
+            additional = AdditionalPowerTable(*parts, profile=entry['profile']) if parts else None
+            if coefficients is not None:
+                tables[entry['section']] = SplinePowerTable(*grid, profile=entry['profile'], additional=additional,
+                                                            coefficients=coefficients)
+            else:
+                tables[entry['section']] = PowerTable(*grid, profile=entry['profile'], additional=additional)
+        return shm, tables
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def grid_size(axes):
+    return math.prod(len(values) for values in axes.values())
+
+
+def grid_points(axes, fixed, start, stop):
+    """
+    Точки сетки с номерами [start, stop) в виде DataFrame входных данных для batch.
+    Ось 'i' (передаточное число) превращается в n2 = n1 / i и сохраняется как i_target.
+    """
+    names = list(axes)
+    index = np.unravel_index(np.arange(start, stop), [len(axes[name]) for name in names])
+    columns = {name: np.asarray(axes[name])[idx] for name, idx in zip(names, index)}
+    frame = pd.DataFrame(columns)
+    for name, value in (fixed or {}).items():
+        frame[name] = value
+    if 'i' in frame:
+        frame['n2'] = frame['n1'] / frame['i']
+        frame = frame.rename(columns={'i': 'i_target'})
+    return frame
+
+
+# --- Воркер ---
+
+_worker = {}
+
+
+def _init_worker(descriptor, axes, fixed, columns, batch_options):
+    shm, tables = SharedPowerTables.attach(descriptor) if descriptor else (None, {})
+    _worker.update(shm=shm, tables=tables, axes=axes, fixed=fixed, columns=columns, batch_options=batch_options)
+
+
+def _run_chunk(chunk_id, start, stop):
+    started = time.perf_counter()
+    inputs = grid_points(_worker['axes'], _worker['fixed'], start, stop)
+    result = design_drives_batch(inputs, power_tables=_worker['tables'], **_worker['batch_options'])
+    if 'i_target' in inputs:
+        result['i_target'] = inputs['i_target'].to_numpy()
+    result = result[[c for c in _worker['columns'] if c in result]]
+    return chunk_id, result, {'pid': os.getpid(), 'rows': stop - start, 'seconds': time.perf_counter() - started}
+
+
+def run_sweep(axes, fixed=None, power_tables=None, workers=None, chunk_size=50000, columns=None,
+              **batch_options):
+    """
+    Рассчитывает все сочетания значений осей на пуле процессов.
+
+    axes  - словарь {столбец: значения}; допустимы P, n1, n2 (или i), a_approx, load_type, material.
+    fixed - словарь постоянных столбцов, например {'a_approx': 1000, 'load_type': '2'}.
+    power_tables - словарь {сечение: PowerTable, SplinePowerTable или PowerModel}; передается воркерам
+                   через разделяемую память.
+    columns - какие столбцы результата вернуть (по умолчанию DEFAULT_COLUMNS и i_target, если есть ось i).
+    Остальные именованные параметры передаются в design_drives_batch.
+
+    Возвращает (DataFrame результатов в порядке сетки, отчет по времени воркеров).
+    """
+    total = grid_size(axes)
+    workers = workers or os.cpu_count() or 1
+    columns = columns or (DEFAULT_COLUMNS + (['i_target'] if 'i' in axes else []))
+    chunks = [(k, start, min(start + chunk_size, total)) for k, start in enumerate(range(0, total, chunk_size))]
+    axes = {name: np.asarray(values) for name, values in axes.items()}
+
+    started = time.perf_counter()
+    parts, timings = [None] * len(chunks), []
+    shared = SharedPowerTables(power_tables) if power_tables else None
+    try:
+        descriptor = shared.descriptor if shared else None
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(descriptor, axes, fixed, columns, batch_options)) as pool:
+            futures = [pool.submit(_run_chunk, *chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                chunk_id, result, timing = future.result()
+                parts[chunk_id] = result
+                timings.append(timing)
+    finally:
+        if shared:
+            shared.close()
+    wall = time.perf_counter() - started
+
+    result = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+    per_worker = []
+    if timings:  # пустая сетка: порций нет, отчет по воркерам пустой
+        per_worker = (pd.DataFrame(timings).groupby('pid')
+                      .agg(chunks=('rows', 'size'), rows=('rows', 'sum'), busy_seconds=('seconds', 'sum'))
+                      .reset_index().to_dict('records'))
+    report = {
+        'points': total, 'chunks': len(chunks), 'workers': workers, 'wall_seconds': wall,
+        'points_per_second': total / wall if wall > 0 else 0.0,
+        'per_worker': per_worker,
+    }
+    return result, report
+
+
+def _parse_axis(text):
+    """'500:3000:50' -> 500, 550, ..., 3000; '1,2,5' -> [1, 2, 5]; '1000' -> [1000]."""
+    if ':' in text:
+        start, stop, step = (float(v) for v in text.split(':'))
+        return np.round(np.arange(start, stop + step / 2, step), 10)
+    return np.array([float(v) for v in text.split(',')])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Многопроцессный перебор параметров клиноременных передач.")
+    parser.add_argument('--n1', default='500:3000:50', help="частоты n1, об/мин: 'старт:стоп:шаг' или список")
+    parser.add_argument('--power', default='0.5:200:0.5', help="мощности P, кВт")
+    parser.add_argument('--ratio', default='1:5:0.25', help="передаточные числа i")
+    parser.add_argument('--a', default='1000', help="примерные межосевые расстояния, мм")
+    parser.add_argument('--load-type', default='1', help="тип нагрузки 1-4")
+    parser.add_argument('--workers', type=int, default=None, help="число процессов (по умолчанию - все ядра)")
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--catalog', action='store_true', help="использовать каталожные таблицы мощности")
+    parser.add_argument('--out', help="файл результатов .csv")
+    args = parser.parse_args(argv)
+
+    power_tables = None
+    if args.catalog:
+        from catalog import power_table_registry
+        power_tables = power_table_registry().tables() or None
+
+    axes = {'n1': _parse_axis(args.n1), 'P': _parse_axis(args.power), 'i': _parse_axis(args.ratio),
+            'a_approx': _parse_axis(args.a)}
+    result, report = run_sweep(axes, fixed={'load_type': args.load_type}, power_tables=power_tables,
+                               workers=args.workers, chunk_size=args.chunk_size)
+
+    print(f"Точек: {report['points']}, порций: {report['chunks']}, процессов: {report['workers']}")
+    print(f"Время: {report['wall_seconds']:.2f} с ({report['points_per_second']:.0f} точек/с)")
+    for worker in report['per_worker']:
+        print(f"  воркер {worker['pid']}: порций {worker['chunks']}, точек {worker['rows']}, "
+              f"занят {worker['busy_seconds']:.2f} с")
+    if args.out:
+        result.to_csv(args.out, index=False)
+        print(f"Результаты сохранены: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
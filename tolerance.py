@@ -0,0 +1,243 @@
+# tolerance.py
+#
+# Анализ допусков (Монте-Карло) спроектированной передачи.
+# Номинальный расчет (calculations.design_drive) фиксирует "железо": сечение,
+# шкивы d1 и d2, стандартную длину ремня Lp и выбранное количество ремней z.
+# В реальной передаче отличаются от номинала скольжение ремня, фактическая
+# частота вращения двигателя, межосевое расстояние после натяжения и режим
+# нагрузки. Для каждой из N выборок этих величин цепочка
+# i_факт -> n2 -> α1 -> Cα -> V -> P0 (+Pd) -> z считается сразу над массивами NumPy
+# (как в batch.py), а отчет дает распределения результатов и вероятность того,
+# что нужно больше ремней, чем выбрано.
+#
+#   python tolerance.py --P 11 --n1 1450 --n2 500 --a 800 --load-type 2 --samples 1000000
+
+import argparse
+import math
+
+import numpy as np
+
+from batch import LOAD_TYPE_CODES, calpha_many, ceil_belts, cl_many, cz_many, p0_many
+from calculations import design_drive
+from data import LOAD_COEFFICIENTS
+
+# Распределения по умолчанию. Формат описания величины:
+#   число                          - постоянное значение;
+#   ('uniform', от, до)            - равномерное;
+#   ('normal', среднее, ско)       - нормальное;
+#   ('triangular', от, мода, до)   - треугольное;
+#   {значение: вероятность, ...}   - дискретное (для load_type - коды '1'..'4').
+# n1_factor и center_distance_factor - множители к номинальным n1 и a_ут,
+# power_factor - к номинальной мощности P. load_type=None - номинальный тип нагрузки.
+DEFAULT_DISTRIBUTIONS = {
+    'slip': ('uniform', 0.01, 0.02),
+    'n1_factor': ('normal', 1.0, 0.005),
+    'center_distance_factor': ('uniform', 0.99, 1.02),
+    'load_type': None,
+    'power_factor': 1.0,
+}
+
+# Выходные величины отчета: (ключ, описание)
+OUTPUTS = (
+    ('i_actual', "фактическое передаточное число"),
+    ('n2', "частота ведомого вала, об/мин"),
+    ('alpha1', "угол обхвата α1, град"),
+    ('V', "скорость ремня, м/с"),
+    ('P0', "мощность одного ремня P0, кВт"),
+    ('z_calc', "расчетное количество ремней"),
+)
+PERCENTILES = (1, 5, 50, 95, 99)
+
+
+def _choice(weights, size, rng):
+    """Номера вариантов дискретного распределения {вариант: вероятность} (вероятности нормируются)."""
+    p = np.asarray(list(weights.values()), dtype=float)
+    if np.any(p < 0) or p.sum() <= 0:
+        raise ValueError("Вероятности дискретного распределения должны быть неотрицательными.")
+    return rng.choice(len(p), size=size, p=p / p.sum())
+
+
+def sample(spec, size, rng):
+    """Массив из size значений по описанию распределения (см. DEFAULT_DISTRIBUTIONS)."""
+    if isinstance(spec, dict):
+        return np.asarray(list(spec), dtype=float)[_choice(spec, size, rng)]
+    if isinstance(spec, (int, float)):
+        return np.full(size, float(spec))
+    kind, *params = spec
+    if kind == 'uniform':
+        return rng.uniform(params[0], params[1], size)
+    if kind == 'normal':
+        return rng.normal(params[0], params[1], size)
+    if kind == 'triangular':
+        low, mode, high = params
+        return np.full(size, float(mode)) if low == high else rng.triangular(low, mode, high, size)
+    raise ValueError(f"Неизвестное распределение: {kind}.")
+
+
+def _summary(values):
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return {'mean': None, 'std': None, 'min': None, 'max': None, 'percentiles': {}}
+    return {'mean': float(finite.mean()), 'std': float(finite.std()), 'min': float(finite.min()),
+            'max': float(finite.max()),
+            'percentiles': dict(zip(PERCENTILES, np.percentile(finite, PERCENTILES).tolist()))}
+
+
+def tolerance_analysis(power, n1, n2, approx_center_distance, load_type_choice, material_correction_factor=1.0,
+                       power_tables=None, lp_greater_or_equal=False, distributions=None, samples=100_000,
+                       seed=None, keep_samples=False):
+    """
+    Монте-Карло анализ передачи, рассчитанной design_drive(...) с теми же аргументами.
+
+    distributions - словарь, заменяющий часть DEFAULT_DISTRIBUTIONS.
+    Возвращает словарь: 'nominal' - номинальный расчет, 'outputs' - {величина: mean, std,
+    min, max, percentiles}, 'z_distribution' - {z: доля выборок}, 'p_z_exceeds' -
+    вероятность, что нужно больше ремней, чем выбрано, 'p_wrap_below_120' - доля выборок
+    с α1 < 120°; при keep_samples=True также 'values' - массивы по выборкам.
+    """
+    nominal = design_drive(power, n1, n2, approx_center_distance, load_type_choice, material_correction_factor,
+                           power_tables, lp_greater_or_equal)
+    spec = {**DEFAULT_DISTRIBUTIONS, **(distributions or {})}
+    rng = np.random.default_rng(seed)
+    section, d1, d2, Lp = nominal['section'], float(nominal['d1']), float(nominal['d2']), float(nominal['Lp'])
+
+    # --- Выборки входных величин ---
+    slip = sample(spec['slip'], samples, rng)
+    n1_s = n1 * sample(spec['n1_factor'], samples, rng)
+    a = nominal['a_actual'] * sample(spec['center_distance_factor'], samples, rng)
+    load = spec['load_type'] if spec['load_type'] is not None else {load_type_choice: 1.0}
+    kp_by_type = {code: LOAD_COEFFICIENTS[name] for code, name in LOAD_TYPE_CODES.items()}
+    unknown = [str(code) for code in load if str(code) not in kp_by_type]
+    if unknown:
+        raise ValueError(f"Неизвестный тип нагрузки: {', '.join(unknown)}.")
+    kp = np.asarray([kp_by_type[str(code)] for code in load])[_choice(load, samples, rng)]
+    P_design = power * sample(spec['power_factor'], samples, rng) * kp
+
+    # --- Передаточное число и частота ведомого вала ---
+    i_actual = d2 / (d1 * (1 - slip))
+    n2_s = n1_s / i_actual
+
+    # --- Угол обхвата при фактическом межосевом расстоянии ---
+    alpha1 = np.degrees(np.pi - 2 * np.arcsin(np.clip((d2 - d1) / (2 * a), -1, 1)))
+    C_alpha = calpha_many(alpha1)
+
+    # --- Скорость ремня и P0 (как в batch.design_drives_batch) ---
+    V = np.pi * d1 * n1_s / 60000
+    table = (power_tables or {}).get(section)
+    p0_base = np.full(samples, np.nan)
+    Pd = np.zeros(samples)
+    if table is not None:
+        p0_base = table.power_many(np.full(samples, d1), n1_s)
+        if table.additional is not None:
+            Pd = np.where(p0_base > 0, table.additional.power_many(i_actual, n1_s), 0.0)
+    P0 = np.where(p0_base > 0, p0_base + Pd, p0_many(section, V)) * material_correction_factor
+
+    # --- Требуемое количество ремней с уточнением по Cz ---
+    denominator = P0 * cl_many(section, np.array([Lp]))[0] * C_alpha
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_initial = P_design / denominator
+        Cz = cz_many(ceil_belts(np.where(denominator > 0, z_initial, 1.0)))
+        z_calc = np.where(denominator > 0, P_design / (denominator * Cz), np.inf)
+    z_required = np.where(np.isfinite(z_calc), ceil_belts(np.where(np.isfinite(z_calc), z_calc, 1.0)), np.inf)
+
+    values = {'i_actual': i_actual, 'n2': n2_s, 'alpha1': alpha1, 'V': V, 'P0': P0, 'z_calc': z_calc}
+    z_values, z_counts = np.unique(z_required, return_counts=True)
+    report = {
+        'nominal': nominal,
+        'samples': samples,
+        'distributions': spec,
+        'outputs': {name: _summary(values[name]) for name, _ in OUTPUTS},
+        'z_distribution': {(int(z) if math.isfinite(z) else None): count / samples
+                           for z, count in zip(z_values.tolist(), z_counts.tolist())},
+        'p_z_exceeds': float(np.mean(z_required > nominal['z'])),
+        'p_wrap_below_120': float(np.mean(alpha1 < 120)),
+    }
+    if keep_samples:
+        report['values'] = {**values, 'slip': slip, 'n1': n1_s, 'a': a, 'P_design': P_design,
+                             'z': z_required}
+    return report
+
+
+def print_report(report):
+    nominal = report['nominal']
+    print(f"Номинальный расчет: сечение {nominal['section']}, d1 = {nominal['d1']} мм, d2 = {nominal['d2']} мм, "
+          f"Lp = {nominal['Lp']} мм, a_ут = {nominal['a_actual']:.1f} мм, z = {nominal['z']}")
+    print(f"Выборок: {report['samples']}")
+    print(f"{'величина':<34} {'среднее':>10} {'ско':>9} " + " ".join(f"{f'P{p}':>9}" for p in PERCENTILES))
+    for name, title in OUTPUTS:
+        stats = report['outputs'][name]
+        if stats['mean'] is None:
+            print(f"{title:<34} {'-':>10}")
+            continue
+        print(f"{title:<34} {stats['mean']:>10.4g} {stats['std']:>9.3g} "
+              + " ".join(f"{stats['percentiles'][p]:>9.4g}" for p in PERCENTILES))
+    print("Требуемое количество ремней:")
+    for z, share in report['z_distribution'].items():
+        label = f"z = {z}" if z is not None else "P0 не определена"
+        print(f"  {label:<18} {share * 100:>7.2f}%")
+    print(f"Вероятность, что выбранных {nominal['z']} ремней не хватит: {report['p_z_exceeds'] * 100:.2f}%")
+    print(f"Вероятность угла обхвата меньше 120°: {report['p_wrap_below_120'] * 100:.2f}%")
+
+
+def _parse_load_mix(text):
+    """'2:0.7,3:0.3' -> {'2': 0.7, '3': 0.3}."""
+    mix = {}
+    for part in text.split(','):
+        code, _, weight = part.partition(':')
+        mix[code.strip()] = float(weight or 1.0)
+    return mix
+
+
+def main(argv=None):
+    import time
+
+    parser = argparse.ArgumentParser(description="Анализ допусков клиноременной передачи методом Монте-Карло.")
+    parser.add_argument('--P', type=float, required=True, help="номинальная мощность, кВт")
+    parser.add_argument('--n1', type=float, required=True, help="частота ведущего вала, об/мин")
+    parser.add_argument('--n2', type=float, required=True, help="частота ведомого вала, об/мин")
+    parser.add_argument('--a', type=float, required=True, help="примерное межосевое расстояние, мм")
+    parser.add_argument('--load-type', default='1', help="номинальный тип нагрузки 1-4")
+    parser.add_argument('--samples', type=int, default=100_000, help="число выборок (по умолчанию 100000)")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--slip', nargs=2, type=float, metavar=('ОТ', 'ДО'),
+                        help="скольжение ремня, равномерно (по умолчанию 0.01-0.02)")
+    parser.add_argument('--n1-std', type=float, metavar='ДОЛЯ',
+                        help="относительное ско частоты двигателя (по умолчанию 0.005)")
+    parser.add_argument('--a-range', nargs=2, type=float, metavar=('ОТ', 'ДО'),
+                        help="множитель межосевого расстояния после натяжения, равномерно (по умолчанию 0.99-1.02)")
+    parser.add_argument('--load-mix', metavar="'2:0.7,3:0.3'",
+                        help="вероятности типов нагрузки (по умолчанию - только номинальный)")
+    parser.add_argument('--catalog', action='store_true', help="использовать каталожные таблицы мощности")
+    parser.add_argument('--lp-ge', action='store_true', help="подбирать длину ремня не меньше расчетной")
+    args = parser.parse_args(argv)
+
+    distributions = {}
+    if args.slip:
+        distributions['slip'] = ('uniform', *args.slip)
+    if args.n1_std is not None:
+        distributions['n1_factor'] = ('normal', 1.0, args.n1_std)
+    if args.a_range:
+        distributions['center_distance_factor'] = ('uniform', *args.a_range)
+    if args.load_mix:
+        distributions['load_type'] = _parse_load_mix(args.load_mix)
+
+    power_tables = None
+    if args.catalog:
+        from catalog import power_table_registry
+        power_tables = power_table_registry().tables() or None
+
+    started = time.perf_counter()
+    try:
+        report = tolerance_analysis(args.P, args.n1, args.n2, args.a, args.load_type, power_tables=power_tables,
+                                    lp_greater_or_equal=args.lp_ge, distributions=distributions,
+                                    samples=args.samples, seed=args.seed)
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        return 1
+    print_report(report)
+    print(f"Время: {time.perf_counter() - started:.2f} с")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())